@@ -1,9 +1,11 @@
+import logging
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 
 from alembic import context
+from alembic.script import ScriptDirectory
 
 
 import os
@@ -22,9 +24,19 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 # here i am adding our model's MetaData object
-from app.database import Base 
+from app.models import Base
 target_metadata = Base.metadata 
 
+# Monthly article_views_YYYYMM tables on SQLite are managed by app.view_storage
+from app.view_storage import SQLITE_TABLE_PREFIX
+from app.startup import BASELINE_REVISION, is_unversioned_baseline
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "table" and reflected and compare_to is None and name.startswith(SQLITE_TABLE_PREFIX):
+        return False
+    return True
+
 database_url = os.getenv("DATABASE_URL")
 if database_url:
     # If DATABASE_URL is set, use it as the SQLAlchemy URL
@@ -51,6 +63,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -74,9 +87,17 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_object=include_object
         )
 
+        # A database the app created with create_all before migrations existed
+        # already has the initial schema; record that instead of recreating it
+        if is_unversioned_baseline(connection):
+            logging.getLogger("alembic.env").info(
+                f"Existing schema without alembic_version, stamping {BASELINE_REVISION}"
+            )
+            context.get_context().stamp(ScriptDirectory.from_config(config), BASELINE_REVISION)
+
         with context.begin_transaction():
             context.run_migrations()
 
@@ -0,0 +1,150 @@
+"""partition article_views by month
+
+Revision ID: 7b2e4c1f9a3d
+Revises: 3f1c2a9d8b7e
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from datetime import date, datetime
+from typing import Dict, List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2e4c1f9a3d'
+down_revision: Union[str, None] = '3f1c2a9d8b7e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Frozen copies of the app.view_storage helpers as of this revision, so
+# later changes to the app cannot change what this migration does
+SQLITE_TABLE_PREFIX = 'article_views_'
+FUTURE_PARTITION = 'p_future'
+PARTITIONS_AHEAD = 2
+
+
+def _is_mysql() -> bool:
+    return op.get_bind().dialect.name in ('mysql', 'mariadb')
+
+
+def _month_start(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _to_days(day: date) -> int:
+    # MySQL TO_DAYS counts from year 0, Python ordinals from year 1
+    return day.toordinal() + 365
+
+
+def _sqlite_bucket(month: date) -> sa.Table:
+    name = f'{SQLITE_TABLE_PREFIX}{month:%Y%m}'
+    return sa.Table(
+        name, sa.MetaData(),
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('article_id', sa.Integer(), nullable=False),
+        sa.Column('viewed_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Index(f'ix_{name}_article_id_viewed_at', 'article_id', 'viewed_at'),
+        sa.Index(f'ix_{name}_user_id_viewed_at', 'user_id', 'viewed_at'),
+    )
+
+
+def _sqlite_bucket_names(bind) -> List[str]:
+    names = bind.execute(sa.text(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE :pattern ORDER BY name"
+    ), {'pattern': f'{SQLITE_TABLE_PREFIX}______'}).scalars().all()
+    return [name for name in names if name[len(SQLITE_TABLE_PREFIX):].isdigit()]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    if _is_mysql():
+        for fk in sa.inspect(bind).get_foreign_keys('article_views'):
+            op.drop_constraint(fk['name'], 'article_views', type_='foreignkey')
+        op.execute("UPDATE article_views SET viewed_at = NOW() WHERE viewed_at IS NULL")
+        op.alter_column('article_views', 'viewed_at', existing_type=sa.DateTime(timezone=True),
+                        nullable=False, existing_server_default=sa.func.now())
+        op.execute("ALTER TABLE article_views DROP PRIMARY KEY, ADD PRIMARY KEY (id, viewed_at)")
+    else:
+        # The initial foreign keys are unnamed on SQLite, so rebuild from an
+        # explicit definition without them
+        without_fks = sa.Table(
+            'article_views', sa.MetaData(),
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('article_id', sa.Integer(), nullable=False),
+            sa.Column('viewed_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.Index('ix_article_views_id', 'id'),
+        )
+        op.execute("UPDATE article_views SET viewed_at = CURRENT_TIMESTAMP WHERE viewed_at IS NULL")
+        with op.batch_alter_table('article_views', copy_from=without_fks, recreate='always') as batch_op:
+            batch_op.alter_column('viewed_at', existing_type=sa.DateTime(timezone=True),
+                                  nullable=False, existing_server_default=sa.func.now())
+
+    op.create_index('ix_article_views_viewed_at', 'article_views', ['viewed_at'], unique=False)
+    op.create_index('ix_article_views_article_id_viewed_at', 'article_views', ['article_id', 'viewed_at'], unique=False)
+    op.create_index('ix_article_views_user_id_viewed_at', 'article_views', ['user_id', 'viewed_at'], unique=False)
+
+    current = _month_start(datetime.utcnow())
+    if _is_mysql():
+        # Everything before the current month lands in p_history, which the
+        # retention job drops once it is entirely outside the window
+        months = [_add_months(current, offset) for offset in range(PARTITIONS_AHEAD + 1)]
+        partitions = [f"PARTITION p_history VALUES LESS THAN ({_to_days(current)})"]
+        partitions += [
+            f"PARTITION p{month:%Y%m} VALUES LESS THAN ({_to_days(_add_months(month, 1))})" for month in months
+        ]
+        partitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE")
+        op.execute(
+            f"ALTER TABLE article_views PARTITION BY RANGE (TO_DAYS(viewed_at)) ({', '.join(partitions)})"
+        )
+    else:
+        # Move existing history into the monthly tables
+        rows = [dict(row._mapping) for row in bind.execute(
+            sa.text("SELECT user_id, article_id, viewed_at FROM article_views")
+        )]
+        by_month: Dict[date, List[dict]] = {}
+        for row in rows:
+            if isinstance(row['viewed_at'], str):
+                row['viewed_at'] = datetime.fromisoformat(row['viewed_at'])
+            by_month.setdefault(_month_start(row['viewed_at']), []).append(row)
+        for month, month_rows in by_month.items():
+            table = _sqlite_bucket(month)
+            table.create(bind, checkfirst=True)
+            bind.execute(sa.insert(table), month_rows)
+        op.execute("DELETE FROM article_views")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+
+    if _is_mysql():
+        op.execute("ALTER TABLE article_views REMOVE PARTITIONING")
+        op.execute("ALTER TABLE article_views DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
+    else:
+        for name in _sqlite_bucket_names(bind):
+            op.execute(
+                f'INSERT INTO article_views (user_id, article_id, viewed_at) '
+                f'SELECT user_id, article_id, viewed_at FROM "{name}"'
+            )
+            op.execute(f'DROP TABLE "{name}"')
+
+    op.drop_index('ix_article_views_user_id_viewed_at', table_name='article_views')
+    op.drop_index('ix_article_views_article_id_viewed_at', table_name='article_views')
+    op.drop_index('ix_article_views_viewed_at', table_name='article_views')
+
+    with op.batch_alter_table('article_views') as batch_op:
+        batch_op.alter_column('viewed_at', existing_type=sa.DateTime(timezone=True),
+                              nullable=True, existing_server_default=sa.func.now())
+        batch_op.create_foreign_key('fk_article_views_user_id_users', 'users', ['user_id'], ['id'])
+        batch_op.create_foreign_key('fk_article_views_article_id_articles', 'articles', ['article_id'], ['id'])
@@ -0,0 +1,29 @@
+"""track purge of deleted articles' views on tombstones
+
+Revision ID: b8d4f2a6c9e3
+Revises: a7c3e9f1b5d6
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d4f2a6c9e3'
+down_revision: Union[str, None] = 'a7c3e9f1b5d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('article_tombstones', sa.Column('purged_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_article_tombstones_purged_at_id', 'article_tombstones', ['purged_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_article_tombstones_purged_at_id', table_name='article_tombstones')
+    with op.batch_alter_table('article_tombstones') as batch_op:
+        batch_op.drop_column('purged_at')
@@ -0,0 +1,48 @@
+"""store article content as bytes for compression
+
+Revision ID: c4d8e2a6b1f0
+Revises: 7b2e4c1f9a3d
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d8e2a6b1f0'
+down_revision: Union[str, None] = '7b2e4c1f9a3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _binary_type():
+    if op.get_bind().dialect.name in ('mysql', 'mariadb'):
+        return mysql.LONGBLOB()
+    return sa.LargeBinary()
+
+
+def upgrade() -> None:
+    # The existing UTF-8 text is kept byte for byte and is read back as
+    # uncompressed content; `python -m app.compression migrate` compresses it
+    with op.batch_alter_table('articles') as batch_op:
+        batch_op.alter_column('content', existing_type=sa.Text(), type_=_binary_type(), existing_nullable=False)
+
+
+def downgrade() -> None:
+    # Compressed rows must be decompressed first:
+    #   python -m app.compression migrate --algorithm none
+    bind = op.get_bind()
+    compressed = bind.execute(sa.text(
+        "SELECT COUNT(*) FROM articles WHERE substr(content, 1, 1) = :marker"
+    ), {"marker": b"\xff"}).scalar()
+    if compressed:
+        raise RuntimeError(
+            f"{compressed} articles have compressed content; run "
+            "`python -m app.compression migrate --algorithm none` before downgrading"
+        )
+    with op.batch_alter_table('articles') as batch_op:
+        batch_op.alter_column('content', existing_type=_binary_type(), type_=sa.Text(), existing_nullable=False)
@@ -0,0 +1,29 @@
+"""claim tombstones before purging their views
+
+Revision ID: c9e5a3b7d1f4
+Revises: b8d4f2a6c9e3
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e5a3b7d1f4'
+down_revision: Union[str, None] = 'b8d4f2a6c9e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('article_tombstones', sa.Column('claimed_by', sa.String(length=100), nullable=True))
+    op.add_column('article_tombstones', sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('article_tombstones') as batch_op:
+        batch_op.drop_column('claimed_at')
+        batch_op.drop_column('claimed_by')
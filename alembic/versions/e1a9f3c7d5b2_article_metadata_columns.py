@@ -0,0 +1,33 @@
+"""add article excerpt, word count and content hash
+
+Revision ID: e1a9f3c7d5b2
+Revises: c4d8e2a6b1f0
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a9f3c7d5b2'
+down_revision: Union[str, None] = 'c4d8e2a6b1f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows are filled in by `python -m app.article_metadata backfill`
+    with op.batch_alter_table('articles') as batch_op:
+        batch_op.add_column(sa.Column('excerpt', sa.String(length=300), nullable=True))
+        batch_op.add_column(sa.Column('word_count', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('articles') as batch_op:
+        batch_op.drop_column('content_hash')
+        batch_op.drop_column('word_count')
+        batch_op.drop_column('excerpt')
@@ -0,0 +1,33 @@
+"""add composite indexes for article listing filters and sorts
+
+Revision ID: f5b3d9e2c8a4
+Revises: e1a9f3c7d5b2
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5b3d9e2c8a4'
+down_revision: Union[str, None] = 'e1a9f3c7d5b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_articles_created_at_id', 'articles', ['created_at', 'id'], unique=False)
+    op.create_index('ix_articles_updated_at_id', 'articles', ['updated_at', 'id'], unique=False)
+    op.create_index('ix_articles_author_id_created_at_id', 'articles', ['author_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_articles_author_id_updated_at_id', 'articles', ['author_id', 'updated_at', 'id'], unique=False)
+    op.create_index('ix_articles_author_id_title_id', 'articles', ['author_id', 'title', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_articles_author_id_title_id', table_name='articles')
+    op.drop_index('ix_articles_author_id_updated_at_id', table_name='articles')
+    op.drop_index('ix_articles_author_id_created_at_id', table_name='articles')
+    op.drop_index('ix_articles_updated_at_id', table_name='articles')
+    op.drop_index('ix_articles_created_at_id', table_name='articles')
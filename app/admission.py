@@ -0,0 +1,185 @@
+"""
+Admission control for the sync routes and sizing of their threadpool
+
+Every route is a sync `def`, so each request being served holds a thread
+from anyio's threadpool (THREADPOOL_SIZE threads). Without a limit, excess
+requests queue for those threads indefinitely and latency grows until
+clients time out. Requests are instead admitted per route class:
+
+    auth  - /auth/*, bcrypt-bound
+    read  - other GET/HEAD requests
+    write - everything else
+
+Each class serves at most its concurrency limit at once, lets a bounded
+number of requests wait up to ADMISSION_QUEUE_TIMEOUT_SECONDS for a slot,
+and sheds the rest immediately with 503 and Retry-After. Long-lived streams
+and the health and metrics endpoints bypass admission.
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+from collections import deque
+from typing import Dict, Optional
+
+from app.metrics import metrics
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ADMISSION_CONTROL_ENABLED = os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() == "true"
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "2"))
+ADMISSION_RETRY_AFTER_SECONDS = float(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1"))
+
+# Route class -> (concurrency limit, wait queue size)
+ROUTE_CLASS_LIMITS = {
+    "auth": (int(os.getenv("ADMISSION_AUTH_CONCURRENCY", "8")), int(os.getenv("ADMISSION_AUTH_QUEUE", "16"))),
+    "read": (int(os.getenv("ADMISSION_READ_CONCURRENCY", "24")), int(os.getenv("ADMISSION_READ_QUEUE", "64"))),
+    "write": (int(os.getenv("ADMISSION_WRITE_CONCURRENCY", "8")), int(os.getenv("ADMISSION_WRITE_QUEUE", "16"))),
+}
+
+# Never admission-controlled: streams hold no thread, probes must always answer
+EXEMPT_PATHS = ("/articles/events", "/health", "/metrics")
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    """
+    Route class of a request, or None when it bypasses admission
+    """
+    if any(path == exempt or path.startswith(exempt + "/") for exempt in EXEMPT_PATHS):
+        return None
+    if path.startswith("/auth/"):
+        return "auth"
+    if method in ("GET", "HEAD"):
+        return "read"
+    return "write"
+
+
+class AdmissionGate:
+    """
+    Concurrency limit with a bounded FIFO wait queue, used on the event loop
+    """
+
+    def __init__(self, limit: int, queue_size: int, timeout: float = ADMISSION_QUEUE_TIMEOUT_SECONDS):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.in_flight = 0
+        self.shed = 0
+        self._waiters: deque = deque()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        """
+        Take a slot, waiting in the queue if there is room; False means shed
+        """
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return True
+        if len(self._waiters) >= self.queue_size:
+            self.shed += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # release() hands its slot over by resolving the future
+            await asyncio.wait_for(asyncio.shield(waiter), self.timeout)
+            return True
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot arrived as the wait timed out; keep it
+                return True
+            waiter.cancel()
+            self.shed += 1
+            return False
+        except asyncio.CancelledError:
+            # The client went away; pass on a slot that was already handed over
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            waiter.cancel()
+            raise
+        finally:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # The slot passes to the waiter; in_flight stays the same
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+
+class AdmissionControlMiddleware:
+    """
+    Pure ASGI middleware admitting requests per route class
+    """
+
+    def __init__(self, app, limits: Dict[str, tuple] = ROUTE_CLASS_LIMITS,
+                 timeout: float = ADMISSION_QUEUE_TIMEOUT_SECONDS,
+                 retry_after: float = ADMISSION_RETRY_AFTER_SECONDS):
+        self.app = app
+        self.retry_after = retry_after
+        self.gates = {name: AdmissionGate(limit, queue_size, timeout) for name, (limit, queue_size) in limits.items()}
+        for name, gate in self.gates.items():
+            metrics.register_gauge(f"admission_in_flight_{name}", lambda gate=gate: gate.in_flight)
+            metrics.register_gauge(f"admission_queue_depth_{name}", lambda gate=gate: gate.queue_depth)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        name = route_class(scope["method"], scope["path"])
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        gate = self.gates[name]
+        if not await gate.acquire():
+            metrics.inc(f"admission_shed_total_{name}")
+            await self._reject(send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
+
+    async def _reject(self, send) -> None:
+        body = json.dumps({"detail": "Server is busy, please retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(self.retry_after)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def configure_threadpool(size: int = THREADPOOL_SIZE) -> None:
+    """
+    Size the threadpool that runs sync routes; must run on the event loop
+    """
+    from anyio import to_thread
+
+    to_thread.current_default_thread_limiter().total_tokens = size
+    admitted = sum(limit for limit, _ in ROUTE_CLASS_LIMITS.values())
+    if ADMISSION_CONTROL_ENABLED and admitted > size:
+        logger.warning(
+            f"Admission limits allow {admitted} concurrent requests but THREADPOOL_SIZE is {size}; "
+            f"excess requests will queue for threads"
+        )
+    logger.info(f"Threadpool size set to {size}")
@@ -0,0 +1,97 @@
+"""
+Excerpt, word count and content hash stored alongside each article
+
+Feed views render previews from these columns instead of loading (and
+decompressing) the full content. They are computed whenever content is
+written; rows that predate the columns are filled in with:
+    python -m app.article_metadata backfill --batch-size 500
+"""
+import argparse
+import hashlib
+import logging
+import os
+import sys
+
+from sqlalchemy import bindparam, select, update
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EXCERPT_LENGTH = int(os.getenv("EXCERPT_LENGTH", "200"))
+
+
+def build_excerpt(content: str, length: int = EXCERPT_LENGTH) -> str:
+    """
+    Leading text of the content with whitespace collapsed, cut at a word
+    boundary and marked with an ellipsis when truncated
+    """
+    text = " ".join(content.split())
+    if len(text) <= length:
+        return text
+    cut = text[:length - 1]
+    space = cut.rfind(" ")
+    if space > length // 2:
+        cut = cut[:space]
+    return cut.rstrip(" .,;:") + "…"
+
+
+def content_metadata(content: str) -> dict:
+    """
+    Column values derived from the content, ready to merge into an insert or update
+    """
+    return {
+        "excerpt": build_excerpt(content),
+        "word_count": len(content.split()),
+        "content_hash": hashlib.sha256(content.encode("utf-8")).hexdigest(),
+    }
+
+
+def backfill(conn_factory, table, batch_size: int = 500) -> int:
+    """
+    Fill the metadata columns of rows where they are missing, one
+    transaction per batch of ids. Returns the number of rows updated.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        with conn_factory() as conn:
+            rows = conn.execute(
+                select(table.c.id, table.c.content)
+                .where(table.c.id > last_id, table.c.content_hash.is_(None))
+                .order_by(table.c.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            conn.execute(
+                update(table)
+                .where(table.c.id == bindparam("row_id"))
+                .values(
+                    excerpt=bindparam("excerpt"),
+                    word_count=bindparam("word_count"),
+                    content_hash=bindparam("content_hash"),
+                ),
+                [{"row_id": row_id, **content_metadata(content)} for row_id, content in rows],
+            )
+        updated += len(rows)
+        last_id = rows[-1][0]
+        logger.info(f"Backfilled article metadata for {updated} rows")
+    return updated
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Maintain precomputed article metadata")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    backfill_parser = subparsers.add_parser("backfill", help="Fill missing excerpt, word count and hash")
+    backfill_parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    from app.database import get_engine
+    from app.models import Article
+
+    backfill(get_engine().begin, Article.__table__, args.batch_size)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
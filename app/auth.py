@@ -2,23 +2,33 @@ from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import User
+from app.queries import USER_BY_USERNAME
 from app.schemas import TokenData
+import logging
 import os
 from dotenv import load_dotenv
 
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
 load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+# bcrypt cost for new hashes; pick it per machine with `python -m app.password_cost calibrate`
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
 
-password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with any other cost report needs_update and are rehashed on login
+password_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 bearer_scheme = HTTPBearer()
+optional_bearer_scheme = HTTPBearer(auto_error=False)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -80,7 +90,7 @@ def get_current_user(
     )
     
     token_data = verify_token(credentials.credentials, credentials_exception)
-    user = db.query(User).filter(User.username == token_data.username).first()
+    user = db.scalars(USER_BY_USERNAME, {"username": token_data.username}).first()
     
     if user is None:
         raise credentials_exception
@@ -88,13 +98,48 @@ def get_current_user(
     return user
 
 
+def get_token_subject(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer_scheme),
+    access_token: Optional[str] = Query(None, description="Bearer token, for clients that cannot set headers")
+) -> str:
+    """
+    Authenticate from the token alone, without a database session, for
+    long-lived connections. Also accepts the token as a query parameter
+    because browser EventSource cannot send headers.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    token = credentials.credentials if credentials else access_token
+    if not token:
+        raise credentials_exception
+    return verify_token(token, credentials_exception).username
+
+
 def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
     """
     Authenticate a user with username and password
     """
-    user = db.query(User).filter(User.username == username).first()
+    user = db.scalars(USER_BY_USERNAME, {"username": username}).first()
     if not user:
+        # Spend the same bcrypt time as a real check so response time does
+        # not reveal whether the username exists
+        password_context.dummy_verify()
         return None
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = password_context.verify_and_update(password, user.hashed_password)
+    if not valid:
         return None
+    if new_hash is not None:
+        # The password was hashed with an outdated cost; the plain text is
+        # only available now, so upgrade the stored hash while we have it
+        db.execute(
+            update(User)
+            .where(User.id == user.id, User.hashed_password == user.hashed_password)
+            .values(hashed_password=new_hash)
+            .execution_options(synchronize_session=False)
+        )
+        logger.info(f"Rehashing password for user {user.id} with bcrypt cost {BCRYPT_ROUNDS}")
+        db.commit()
     return user
\ No newline at end of file
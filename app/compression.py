@@ -0,0 +1,194 @@
+"""
+Transparent compression for large text columns
+
+CompressedText stores text as bytes. Compressed values start with a two-byte
+header: 0xFF, which never appears in UTF-8, followed by a codec id. Values
+without the header are plain UTF-8, so rows written before compression was
+enabled (or below the size threshold) are read back unchanged.
+
+Compression is opt-in with CONTENT_COMPRESSION=zlib or zstd (zstd needs the
+zstandard package). Existing rows are converted with:
+    python -m app.compression migrate --batch-size 500
+"""
+import argparse
+import logging
+import os
+import sys
+import zlib
+from typing import Optional
+
+from sqlalchemy import LargeBinary, bindparam, select, type_coerce, update
+from sqlalchemy.dialects import mysql
+from sqlalchemy.types import TypeDecorator
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CONTENT_COMPRESSION = os.getenv("CONTENT_COMPRESSION", "none").lower()
+CONTENT_COMPRESSION_LEVEL = os.getenv("CONTENT_COMPRESSION_LEVEL")
+CONTENT_COMPRESSION_MIN_BYTES = int(os.getenv("CONTENT_COMPRESSION_MIN_BYTES", "256"))
+
+HEADER_MARKER = 0xFF
+CODEC_IDS = {"zlib": 1, "zstd": 2}
+CODEC_NAMES = {codec_id: name for name, codec_id in CODEC_IDS.items()}
+DEFAULT_LEVELS = {"zlib": 6, "zstd": 3}
+
+
+def _level(algorithm: str) -> int:
+    return int(CONTENT_COMPRESSION_LEVEL) if CONTENT_COMPRESSION_LEVEL else DEFAULT_LEVELS[algorithm]
+
+
+def _require_zstd() -> None:
+    if zstandard is None:
+        raise RuntimeError("zstd compression requires the zstandard package")
+
+
+def compress_text(text: str, algorithm: Optional[str] = None, min_bytes: Optional[int] = None,
+                  level: Optional[int] = None) -> bytes:
+    """
+    Encode text for storage, compressed with `algorithm` when that saves space
+    """
+    algorithm = algorithm or CONTENT_COMPRESSION
+    min_bytes = CONTENT_COMPRESSION_MIN_BYTES if min_bytes is None else min_bytes
+    raw = text.encode("utf-8")
+    if algorithm == "none" or len(raw) < min_bytes:
+        return raw
+    if algorithm == "zlib":
+        body = zlib.compress(raw, _level(algorithm) if level is None else level)
+    elif algorithm == "zstd":
+        _require_zstd()
+        body = zstandard.ZstdCompressor(level=_level(algorithm) if level is None else level).compress(raw)
+    else:
+        raise ValueError(f"Unknown compression algorithm: {algorithm}")
+    if len(body) + 2 >= len(raw):
+        return raw
+    return bytes((HEADER_MARKER, CODEC_IDS[algorithm])) + body
+
+
+def stored_codec(data: bytes) -> str:
+    """
+    Codec a stored value was written with, or "none" for plain UTF-8
+    """
+    if len(data) >= 2 and data[0] == HEADER_MARKER:
+        name = CODEC_NAMES.get(data[1])
+        if name is None:
+            raise ValueError(f"Unknown compression codec id: {data[1]}")
+        return name
+    return "none"
+
+
+def decompress_text(data: bytes) -> str:
+    codec = stored_codec(data)
+    if codec == "none":
+        return bytes(data).decode("utf-8")
+    if codec == "zlib":
+        return zlib.decompress(data[2:]).decode("utf-8")
+    _require_zstd()
+    return zstandard.ZstdDecompressor().decompress(data[2:]).decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text column stored as (optionally compressed) bytes
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name in ("mysql", "mariadb"):
+            return dialect.type_descriptor(mysql.LONGBLOB())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        # SQLite keeps rows written before the column became binary as TEXT
+        if isinstance(value, str):
+            return value
+        return decompress_text(value)
+
+
+def migrate_content(conn_factory, table, column: str = "content", algorithm: Optional[str] = None,
+                    batch_size: int = 500) -> dict:
+    """
+    Rewrite every row of `table.c[column]` with `algorithm`, one transaction
+    per batch of ids, skipping rows already stored that way. Returns counts
+    and the stored size before and after.
+    """
+    algorithm = algorithm or CONTENT_COMPRESSION
+    if algorithm == "zstd":
+        _require_zstd()
+    id_column = table.c.id
+    raw_column = type_coerce(table.c[column], LargeBinary())
+    stats = {"rows": 0, "rewritten": 0, "bytes_before": 0, "bytes_after": 0}
+    last_id = 0
+
+    while True:
+        with conn_factory() as conn:
+            rows = conn.execute(
+                select(id_column, raw_column)
+                .where(id_column > last_id)
+                .order_by(id_column)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            changes = []
+            for row_id, data in rows:
+                data = data.encode("utf-8") if isinstance(data, str) else bytes(data)
+                stats["rows"] += 1
+                stats["bytes_before"] += len(data)
+                target = data
+                if stored_codec(data) != algorithm:
+                    target = compress_text(decompress_text(data), algorithm)
+                stats["bytes_after"] += len(target)
+                if target != data:
+                    changes.append({"row_id": row_id, "data": target})
+
+            if changes:
+                conn.execute(
+                    update(table)
+                    .where(id_column == bindparam("row_id"))
+                    .values({column: bindparam("data", type_=LargeBinary())}),
+                    changes,
+                )
+            stats["rewritten"] += len(changes)
+            last_id = rows[-1][0]
+
+        logger.info(
+            f"{table.name}.{column}: {stats['rows']} rows scanned, {stats['rewritten']} rewritten, "
+            f"{stats['bytes_before']} -> {stats['bytes_after']} bytes"
+        )
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Convert stored article content between compression codecs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = subparsers.add_parser("migrate", help="Rewrite existing rows in batches")
+    migrate_parser.add_argument("--algorithm", choices=["none", *CODEC_IDS], default=CONTENT_COMPRESSION,
+                                help="Target codec; 'none' decompresses (default CONTENT_COMPRESSION)")
+    migrate_parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    from app.database import get_engine
+    from app.models import Article
+
+    engine = get_engine()
+    migrate_content(engine.begin, Article.__table__, algorithm=args.algorithm, batch_size=args.batch_size)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""
+"Viewers also read" index built from co-viewing
+
+Whenever a user views an article, it is paired with the other articles that
+user viewed in the last COVIEW_SESSION_SECONDS (their recently viewed list),
+and each pair's score goes up. Scores decay with a half-life of
+COVIEW_HALF_LIFE_HOURS, so recent co-viewing dominates.
+
+Memory is bounded: each article keeps its COVIEW_MAX_NEIGHBORS strongest
+neighbours, and at most COVIEW_MAX_ARTICLES articles are tracked (the least
+recently updated are dropped first). Each article's top list is cached until
+its scores next change, so GET /articles/{id}/related is O(K).
+
+Decay is applied without touching stored scores: a view at time t adds
+2 ** ((t - epoch) / half_life), so later views weigh more and ordering is
+the same as with decayed scores. When the weights grow too large, every
+score is rescaled once and the epoch moves forward.
+
+The index lives in each worker process. It can be rebuilt offline from
+the stored view history and loaded at startup:
+    python -m app.coview rebuild --days 30 --output coview.json
+"""
+import argparse
+import heapq
+import json
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COVIEW_HALF_LIFE_HOURS = float(os.getenv("COVIEW_HALF_LIFE_HOURS", "72"))
+COVIEW_SESSION_SECONDS = float(os.getenv("COVIEW_SESSION_SECONDS", "3600"))
+COVIEW_MAX_NEIGHBORS = int(os.getenv("COVIEW_MAX_NEIGHBORS", "50"))
+COVIEW_MAX_ARTICLES = int(os.getenv("COVIEW_MAX_ARTICLES", "50000"))
+COVIEW_SNAPSHOT_PATH = os.getenv("COVIEW_SNAPSHOT_PATH", "")
+
+# Rescale once weights reach 2 ** 40
+MAX_EXPONENT = 40.0
+
+
+def _seconds(value: datetime) -> float:
+    # View times are naive UTC throughout the app
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class CoViewIndex:
+    """
+    Bounded, decaying co-view scores per article
+    """
+
+    def __init__(self, half_life_hours: float = COVIEW_HALF_LIFE_HOURS,
+                 session_seconds: float = COVIEW_SESSION_SECONDS,
+                 max_neighbors: int = COVIEW_MAX_NEIGHBORS, max_articles: int = COVIEW_MAX_ARTICLES):
+        self.half_life = half_life_hours * 3600
+        self.session_seconds = session_seconds
+        self.max_neighbors = max_neighbors
+        self.max_articles = max_articles
+        self.epoch: Optional[float] = None
+        self._scores: "OrderedDict[int, Dict[int, float]]" = OrderedDict()
+        self._top: Dict[int, List[Tuple[int, float]]] = {}
+        self._lock = threading.Lock()
+
+    def _weight(self, at: float) -> float:
+        if self.epoch is None:
+            self.epoch = at
+        exponent = (at - self.epoch) / self.half_life
+        if exponent > MAX_EXPONENT:
+            self._rescale(exponent)
+            exponent = 0.0
+        return 2.0 ** exponent
+
+    def _rescale(self, exponent: float) -> None:
+        factor = 2.0 ** -exponent
+        for neighbors in self._scores.values():
+            for other in neighbors:
+                neighbors[other] *= factor
+        self._top.clear()
+        self.epoch += exponent * self.half_life
+
+    def _add(self, article_id: int, other_id: int, weight: float) -> None:
+        neighbors = self._scores.get(article_id)
+        if neighbors is None:
+            neighbors = self._scores[article_id] = {}
+            if len(self._scores) > self.max_articles:
+                evicted, _ = self._scores.popitem(last=False)
+                self._top.pop(evicted, None)
+        else:
+            self._scores.move_to_end(article_id)
+        neighbors[other_id] = neighbors.get(other_id, 0.0) + weight
+        if len(neighbors) > 2 * self.max_neighbors:
+            # Prune in bulk so the cost is amortised over many updates
+            self._scores[article_id] = dict(heapq.nlargest(self.max_neighbors, neighbors.items(), key=lambda x: x[1]))
+        self._top.pop(article_id, None)
+
+    def record_view(self, article_id: int, previous: Iterable[Tuple[int, datetime]], viewed_at: datetime) -> None:
+        """
+        Pair a view with the viewer's earlier views, given as (article_id, viewed_at)
+        """
+        at = _seconds(viewed_at)
+        others = {
+            other_id for other_id, other_at in previous
+            if other_id != article_id and at - _seconds(other_at) <= self.session_seconds
+        }
+        if not others:
+            return
+        with self._lock:
+            weight = self._weight(at)
+            for other_id in others:
+                self._add(article_id, other_id, weight)
+                self._add(other_id, article_id, weight)
+
+    def related(self, article_id: int, limit: int) -> List[Tuple[int, float]]:
+        """
+        Up to `limit` (article_id, score) pairs, strongest first; scores are
+        decayed to the time the list was cached
+        """
+        top = self._top.get(article_id)
+        if top is None:
+            with self._lock:
+                neighbors = self._scores.get(article_id)
+                if not neighbors:
+                    return []
+                scale = 2.0 ** -((_seconds(datetime.utcnow()) - self.epoch) / self.half_life)
+                top = [
+                    (other_id, score * scale)
+                    for other_id, score in heapq.nlargest(self.max_neighbors, neighbors.items(), key=lambda x: x[1])
+                ]
+                self._top[article_id] = top
+        return top[:limit]
+
+    def remove_article(self, article_id: int) -> None:
+        """
+        Forget a deleted article. References held by articles it has pruned
+        from its own list stay until they are pruned in turn; callers drop
+        ids that no longer exist when loading the related articles.
+        """
+        with self._lock:
+            neighbors = self._scores.pop(article_id, {})
+            self._top.pop(article_id, None)
+            for other_id in neighbors:
+                other = self._scores.get(other_id)
+                if other is not None and other.pop(article_id, None) is not None:
+                    self._top.pop(other_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "articles": len(self._scores),
+            "pairs": sum(len(neighbors) for neighbors in self._scores.values()),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scores.clear()
+            self._top.clear()
+            self.epoch = None
+
+    def dump(self) -> dict:
+        with self._lock:
+            return {
+                "epoch": self.epoch,
+                "half_life": self.half_life,
+                "scores": {str(article_id): {str(k): v for k, v in neighbors.items()}
+                           for article_id, neighbors in self._scores.items()},
+            }
+
+    def load(self, data: dict) -> None:
+        with self._lock:
+            self._scores.clear()
+            self._top.clear()
+            self.epoch = data["epoch"]
+            if data["half_life"] != self.half_life:
+                logger.warning("Co-view snapshot was built with a different half-life; rebuild it to match")
+            for article_id, neighbors in data["scores"].items():
+                self._scores[int(article_id)] = {int(k): v for k, v in neighbors.items()}
+
+
+def rebuild(conn, start: datetime, end: datetime, index: CoViewIndex, recent_items: int = 10,
+            step: timedelta = timedelta(days=1)) -> int:
+    """
+    Replay stored views between start and end into `index`, a day at a
+    time, pairing each with the viewer's previous `recent_items` views the
+    way the live index does. Returns the number of views replayed.
+    """
+    from app.view_storage import views_in_window
+
+    recent: Dict[int, deque] = {}
+    replayed = 0
+    window_start = start
+    while window_start < end:
+        window_end = min(window_start + step, end)
+        for user_id, article_id, viewed_at in views_in_window(conn, window_start, window_end):
+            user_views = recent.get(user_id)
+            if user_views is None:
+                user_views = recent[user_id] = deque(maxlen=recent_items)
+            index.record_view(article_id, user_views, viewed_at)
+            user_views.append((article_id, viewed_at))
+            replayed += 1
+        window_start = window_end
+    return replayed
+
+
+def load_snapshot(index: CoViewIndex, path: str = COVIEW_SNAPSHOT_PATH) -> bool:
+    if not path or not os.path.exists(path):
+        return False
+    with open(path) as f:
+        index.load(json.load(f))
+    logger.info(f"Loaded co-view index from {path}: {index.stats()}")
+    return True
+
+
+# Global instance
+coview_index = CoViewIndex()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Maintain the co-view index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subparsers.add_parser("rebuild", help="Rebuild the index from stored view history")
+    rebuild_parser.add_argument("--days", type=int, default=30)
+    rebuild_parser.add_argument("--output", required=True, help="Snapshot file to load with COVIEW_SNAPSHOT_PATH")
+    args = parser.parse_args(argv)
+
+    from app.database import get_engine
+
+    end = datetime.utcnow()
+    index = CoViewIndex()
+    with get_engine().connect() as conn:
+        replayed = rebuild(conn, end - timedelta(days=args.days), end, index)
+    with open(args.output, "w") as f:
+        json.dump(index.dump(), f)
+    logger.info(f"Replayed {replayed} views into {args.output}: {index.stats()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
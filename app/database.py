@@ -1,6 +1,8 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
+from typing import Dict, Optional
 import os
 from sqlalchemy import text
 from dotenv import load_dotenv
@@ -12,26 +14,91 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    logger.error("DATABASE_URL not found in environment variables")
-    raise ValueError("DATABASE_URL environment variable is required")
-
-try:
-    logger.info(f"Creating database engine for: {DATABASE_URL.split('@')[-1]}")
-    engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    logger.info("Database engine created successfully")
-except Exception as e:
-    logger.error(f"Database engine creation failed: {str(e)}")
-    raise
+
+# The engine is created on first use rather than at import time, so importing
+# the models (tests, alembic, CLI tools) never touches the database.
+_engine: Optional[Engine] = None
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 Base = declarative_base()
 
+
+def get_engine() -> Engine:
+    """
+    Return the database engine, creating it on first call
+    """
+    global _engine
+    if _engine is not None:
+        return _engine
+
+    if not DATABASE_URL:
+        logger.error("DATABASE_URL not found in environment variables")
+        raise ValueError("DATABASE_URL environment variable is required")
+
+    try:
+        logger.info(f"Creating database engine for: {DATABASE_URL.split('@')[-1]}")
+        _engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+        SessionLocal.configure(bind=_engine)
+        logger.info("Database engine created successfully")
+    except Exception as e:
+        logger.error(f"Database engine creation failed: {str(e)}")
+        raise
+    return _engine
+
+
+def __getattr__(name):
+    # Keep `from app.database import engine` working without creating the
+    # engine at import time.
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def dispose_engine(close: bool = True) -> None:
+    """
+    Drop the engine's pooled connections. With close=False they are
+    abandoned without being closed, which is what a forked child must do
+    with connections that belong to its parent.
+    """
+    if _engine is not None:
+        _engine.dispose(close=close)
+
+
+def pool_stats() -> Dict[str, int]:
+    """
+    Connection pool usage, empty until the engine has been created
+    """
+    if _engine is None:
+        return {}
+    pool = _engine.pool
+    stats = {}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if method is not None:
+            stats[name] = method()
+    return stats
+
+
+def pool_saturation() -> Optional[float]:
+    """
+    Fraction of the pool's connection capacity checked out, or None for
+    pools without a fixed capacity
+    """
+    if _engine is None:
+        return None
+    pool = _engine.pool
+    max_overflow = getattr(pool, "_max_overflow", None)
+    if not hasattr(pool, "size") or max_overflow is None or max_overflow < 0:
+        return None
+    capacity = pool.size() + max_overflow
+    return round(pool.checkedout() / capacity, 3) if capacity else None
+
+
 def get_db():
     """
     Dependency to get database session with error handling
     """
-    db = SessionLocal()
+    db = SessionLocal(bind=get_engine())
     try:
         logger.info("Database session created")
         yield db
@@ -48,10 +115,10 @@ def check_db_connection():
     Check if database is connected
     """
     try:
-        with engine.connect() as conn:
+        with get_engine().connect() as conn:
             conn.execute(text("SELECT 1"))
         logger.info("Database connection check successful")
         return True
     except Exception as e:
         logger.error(f"Database connection check failed: {str(e)}")
-        return False
\ No newline at end of file
+        return False
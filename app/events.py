@@ -0,0 +1,199 @@
+"""
+In-process fan-out of article change events to server-sent event streams
+
+Write routes publish a small event (type, article id, author, title) after
+their commit; every subscriber connected to this worker gets it pushed over
+GET /articles/events instead of polling the listing. Each subscriber has a
+bounded buffer and is disconnected when it falls behind. Recent events are
+kept so a reconnecting client can resume from its Last-Event-ID.
+
+Events are per worker process: event ids carry the worker's boot id, and a
+client resuming against a different worker (or after a restart) receives a
+"reset" event telling it to refetch the listing.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+
+from app.metrics import metrics
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EVENT_HISTORY_SIZE = int(os.getenv("EVENT_HISTORY_SIZE", "1000"))
+EVENT_SUBSCRIBER_BUFFER = int(os.getenv("EVENT_SUBSCRIBER_BUFFER", "100"))
+EVENT_KEEPALIVE_SECONDS = float(os.getenv("EVENT_KEEPALIVE_SECONDS", "15"))
+EVENT_RETRY_MS = int(os.getenv("EVENT_RETRY_MS", "3000"))
+
+
+class ArticleEvent:
+    __slots__ = ("seq", "type", "payload", "encoded")
+
+    def __init__(self, seq: int, type: str, payload: dict):
+        self.seq = seq
+        self.type = type
+        self.payload = payload
+        # Wire format, built once and shared by every subscriber
+        self.encoded: Optional[str] = None
+
+
+class Subscription:
+    """
+    One connected stream: a bounded buffer and a wakeup flag
+    """
+    __slots__ = ("buffer", "wakeup", "last_seq", "closed_reason")
+
+    def __init__(self, last_seq: int):
+        self.buffer: deque = deque()
+        self.wakeup = asyncio.Event()
+        self.last_seq = last_seq
+        self.closed_reason: Optional[str] = None
+
+
+class EventHub:
+    """
+    Fan-out hub. publish() may be called from any thread; subscribers live
+    on the event loop, and delivery to them happens there in one callback
+    per event regardless of how many are connected.
+    """
+
+    def __init__(self, history_size: int = EVENT_HISTORY_SIZE, buffer_size: int = EVENT_SUBSCRIBER_BUFFER):
+        self.boot_id = uuid.uuid4().hex[:8]
+        self.buffer_size = buffer_size
+        self._seq = itertools.count(1)
+        self._history: deque = deque(maxlen=history_size)
+        self._subscribers: set = set()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def event_id(self, event: ArticleEvent) -> str:
+        return f"{self.boot_id}-{event.seq}"
+
+    def publish(self, type: str, article_id: int, author_id: int, title: Optional[str] = None) -> ArticleEvent:
+        with self._lock:
+            seq = next(self._seq)
+            event = ArticleEvent(seq, type, {
+                "article_id": article_id,
+                "author_id": author_id,
+                "title": title,
+                "at": datetime.utcnow().isoformat() + "Z",
+            })
+            self._history.append(event)
+            loop = self._loop if self._subscribers else None
+        metrics.inc("article_events_published_total")
+
+        if loop is not None and not loop.is_closed():
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is loop:
+                self._dispatch(event)
+            else:
+                loop.call_soon_threadsafe(self._dispatch, event)
+        return event
+
+    def _dispatch(self, event: ArticleEvent) -> None:
+        for subscription in list(self._subscribers):
+            if len(subscription.buffer) >= self.buffer_size:
+                self._close(subscription, "slow consumer")
+                metrics.inc("article_events_slow_consumers_total")
+                continue
+            subscription.buffer.append(event)
+            subscription.wakeup.set()
+
+    def _close(self, subscription: Subscription, reason: str) -> None:
+        subscription.closed_reason = reason
+        subscription.buffer.clear()
+        subscription.wakeup.set()
+        self.unsubscribe(subscription)
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Tuple[Subscription, List[ArticleEvent], bool]:
+        """
+        Register a subscriber on the running loop. Returns the subscription,
+        the retained events after `last_event_id`, and whether the client
+        must resync because that id can no longer be resumed from.
+        """
+        # Snapshot and registration happen together, so every event is either
+        # in the snapshot or dispatched to the new subscriber
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            history = list(self._history)
+            current = history[-1].seq if history else 0
+            subscription = Subscription(current)
+            self._subscribers.add(subscription)
+        backlog: List[ArticleEvent] = []
+        reset = False
+        if last_event_id:
+            boot_id, _, seq = last_event_id.partition("-")
+            if boot_id != self.boot_id or not seq.isdigit():
+                reset = True
+            else:
+                after = int(seq)
+                if history and after < history[0].seq - 1:
+                    reset = True
+                else:
+                    backlog = [event for event in history if event.seq > after]
+        return subscription, backlog, reset
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def format(self, event: ArticleEvent) -> str:
+        if event.encoded is None:
+            event.encoded = f"id: {self.event_id(event)}\nevent: {event.type}\ndata: {json.dumps(event.payload)}\n\n"
+        return event.encoded
+
+    async def stream(self, last_event_id: Optional[str] = None,
+                     keepalive: float = EVENT_KEEPALIVE_SECONDS) -> AsyncIterator[str]:
+        """
+        Server-sent event body for one subscriber. It subscribes on first
+        iteration, not before, so a response that is never started (the
+        client left first) leaves nothing registered.
+        """
+        subscription, backlog, reset = self.subscribe(last_event_id)
+        try:
+            yield f"retry: {EVENT_RETRY_MS}\n\n"
+            if reset:
+                yield "event: reset\ndata: {}\n\n"
+            for event in backlog:
+                yield self.format(event)
+            while True:
+                if subscription.closed_reason is not None:
+                    yield f"event: error\ndata: {json.dumps({'reason': subscription.closed_reason})}\n\n"
+                    return
+                if subscription.buffer:
+                    chunks = []
+                    while subscription.buffer:
+                        event = subscription.buffer.popleft()
+                        # Events published while subscribing can also be in the backlog
+                        if event.seq > subscription.last_seq:
+                            subscription.last_seq = event.seq
+                            chunks.append(self.format(event))
+                    if chunks:
+                        yield "".join(chunks)
+                    continue
+                subscription.wakeup.clear()
+                try:
+                    await asyncio.wait_for(subscription.wakeup.wait(), keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            self.unsubscribe(subscription)
+
+
+# Global instance
+article_events = EventHub()
+metrics.register_gauge("article_event_subscribers", lambda: article_events.subscriber_count)
@@ -0,0 +1,103 @@
+"""
+Sparse fieldsets: `fields=` selection for article responses
+
+Clients pass the response fields they need, e.g. `fields=id,title` or
+`fields=id,title,author.username`. Names are checked against the response
+schema (`author` alone means every UserResponse field). Only the matching
+columns are selected: `content` is read only when asked for, and users are
+joined only when an author field is.
+"""
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Iterable, NamedTuple, Optional, Tuple, Type
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import Row
+
+from app.models import Article, User
+from app.schemas import UserResponse
+
+
+class FieldSet(NamedTuple):
+    article: Tuple[str, ...]
+    author: Tuple[str, ...]
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[FieldSet]:
+    """
+    FieldSet for a `fields=` value, or None to return every field
+    """
+    if fields is None:
+        return None
+    article, author, invalid = [], [], []
+    for name in (part.strip() for part in fields.split(",")):
+        if not name:
+            continue
+        parent, _, child = name.partition(".")
+        if parent == "author" and "author" in schema.model_fields:
+            if not child:
+                author.extend(UserResponse.model_fields)
+            elif child in UserResponse.model_fields:
+                author.append(child)
+            else:
+                invalid.append(name)
+        elif not child and parent in schema.model_fields:
+            article.append(parent)
+        else:
+            invalid.append(name)
+    if invalid or not (article or author):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(invalid)}" if invalid else "fields must name at least one field"
+        )
+    # Fixed order, so equal selections share one cached statement
+    return FieldSet(
+        tuple(name for name in schema.model_fields if name in article),
+        tuple(name for name in UserResponse.model_fields if name in author),
+    )
+
+
+def with_required(fieldset: FieldSet, article: Iterable[str] = (), author: Iterable[str] = ()) -> FieldSet:
+    """
+    Add fields the route needs itself; they are selected but not returned
+    """
+    return FieldSet(
+        tuple(dict.fromkeys((*fieldset.article, *article))),
+        tuple(dict.fromkeys((*fieldset.author, *author))),
+    )
+
+
+@lru_cache(maxsize=256)
+def project(stmt, fieldset: FieldSet):
+    """
+    `stmt` (a select of Article) narrowed to the fieldset's columns. Article
+    id is always selected; author columns are labelled author__<name>.
+    """
+    columns = [Article.id] + [getattr(Article, name) for name in fieldset.article if name != "id"]
+    columns += [getattr(User, name).label(f"author__{name}") for name in fieldset.author]
+    projected = stmt.with_only_columns(*columns)
+    if fieldset.author:
+        projected = projected.join_from(Article, User, Article.author_id == User.id)
+    return projected
+
+
+def shape(row: Row, fieldset: FieldSet) -> dict:
+    """
+    Response dict holding only the requested fields
+    """
+    mapping = row._mapping
+    data = {name: mapping[name] for name in fieldset.article}
+    if fieldset.author:
+        data["author"] = {name: mapping[f"author__{name}"] for name in fieldset.author}
+    return data
+
+
+def as_article(row: Row) -> SimpleNamespace:
+    """
+    Article-like view of a projected row, for code that takes an Article
+    """
+    mapping = row._mapping
+    author = {key[len("author__"):]: value for key, value in mapping.items() if key.startswith("author__")}
+    fields = {key: value for key, value in mapping.items() if not key.startswith("author__")}
+    return SimpleNamespace(**fields, author=SimpleNamespace(**author))
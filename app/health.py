@@ -0,0 +1,135 @@
+"""
+Liveness and readiness probes served from a cached status snapshot
+
+A background thread checks the database every HEALTH_CHECK_INTERVAL_SECONDS
+and stores the result; the probe endpoints only read that snapshot, so they
+never wait on the database or a threadpool slot no matter how often they are
+called. A check that does not finish within HEALTH_CHECK_TIMEOUT_SECONDS
+marks the database down, and no new check is started until the hung one
+returns, so a slow database cannot pile up probe work.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Optional
+
+from sqlalchemy import text
+
+from app.database import get_engine, pool_saturation, pool_stats
+from app.metrics import metrics
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HEALTH_CHECK_INTERVAL_SECONDS = float(os.getenv("HEALTH_CHECK_INTERVAL_SECONDS", "5"))
+HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv("HEALTH_CHECK_TIMEOUT_SECONDS", "2"))
+# Readiness fails when the last successful check is older than this
+HEALTH_STALE_SECONDS = float(os.getenv("HEALTH_STALE_SECONDS", str(3 * HEALTH_CHECK_INTERVAL_SECONDS)))
+
+
+def ping_database() -> None:
+    with get_engine().connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+class HealthMonitor:
+    """
+    Runs the database check in the background and keeps the latest result
+    """
+
+    def __init__(self, check: Callable[[], None] = ping_database,
+                 interval: float = HEALTH_CHECK_INTERVAL_SECONDS, timeout: float = HEALTH_CHECK_TIMEOUT_SECONDS,
+                 stale_after: float = HEALTH_STALE_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.check = check
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.clock = clock
+        self.database_up: Optional[bool] = None
+        self.error: Optional[str] = None
+        self.latency: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.last_success: Optional[float] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="health-check")
+        self._pending: Optional[Future] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_check(self) -> None:
+        """
+        Run one check (or keep waiting on a hung one) and record the outcome
+        """
+        if self._pending is None or self._pending.done():
+            self._pending = self._executor.submit(self._timed_check)
+        try:
+            latency = self._pending.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            self._record(False, f"check timed out after {self.timeout}s", None)
+        except Exception as e:
+            self._record(False, str(e), None)
+        else:
+            self._record(True, None, latency)
+
+    def _timed_check(self) -> float:
+        started = time.perf_counter()
+        self.check()
+        return time.perf_counter() - started
+
+    def _record(self, up: bool, error: Optional[str], latency: Optional[float]) -> None:
+        if up != self.database_up:
+            if up:
+                logger.info("Health check - database reachable")
+            else:
+                logger.error(f"Health check - database unavailable: {error}")
+        now = self.clock()
+        self.database_up = up
+        self.error = error
+        self.latency = latency
+        self.checked_at = now
+        if up:
+            self.last_success = now
+
+    @property
+    def ready(self) -> bool:
+        return (
+            self.database_up is True
+            and self.last_success is not None
+            and self.clock() - self.last_success <= self.stale_after
+        )
+
+    def snapshot(self) -> dict:
+        now = self.clock()
+        return {
+            "status": "ready" if self.ready else "unavailable",
+            "database": {True: "connected", False: "disconnected", None: "unknown"}[self.database_up],
+            "error": self.error,
+            "last_check_latency_ms": round(self.latency * 1000, 2) if self.latency is not None else None,
+            "last_check_age_seconds": round(now - self.checked_at, 2) if self.checked_at is not None else None,
+            "pool": {**pool_stats(), "saturation": pool_saturation()},
+        }
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.run_check()
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="health-prober", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.timeout)
+            self._thread = None
+
+
+# Global instance
+health_monitor = HealthMonitor()
+metrics.register_gauge("health_database_up", lambda: 1 if health_monitor.database_up else 0)
+metrics.register_gauge("health_check_latency_seconds", lambda: health_monitor.latency or 0)
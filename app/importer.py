@@ -0,0 +1,169 @@
+"""
+Streaming bulk import of articles from NDJSON
+
+Usage:
+    python -m app.importer articles.ndjson --author john_doe
+    python -m app.importer articles.ndjson --author john_doe --checkpoint import.ckpt
+    cat articles.ndjson | python -m app.importer - --author john_doe
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass, asdict
+from typing import BinaryIO, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.article_metadata import content_metadata
+from app.database import SessionLocal, get_engine
+from app.models import Article, User
+from app.schemas import ArticleCreate
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+@dataclass
+class ImportProgress:
+    """
+    Position reached by an import, persisted after every committed chunk
+    """
+    offset: int = 0
+    lines: int = 0
+    imported: int = 0
+    rejected: int = 0
+
+
+def load_checkpoint(path: Optional[str]) -> ImportProgress:
+    """
+    Load the progress of a previous run, or start from the beginning
+    """
+    if not path or not os.path.exists(path):
+        return ImportProgress()
+    with open(path) as f:
+        return ImportProgress(**json.load(f))
+
+
+def save_checkpoint(path: Optional[str], progress: ImportProgress) -> None:
+    """
+    Atomically persist progress so an interrupted import can be resumed
+    """
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(asdict(progress), f)
+    os.replace(tmp_path, path)
+
+
+def import_articles(
+    db: Session,
+    stream: BinaryIO,
+    author_id: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    checkpoint_path: Optional[str] = None,
+) -> ImportProgress:
+    """
+    Import NDJSON articles from a binary stream in chunked commits.
+
+    Lines are read one at a time and validated with ArticleCreate, so memory
+    is bounded by chunk_size regardless of the input size. Invalid lines are
+    logged and counted but do not abort the import. A chunk is committed
+    before its checkpoint is written, so a crash in between replays at most
+    that one chunk on resume.
+    """
+    progress = load_checkpoint(checkpoint_path)
+    if progress.offset:
+        if stream.seekable():
+            stream.seek(progress.offset)
+        else:
+            # Non-seekable input (stdin): skip the lines already consumed
+            for _ in range(progress.lines):
+                if not stream.readline():
+                    break
+        logger.info(f"Resuming import at line {progress.lines} (byte {progress.offset})")
+
+    started = time.perf_counter()
+    imported_at_start = progress.imported
+    rows = []
+
+    def flush() -> None:
+        if rows:
+            db.execute(insert(Article), rows)
+            db.commit()
+            progress.imported += len(rows)
+            rows.clear()
+        save_checkpoint(checkpoint_path, progress)
+        elapsed = time.perf_counter() - started
+        rate = (progress.imported - imported_at_start) / elapsed if elapsed else 0.0
+        logger.info(
+            f"Imported {progress.imported} articles "
+            f"({progress.rejected} rejected, {rate:.0f} rows/s)"
+        )
+
+    for line in iter(stream.readline, b""):
+        progress.offset += len(line)
+        progress.lines += 1
+        if not line.strip():
+            continue
+        try:
+            article = ArticleCreate.model_validate_json(line)
+        except ValidationError as e:
+            progress.rejected += 1
+            logger.warning(f"Skipping invalid line {progress.lines}: {e.errors()[0]['msg']}")
+            continue
+
+        rows.append({
+            "title": article.title,
+            "content": article.content,
+            "author_id": author_id,
+            **content_metadata(article.content),
+        })
+        if len(rows) >= chunk_size:
+            flush()
+
+    flush()
+
+    elapsed = time.perf_counter() - started
+    rate = (progress.imported - imported_at_start) / elapsed if elapsed else 0.0
+    logger.info(
+        f"Import finished: {progress.imported} imported, {progress.rejected} rejected "
+        f"in {elapsed:.1f}s ({rate:.0f} rows/s)"
+    )
+    return progress
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import articles from NDJSON")
+    parser.add_argument("path", help="NDJSON file to import, or '-' for stdin")
+    parser.add_argument("--author", required=True, help="Username the articles are attributed to")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--checkpoint", help="File used to record and resume progress")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal(bind=get_engine())
+    try:
+        author = db.query(User).filter(User.username == args.author).first()
+        if not author:
+            logger.error(f"Author not found: {args.author}")
+            return 1
+
+        if args.path == "-":
+            import_articles(db, sys.stdin.buffer, author.id, args.chunk_size, args.checkpoint)
+        else:
+            with open(args.path, "rb") as f:
+                import_articles(db, f, author.id, args.chunk_size, args.checkpoint)
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,90 @@
-from fastapi import FastAPI, Depends, HTTPException
+import time
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException
 from contextlib import asynccontextmanager
-from app.database import engine, get_db, check_db_connection
+from app.database import get_engine, check_db_connection
 from app.models import Base
 import logging
-from sqlalchemy import text
 from app.routers import auth, articles
+from app.startup import STARTUP_SCHEMA_CHECK, StartupTimer, verify_not_stale, verify_schema_revision
+from app.metrics import METRICS_ENABLED, MetricsMiddleware, metrics
+from app.profiling import PROFILE_SAMPLE_RATE, ProfilingMiddleware, install_route_profiling
+from app.replicas import ReadAfterWriteMiddleware
+from app.health import health_monitor
+from app.purger import PURGE_ENABLED, view_purger
+from app.coview import coview_index, load_snapshot
+from app.admission import ADMISSION_CONTROL_ENABLED, AdmissionControlMiddleware, configure_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    try:
-        is_connected = check_db_connection()
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
+def check_schema(engine, timer: StartupTimer) -> None:
+    """
+    Verify (or create) the schema as configured by STARTUP_SCHEMA_CHECK
+    """
+    if STARTUP_SCHEMA_CHECK == "alembic":
+        with timer.phase("schema_revision"):
+            verify_schema_revision(engine)
+    elif STARTUP_SCHEMA_CHECK == "create_all":
+        with timer.phase("connection_check"):
+            is_connected = check_db_connection()
         if not is_connected:
             raise HTTPException(status_code=500, detail="Database connection failed")
-        
+
+        with timer.phase("schema_revision"):
+            verify_not_stale(engine)
+
         logger.info("Checking database tables...")
-        Base.metadata.create_all(bind=engine)
+        with timer.phase("create_all"):
+            Base.metadata.create_all(bind=engine)
         logger.info("Database tables verified/created successfully")
-        yield
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        timer = StartupTimer()
+        timer.phases["imports"] = IMPORT_SECONDS
+
+        configure_threadpool()
+
+        with timer.phase("engine"):
+            engine = get_engine()
+
+        # The prefork launcher checks once before forking (app.serve)
+        if not getattr(app.state, "schema_checked", False):
+            check_schema(engine, timer)
+
+        with timer.phase("coview_snapshot"):
+            load_snapshot(coview_index)
+
+        app.state.startup_timings = timer.phases
+        logger.info(f"Startup complete: {timer.summary()}")
+        health_monitor.start()
+        if PURGE_ENABLED:
+            view_purger.start()
     except Exception as e:
         logger.error(f"Startup error: {str(e)}")
         raise
+    try:
+        yield
+    finally:
+        view_purger.stop()
+        health_monitor.stop()
 
 app = FastAPI(lifespan=lifespan)
 
+# Inside the metrics middleware, so shed requests are counted too
+if ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(ReadAfterWriteMiddleware)
+
 app.include_router(auth.router)
 app.include_router(articles.router)
 
@@ -34,15 +94,45 @@ def read_root():
     return {"message": "Hello, World!"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Prometheus text-format metrics
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+# Probes only read the snapshot kept by the background prober (app.health), so they
+# are async and never wait on the database or the threadpool.
 @app.get("/health")
-def health_check(db = Depends(get_db)):
+async def health_check():
     """
-    Health check endpoint with database verification
+    Health check endpoint with the last database check result
     """
-    try:
-        db.execute(text("SELECT 1"))
-        logger.info("Health check - Database connection OK")
-        return {"status": "healthy", "database": "connected"}
-    except Exception as e:
-        logger.error(f"Health check error: {str(e)}")
-        return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
\ No newline at end of file
+    snapshot = health_monitor.snapshot()
+    return {
+        "status": "healthy" if health_monitor.ready else "unhealthy",
+        "database": snapshot["database"],
+        "error": snapshot["error"],
+    }
+
+
+@app.get("/health/live")
+async def liveness_probe():
+    """
+    Liveness probe: the process is serving requests
+    """
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness_probe():
+    """
+    Readiness probe: the database answered the last background check in time
+    """
+    return JSONResponse(health_monitor.snapshot(), status_code=200 if health_monitor.ready else 503)
+
+
+# Must run after every route is registered
+if PROFILE_SAMPLE_RATE > 0:
+    install_route_profiling(app)
@@ -0,0 +1,278 @@
+"""
+In-process request and database metrics exposed in Prometheus text format
+
+Kept deliberately small: a request costs two perf_counter calls, a bisect
+and a few dict updates, so the middleware can stay enabled in production.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.database import pool_stats
+from app.recently_viewed_service import recently_viewed_service
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram; counts are stored per bucket and made cumulative on render
+    """
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class RequestMetrics:
+    """
+    Per-request counters, filled in by the SQLAlchemy event hooks
+    """
+    __slots__ = ("db_queries", "db_time")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+
+
+class RouteMetrics:
+    __slots__ = ("responses", "latency", "db_queries", "db_time")
+
+    def __init__(self):
+        self.responses: Dict[int, int] = {}
+        self.latency = Histogram()
+        self.db_queries = 0
+        self.db_time = 0.0
+
+
+class MetricsRegistry:
+    """
+    Holds every metric the service exports
+    """
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteMetrics] = {}
+        self.in_flight = 0
+        self.db_queries_outside_requests = 0
+        self.counters: Dict[str, int] = {}
+        self.gauges: Dict[str, Callable[[], float]] = {}
+        # Updated from the event loop, request threads and background
+        # threads, while /metrics renders from the threadpool
+        self._lock = threading.Lock()
+
+    def observe_request(self, method: str, route: str, status_code: int,
+                        elapsed: float, request: RequestMetrics) -> None:
+        key = (method, route)
+        with self._lock:
+            stats = self.routes.get(key)
+            if stats is None:
+                stats = self.routes[key] = RouteMetrics()
+            stats.responses[status_code] = stats.responses.get(status_code, 0) + 1
+            stats.latency.observe(elapsed)
+            stats.db_queries += request.db_queries
+            stats.db_time += request.db_time
+
+    def inc(self, name: str, amount: int = 1) -> None:
+        """
+        Increment a named counter exported as-is (e.g. by other subsystems)
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def inc_background_query(self) -> None:
+        with self._lock:
+            self.db_queries_outside_requests += 1
+
+    def register_gauge(self, name: str, read: Callable[[], float]) -> None:
+        """
+        Export a gauge whose value is read from `read` at scrape time
+        """
+        with self._lock:
+            self.gauges[name] = read
+
+    def reset(self) -> None:
+        with self._lock:
+            self.routes.clear()
+            self.counters.clear()
+            self.in_flight = 0
+            self.db_queries_outside_requests = 0
+
+    def render(self) -> str:
+        # Snapshot what other threads may add keys to while rendering
+        with self._lock:
+            routes = sorted(self.routes.items())
+            responses = {key: sorted(stats.responses.items()) for key, stats in routes}
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            background_queries = self.db_queries_outside_requests
+
+        lines = [
+            "# HELP http_requests_total Requests by route and status code",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route), stats in routes:
+            for status_code, count in responses[(method, route)]:
+                lines.append(
+                    f'http_requests_total{{method="{method}",route="{route}",status="{status_code}"}} {count}'
+                )
+
+        lines += [
+            "# HELP http_request_duration_seconds Request latency by route",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), stats in routes:
+            lines += stats.latency.render("http_request_duration_seconds", f'method="{method}",route="{route}"')
+
+        lines += [
+            "# HELP http_requests_in_flight Requests currently being served",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP db_queries_total SQL statements executed, by route",
+            "# TYPE db_queries_total counter",
+        ]
+        for (method, route), stats in routes:
+            lines.append(f'db_queries_total{{method="{method}",route="{route}"}} {stats.db_queries}')
+
+        lines += [
+            "# HELP db_queries_background_total SQL statements executed outside a request",
+            "# TYPE db_queries_background_total counter",
+            f"db_queries_background_total {background_queries}",
+        ]
+
+        lines += [
+            "# HELP db_query_seconds_total Time spent executing SQL, by route",
+            "# TYPE db_query_seconds_total counter",
+        ]
+        for (method, route), stats in routes:
+            lines.append(f'db_query_seconds_total{{method="{method}",route="{route}"}} {stats.db_time}')
+
+        lines += [
+            "# HELP db_pool_connections Connection pool state",
+            "# TYPE db_pool_connections gauge",
+        ]
+        for state, value in pool_stats().items():
+            lines.append(f'db_pool_connections{{state="{state}"}} {value}')
+
+        lines += [
+            "# HELP recently_viewed_items Entries held by the recently viewed service",
+            "# TYPE recently_viewed_items gauge",
+        ]
+        for kind, value in recently_viewed_service.stats().items():
+            lines.append(f'recently_viewed_items{{kind="{kind}"}} {value}')
+
+        for name, value in counters:
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {value}")
+
+        for name, read in gauges:
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {read()}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+_current_request: ContextVar[Optional[RequestMetrics]] = ContextVar("current_request_metrics", default=None)
+
+
+def current_request_metrics() -> Optional[RequestMetrics]:
+    return _current_request.get()
+
+
+# The one SQL timing hook: every statement is timed here once, and other
+# instrumentation (app.profiling) registers observers for the result
+_query_observers: List[Callable[[str, object, float], None]] = []
+
+
+def add_query_observer(observer: Callable[[str, object, float], None]) -> None:
+    """
+    Call observer(statement, parameters, elapsed_seconds) after every statement
+    """
+    _query_observers.append(observer)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_start_time"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop("query_start_time", time.perf_counter())
+    request = _current_request.get()
+    if request is None:
+        metrics.inc_background_query()
+    else:
+        request.db_queries += 1
+        request.db_time += elapsed
+    for observer in _query_observers:
+        observer(statement, parameters, elapsed)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route counts and latency.
+
+    The route template (e.g. /articles/{article_id}) is read from the scope
+    after routing, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        request = RequestMetrics()
+        token = _current_request.set(request)
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.in_flight -= 1
+            _current_request.reset(token)
+            route = scope.get("route")
+            metrics.observe_request(
+                scope["method"], route.path if route is not None else "unmatched",
+                status_code, elapsed, request
+            )
@@ -1,15 +1,16 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
-from sqlalchemy.orm import relationship
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Index
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 from app.database import Base
-import logging
+from app.compression import CompressedText
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+# Microsecond precision on MySQL too, so sync watermarks compare exactly
+SyncTimestamp = DateTime(timezone=True).with_variant(mysql.DATETIME(fsp=6), "mysql")
 
 class User(Base):
     __tablename__ = "users"
-    logger.info(f"Defining model for table: {__tablename__}")
 
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(50), unique=True, index=True, nullable=False)
@@ -20,30 +21,84 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     articles = relationship("Article", back_populates="author")
-    article_views = relationship("ArticleView", back_populates="user")
+    article_views = relationship(
+        "ArticleView", back_populates="user", primaryjoin="User.id == foreign(ArticleView.user_id)"
+    )
 
 class Article(Base):
     __tablename__ = "articles"
-    logger.info(f"Defining model for table: {__tablename__}")
+    # One index per listing filter/sort combination, so every page is an
+    # index range scan in sort order (see get_articles)
+    __table_args__ = (
+        Index("ix_articles_created_at_id", "created_at", "id"),
+        Index("ix_articles_updated_at_id", "updated_at", "id"),
+        Index("ix_articles_author_id_created_at_id", "author_id", "created_at", "id"),
+        Index("ix_articles_author_id_updated_at_id", "author_id", "updated_at", "id"),
+        Index("ix_articles_author_id_title_id", "author_id", "title", "id"),
+        Index("ix_articles_changed_at_id", "changed_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False, index=True)
-    content = Column(Text, nullable=False)
+    # Loaded (and decompressed) only when accessed; list views never touch it
+    content = deferred(Column(CompressedText(), nullable=False))
+    # Derived from content on every write (see app.article_metadata)
+    excerpt = Column(String(300))
+    word_count = Column(Integer)
+    content_hash = Column(String(64))
     author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Sync watermark: set by the application on every insert and update, so the
+    # stored values round-trip exactly through a sync token (see app.sync)
+    changed_at = Column(SyncTimestamp, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     author = relationship("User", back_populates="articles")
-    article_views = relationship("ArticleView", back_populates="article")
+    article_views = relationship(
+        "ArticleView", back_populates="article", primaryjoin="Article.id == foreign(ArticleView.article_id)"
+    )
+
+class ArticleTombstone(Base):
+    """
+    Record of a deleted article, so delta sync can report the deletion and
+    the purger can clean up its views (claimed_by/claimed_at while a worker
+    purges them, purged_at once done)
+    """
+    __tablename__ = "article_tombstones"
+    __table_args__ = (
+        Index("ix_article_tombstones_deleted_at_id", "deleted_at", "id"),
+        Index("ix_article_tombstones_purged_at_id", "purged_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    article_id = Column(Integer, nullable=False)
+    author_id = Column(Integer, nullable=False)
+    deleted_at = Column(SyncTimestamp, default=datetime.utcnow, nullable=False)
+    purged_at = Column(DateTime(timezone=True))
+    claimed_by = Column(String(100))
+    claimed_at = Column(DateTime(timezone=True))
 
 class ArticleView(Base):
+    """
+    Append-only view history, stored in monthly time buckets.
+
+    On MySQL the table is RANGE-partitioned by month on viewed_at (the
+    migration adds viewed_at to the primary key, and partitioned tables
+    cannot have foreign keys); on SQLite rows live in rotating
+    article_views_YYYYMM tables. Reads and writes go through app.view_storage.
+    """
     __tablename__ = "article_views"
-    logger.info(f"Defining model for table: {__tablename__}")
+    __table_args__ = (
+        Index("ix_article_views_article_id_viewed_at", "article_id", "viewed_at"),
+        Index("ix_article_views_user_id_viewed_at", "user_id", "viewed_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    article_id = Column(Integer, ForeignKey("articles.id"), nullable=False)
-    viewed_at = Column(DateTime(timezone=True), server_default=func.now())
+    user_id = Column(Integer, nullable=False)
+    article_id = Column(Integer, nullable=False)
+    viewed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
 
-    user = relationship("User", back_populates="article_views")
-    article = relationship("Article", back_populates="article_views")
\ No newline at end of file
+    user = relationship("User", back_populates="article_views", primaryjoin="foreign(ArticleView.user_id) == User.id")
+    article = relationship(
+        "Article", back_populates="article_views", primaryjoin="foreign(ArticleView.article_id) == Article.id"
+    )
\ No newline at end of file
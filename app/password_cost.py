@@ -0,0 +1,97 @@
+"""
+Pick the bcrypt cost for this machine
+
+Each bcrypt round doubles the hashing time, so a fixed cost is either too
+cheap on fast hardware or makes logins slow and CPU-bound on slow hardware.
+Calibration measures the hash time per cost on the machine that will serve
+logins and picks the highest cost that stays within a target:
+    python -m app.password_cost calibrate --target-ms 250 --env-file .env
+
+The chosen cost is stored as BCRYPT_ROUNDS (read by app.auth). Existing
+hashes with a different cost are rehashed the next time their owner logs in.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from typing import Callable
+
+from passlib.hash import bcrypt
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Never calibrate below the commonly recommended minimum
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+TARGET_HASH_MS = float(os.getenv("BCRYPT_TARGET_MS", "250"))
+
+SAMPLE_PASSWORD = "calibration-password-123"
+
+
+def measure_hash_seconds(rounds: int, samples: int = 3) -> float:
+    """
+    Fastest of `samples` hashes at this cost; verifying costs the same
+    """
+    handler = bcrypt.using(rounds=rounds)
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        handler.hash(SAMPLE_PASSWORD)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def choose_rounds(target_seconds: float, measure: Callable[[int], float] = measure_hash_seconds,
+                  min_rounds: int = MIN_ROUNDS, max_rounds: int = MAX_ROUNDS) -> int:
+    """
+    Highest cost whose hash time is within the target, never below min_rounds
+    """
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        seconds = measure(rounds)
+        logger.info(f"bcrypt cost {rounds}: {seconds * 1000:.1f}ms")
+        if seconds > target_seconds:
+            break
+        chosen = rounds
+    return chosen
+
+
+def write_env_setting(path: str, name: str, value: str) -> None:
+    """
+    Set `name=value` in a dotenv file, replacing an existing assignment
+    """
+    lines = []
+    if os.path.exists(path):
+        with open(path) as f:
+            lines = f.read().splitlines()
+    assignment = f"{name}={value}"
+    for i, line in enumerate(lines):
+        if line.split("=", 1)[0].strip() == name:
+            lines[i] = assignment
+            break
+    else:
+        lines.append(assignment)
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Calibrate the bcrypt cost for this machine")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    calibrate_parser = subparsers.add_parser("calibrate", help="Pick the cost that meets a target hash time")
+    calibrate_parser.add_argument("--target-ms", type=float, default=TARGET_HASH_MS)
+    calibrate_parser.add_argument("--env-file", help="Store the result as BCRYPT_ROUNDS in this dotenv file")
+    args = parser.parse_args(argv)
+
+    rounds = choose_rounds(args.target_ms / 1000)
+    print(f"BCRYPT_ROUNDS={rounds}")
+    if args.env_file:
+        write_env_setting(args.env_file, "BCRYPT_ROUNDS", str(rounds))
+        logger.info(f"Stored BCRYPT_ROUNDS={rounds} in {args.env_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
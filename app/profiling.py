@@ -0,0 +1,172 @@
+"""
+Slow-query logging and per-request SQL profiling
+
+- Statements slower than SLOW_QUERY_MS are always logged with their
+  parameters and the route that issued them.
+- With DB_PROFILE_DEBUG=true every response carries X-DB-Query-Count and
+  X-DB-Time-Ms headers, and a statement repeated N_PLUS_ONE_THRESHOLD times
+  or more within one request is logged as a likely N+1 pattern.
+- With PROFILE_SAMPLE_RATE > 0 a sample of requests is run under cProfile and
+  the stats are written to PROFILE_OUTPUT_DIR, optionally limited to the
+  route templates listed in PROFILE_ROUTES.
+"""
+import cProfile
+import functools
+import inspect
+import logging
+import os
+import random
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi.routing import APIRoute
+
+from app.metrics import add_query_observer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+DB_PROFILE_DEBUG = os.getenv("DB_PROFILE_DEBUG", "false").lower() == "true"
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "3"))
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_ROUTES = {route for route in os.getenv("PROFILE_ROUTES", "").split(",") if route}
+PROFILE_OUTPUT_DIR = os.getenv("PROFILE_OUTPUT_DIR", "profiles")
+
+MAX_LOGGED_PARAMETERS = 500
+
+
+class RequestProfile:
+    """
+    SQL activity of a single request
+    """
+    __slots__ = ("scope", "query_count", "db_time", "statements", "profiler")
+
+    def __init__(self, scope, debug: bool):
+        self.scope = scope
+        self.query_count = 0
+        self.db_time = 0.0
+        self.statements: Optional[Counter] = Counter() if debug else None
+        self.profiler: Optional[cProfile.Profile] = None
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        path = route.path if route is not None else self.scope.get("path", "")
+        return f"{self.scope.get('method', '')} {path}"
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_request_profile", default=None)
+
+
+def _record_query(statement, parameters, elapsed: float) -> None:
+    profile = _current_profile.get()
+
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        logged_parameters = repr(parameters)
+        if len(logged_parameters) > MAX_LOGGED_PARAMETERS:
+            logged_parameters = logged_parameters[:MAX_LOGGED_PARAMETERS] + "..."
+        logger.warning(
+            f"Slow query ({elapsed * 1000:.1f}ms) from {profile.route if profile else 'background'}: "
+            f"{statement} | parameters: {logged_parameters}"
+        )
+
+    if profile is not None:
+        profile.query_count += 1
+        profile.db_time += elapsed
+        if profile.statements is not None:
+            profile.statements[statement] += 1
+
+
+# Timed once by the metrics hook rather than by a second pair of listeners
+add_query_observer(_record_query)
+
+
+def _should_sample(scope) -> bool:
+    if PROFILE_SAMPLE_RATE <= 0 or random.random() >= PROFILE_SAMPLE_RATE:
+        return False
+    if not PROFILE_ROUTES:
+        return True
+    # Routing has not happened yet, so match the raw path against the templates
+    path = scope.get("path", "")
+    return any(re.fullmatch(re.sub(r"\{[^}]+\}", r"[^/]+", route), path) for route in PROFILE_ROUTES)
+
+
+def _dump_profile(profile: RequestProfile) -> None:
+    os.makedirs(PROFILE_OUTPUT_DIR, exist_ok=True)
+    name = re.sub(r"[^A-Za-z0-9]+", "_", profile.route).strip("_")
+    path = os.path.join(PROFILE_OUTPUT_DIR, f"{name}_{int(time.time() * 1000)}.prof")
+    profile.profiler.dump_stats(path)
+    logger.info(f"Profile for {profile.route} written to {path}")
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware that tracks the SQL issued by each request
+    """
+
+    def __init__(self, app, debug: bool = DB_PROFILE_DEBUG):
+        self.app = app
+        self.debug = debug
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope, self.debug)
+        if _should_sample(scope):
+            profile.profiler = cProfile.Profile()
+
+        async def send_wrapper(message):
+            if self.debug and message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-query-count", str(profile.query_count).encode()))
+                headers.append((b"x-db-time-ms", f"{profile.db_time * 1000:.2f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_profile.reset(token)
+            if profile.statements:
+                for statement, count in profile.statements.items():
+                    if count >= N_PLUS_ONE_THRESHOLD:
+                        logger.warning(
+                            f"Possible N+1 in {profile.route}: statement executed {count} times: {statement}"
+                        )
+            if profile.profiler is not None:
+                _dump_profile(profile)
+
+
+def install_route_profiling(app) -> None:
+    """
+    Wrap sync endpoints so sampled requests are profiled in the worker thread.
+
+    Sync endpoints run in the threadpool, where a profiler enabled by the
+    middleware on the event loop thread would see nothing, so the endpoint
+    call itself enables the request's profiler.
+    """
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or inspect.iscoroutinefunction(route.dependant.call):
+            continue
+        route.dependant.call = _profiled(route.dependant.call)
+
+
+def _profiled(call):
+    @functools.wraps(call)
+    def wrapper(*args, **kwargs):
+        profile = _current_profile.get()
+        if profile is None or profile.profiler is None:
+            return call(*args, **kwargs)
+        profile.profiler.enable()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            profile.profiler.disable()
+    return wrapper
@@ -0,0 +1,190 @@
+"""
+Background cleanup after article deletes
+
+Deleting an article removes its row and writes a tombstone in the request;
+the article's views can number in the millions, so they are not touched
+there. This purger picks up tombstones that are not purged yet and deletes
+their views PURGE_BATCH_SIZE rows per transaction, then sets purged_at.
+
+Every worker runs a purger, so a tombstone is first claimed with a
+conditional UPDATE that only one worker can win; the others skip it. A claim
+older than PURGE_CLAIM_SECONDS (its worker died mid-purge) can be taken over.
+
+Each worker also evicts deleted articles from its own in-process recently
+viewed store, following the tombstones it has not seen yet.
+
+Run once by hand (e.g. from cron when the background thread is disabled):
+    python -m app.purger run --batch-size 1000
+"""
+import argparse
+import logging
+import os
+import socket
+import sys
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import func, or_, select, update
+
+from app.metrics import metrics
+from app.models import ArticleTombstone
+from app.recently_viewed_service import recently_viewed_service
+from app.view_storage import delete_article_views
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PURGE_ENABLED = os.getenv("PURGE_ENABLED", "true").lower() == "true"
+PURGE_INTERVAL_SECONDS = float(os.getenv("PURGE_INTERVAL_SECONDS", "10"))
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "1000"))
+PURGE_CLAIM_SECONDS = float(os.getenv("PURGE_CLAIM_SECONDS", "600"))
+# Unpurged tombstones read per lookup
+PURGE_TOMBSTONES_PER_PASS = 100
+
+
+def purge_article(conn_factory, article_id: int, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """
+    Delete every view of an article, one short transaction per batch
+    """
+    purged = 0
+    while True:
+        with conn_factory() as conn:
+            deleted = delete_article_views(conn, article_id, batch_size)
+        purged += deleted
+        metrics.inc("article_views_purged_total", deleted)
+        if deleted < batch_size:
+            return purged
+
+
+def _claimable(table, now: datetime):
+    return or_(table.c.claimed_at.is_(None), table.c.claimed_at < now - timedelta(seconds=PURGE_CLAIM_SECONDS))
+
+
+def claim_tombstone(conn_factory, tombstone_id: int, owner: str) -> bool:
+    """
+    Claim a tombstone for purging; False when another worker holds it or it is purged
+    """
+    table = ArticleTombstone.__table__
+    now = datetime.utcnow()
+    with conn_factory() as conn:
+        result = conn.execute(
+            update(table)
+            .where(table.c.id == tombstone_id, table.c.purged_at.is_(None), _claimable(table, now))
+            .values(claimed_by=owner, claimed_at=now)
+        )
+    return result.rowcount == 1
+
+
+def purge_pending(conn_factory, batch_size: int = PURGE_BATCH_SIZE, owner: Optional[str] = None) -> int:
+    """
+    Purge the views of every tombstoned article not purged yet and not
+    claimed by another worker; returns the number of articles purged
+    """
+    owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+    table = ArticleTombstone.__table__
+    purged = 0
+    last_id = 0
+    while True:
+        with conn_factory() as conn:
+            pending = conn.execute(
+                select(table.c.id, table.c.article_id)
+                .where(table.c.purged_at.is_(None), _claimable(table, datetime.utcnow()), table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(PURGE_TOMBSTONES_PER_PASS)
+            ).all()
+        if not pending:
+            return purged
+        for tombstone_id, article_id in pending:
+            if not claim_tombstone(conn_factory, tombstone_id, owner):
+                continue
+            views = purge_article(conn_factory, article_id, batch_size)
+            with conn_factory() as conn:
+                conn.execute(update(table).where(table.c.id == tombstone_id).values(purged_at=datetime.utcnow()))
+            logger.info(f"Purged {views} views of deleted article {article_id}")
+            purged += 1
+        last_id = pending[-1][0]
+
+
+class ViewPurger:
+    """
+    Background thread running the purge and recently viewed eviction
+    """
+
+    def __init__(self, conn_factory: Optional[Callable] = None, interval: float = PURGE_INTERVAL_SECONDS,
+                 batch_size: int = PURGE_BATCH_SIZE):
+        self.conn_factory = conn_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        # Highest tombstone id already evicted from this worker's store
+        self.evicted_through: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def evict_deleted(self) -> int:
+        """
+        Evict articles tombstoned since the last call from the recently viewed store
+        """
+        table = ArticleTombstone.__table__
+        with self.conn_factory() as conn:
+            if self.evicted_through is None:
+                # Nothing deleted before this worker started can be in its store
+                self.evicted_through = conn.execute(select(func.coalesce(func.max(table.c.id), 0))).scalar()
+                return 0
+            rows = conn.execute(
+                select(table.c.id, table.c.article_id).where(table.c.id > self.evicted_through).order_by(table.c.id)
+            ).all()
+        for tombstone_id, article_id in rows:
+            recently_viewed_service.remove_article(article_id)
+            self.evicted_through = tombstone_id
+        return len(rows)
+
+    def run_once(self) -> None:
+        try:
+            self.evict_deleted()
+            purge_pending(self.conn_factory, self.batch_size)
+        except Exception as e:
+            logger.error(f"View purge failed: {str(e)}")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        if self.conn_factory is None:
+            from app.database import get_engine
+
+            self.conn_factory = get_engine().begin
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="view-purger", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.interval)
+            self._thread = None
+
+
+# Global instance
+view_purger = ViewPurger()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Purge the views of deleted articles")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="Purge every pending deleted article")
+    run_parser.add_argument("--batch-size", type=int, default=PURGE_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    from app.database import get_engine
+
+    purge_pending(get_engine().begin, args.batch_size)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Prebuilt statements for the hot request paths
+
+Building a select() and deriving its cache key is Python work paid on every
+request, on top of the SQL itself. The statements here are built once, with
+bind parameters for every per-request value, so a request only binds values
+and SQLAlchemy finds the compiled form in its cache straight away. Listing
+statements depend on the filter and sort combination and are built on first
+use of each combination.
+"""
+from functools import lru_cache
+from typing import Tuple
+
+from sqlalchemy import bindparam, func, or_, select
+from sqlalchemy.orm import undefer
+
+from app.models import Article, User
+
+# Sortable columns and whether they are listed in descending order
+SORT_COLUMNS = {
+    "created_at": (Article.created_at, True),
+    "updated_at": (Article.updated_at, True),
+    "title": (Article.title, False),
+}
+
+# Listing filters, each bound to the parameter of the same name
+LISTING_FILTERS = {
+    "author_id": Article.author_id == bindparam("author_id"),
+    "created_after": Article.created_at >= bindparam("created_after"),
+    "created_before": Article.created_at < bindparam("created_before"),
+}
+
+# Columns returned by the conditional UPDATE, matching ArticleResponse
+ARTICLE_COLUMNS = (
+    Article.id,
+    Article.title,
+    Article.content,
+    Article.author_id,
+    Article.created_at,
+    Article.updated_at,
+)
+
+USER_BY_USERNAME = select(User).where(User.username == bindparam("username")).limit(1)
+
+ARTICLE_BY_ID = select(Article).options(undefer(Article.content)).where(Article.id == bindparam("article_id"))
+
+ARTICLE_ROW_BY_ID = select(*ARTICLE_COLUMNS).where(Article.id == bindparam("article_id"))
+
+ARTICLE_ID_BY_ID = select(Article.id).where(Article.id == bindparam("article_id"))
+
+ARTICLE_SUMMARIES_BY_IDS = select(Article.id, Article.title, Article.excerpt, Article.author_id).where(
+    Article.id.in_(bindparam("article_ids", expanding=True))
+)
+
+
+@lru_cache(maxsize=None)
+def article_count(filters: Tuple[str, ...]):
+    return select(func.count()).select_from(Article).where(*(LISTING_FILTERS[name] for name in filters))
+
+
+def _listing(sort: str, filters: Tuple[str, ...]):
+    # created_at/updated_at are newest first (never-updated articles last), title is A-Z.
+    # Ties are broken by id so that every order is total and matches the indexes.
+    column, descending = SORT_COLUMNS[sort]
+    order_by = (column.desc(), Article.id.desc()) if descending else (column.asc(), Article.id.asc())
+    return select(Article).where(*(LISTING_FILTERS[name] for name in filters)).order_by(*order_by)
+
+
+@lru_cache(maxsize=None)
+def article_page(sort: str, filters: Tuple[str, ...]):
+    """
+    Offset page of the listing; binds offset and limit
+    """
+    return _listing(sort, filters).offset(bindparam("offset")).limit(bindparam("limit"))
+
+
+@lru_cache(maxsize=None)
+def sort_key_is_null(sort: str):
+    column, _ = SORT_COLUMNS[sort]
+    return select(column.is_(None)).where(Article.id == bindparam("after_id"))
+
+
+@lru_cache(maxsize=None)
+def article_seek(sort: str, filters: Tuple[str, ...], position: str):
+    """
+    Keyset page of the listing; binds after_id and limit. `position` is:
+      after     - rows after article after_id, whose sort key is not NULL
+      null_tail - rows with a NULL sort key after article after_id, which has one too
+      nulls     - rows with a NULL sort key from the start
+
+    The sort key is compared against the stored value via a subquery rather
+    than a round-tripped bind parameter, so it matches exactly on every backend.
+    """
+    column, descending = SORT_COLUMNS[sort]
+    after_id = bindparam("after_id")
+    stmt = _listing(sort, filters)
+    if position == "nulls":
+        stmt = stmt.where(column.is_(None))
+    elif position == "null_tail":
+        stmt = stmt.where(column.is_(None), Article.id < after_id)
+    else:
+        key = select(column).where(Article.id == after_id).scalar_subquery()
+        if descending:
+            # The redundant `column <= key` turns the seek into an index range scan
+            stmt = stmt.where(column <= key, or_(column < key, Article.id < after_id))
+        else:
+            stmt = stmt.where(column >= key, or_(column > key, Article.id > after_id))
+    return stmt.limit(bindparam("limit"))
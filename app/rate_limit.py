@@ -0,0 +1,176 @@
+"""
+Token-bucket rate limiting for login attempts
+
+Buckets are kept by a backend so several workers can share them. The only
+backend here is in memory, so each process (each app.serve worker) keeps
+its own buckets and the effective limits scale with the worker count. A
+shared backend (e.g. Redis) has to implement RateLimitBackend atomically.
+
+Behind a load balancer every request arrives from the balancer's address,
+so the client IP is taken from X-Forwarded-For when the peer is one of
+TRUSTED_PROXIES (comma-separated addresses or networks).
+"""
+import ipaddress
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple, Union
+
+from app.metrics import metrics
+
+LOGIN_RATE_LIMIT_ENABLED = os.getenv("LOGIN_RATE_LIMIT_ENABLED", "true").lower() == "true"
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "20"))
+LOGIN_IP_PER_MINUTE = float(os.getenv("LOGIN_IP_PER_MINUTE", "30"))
+LOGIN_USERNAME_BURST = int(os.getenv("LOGIN_USERNAME_BURST", "10"))
+LOGIN_USERNAME_PER_MINUTE = float(os.getenv("LOGIN_USERNAME_PER_MINUTE", "5"))
+
+
+def parse_trusted_proxies(value: str) -> List[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]]:
+    return [ipaddress.ip_network(part.strip(), strict=False) for part in value.split(",") if part.strip()]
+
+
+TRUSTED_PROXIES = parse_trusted_proxies(os.getenv("TRUSTED_PROXIES", ""))
+
+
+def _is_trusted(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+
+def client_ip(peer: Optional[str], forwarded_for: Optional[str]) -> str:
+    """
+    Address of the client: the peer itself, or when the peer is a trusted
+    proxy, the rightmost X-Forwarded-For entry not added by a trusted proxy.
+    Entries further left are client-supplied and cannot be trusted.
+    """
+    if not peer:
+        return "unknown"
+    if not forwarded_for or not _is_trusted(peer):
+        return peer
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted(hop):
+            return hop
+    # Every hop is a proxy; the leftmost is the closest we get to the client
+    return hops[0] if hops else peer
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage for token buckets
+    """
+
+    @abstractmethod
+    def consume(self, key: str, capacity: int, refill_per_second: float) -> float:
+        """
+        Take one token from the bucket. Returns 0 when allowed, otherwise the
+        number of seconds until a token becomes available.
+        """
+
+    @abstractmethod
+    def refund(self, key: str, capacity: int) -> None:
+        """
+        Give back a token taken by consume
+        """
+
+    @abstractmethod
+    def reset(self) -> None:
+        """
+        Forget every bucket
+        """
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Process-local buckets, bounded to max_keys with least-recently-used eviction
+    """
+
+    def __init__(self, max_keys: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, capacity: int, refill_per_second: float) -> float:
+        now = self.clock()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                retry_after = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                retry_after = (1 - tokens) / refill_per_second
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+    def refund(self, key: str, capacity: int) -> None:
+        with self._lock:
+            if key in self._buckets:
+                tokens, updated = self._buckets[key]
+                self._buckets[key] = (min(capacity, tokens + 1), updated)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class LoginRateLimiter:
+    """
+    Limits login attempts per client IP and per username from each IP.
+
+    The username bucket is keyed on the IP too, so guessing a password from
+    one address does not lock the user out everywhere, and successful logins
+    give their token back, so only failed attempts count against it.
+    """
+
+    def __init__(self, backend: RateLimitBackend, enabled: bool = LOGIN_RATE_LIMIT_ENABLED):
+        self.backend = backend
+        self.enabled = enabled
+
+    def check(self, ip: str, username: str) -> Optional[float]:
+        """
+        Record an attempt. Returns None when allowed, otherwise the number of
+        seconds the client should wait before retrying.
+        """
+        if not self.enabled:
+            return None
+        metrics.inc("login_attempts_total")
+
+        retry_after = self.backend.consume(f"login:ip:{ip}", LOGIN_IP_BURST, LOGIN_IP_PER_MINUTE / 60)
+        if retry_after:
+            metrics.inc("login_throttled_ip_total")
+            return retry_after
+
+        retry_after = self.backend.consume(
+            self._username_key(ip, username), LOGIN_USERNAME_BURST, LOGIN_USERNAME_PER_MINUTE / 60
+        )
+        if retry_after:
+            metrics.inc("login_throttled_username_total")
+            return retry_after
+        return None
+
+    def record_success(self, ip: str, username: str) -> None:
+        """
+        Refund the username token taken by check for a successful login
+        """
+        if self.enabled:
+            self.backend.refund(self._username_key(ip, username), LOGIN_USERNAME_BURST)
+
+    @staticmethod
+    def _username_key(ip: str, username: str) -> str:
+        return f"login:user:{username.lower()}:{ip}"
+
+    def reset(self) -> None:
+        self.backend.reset()
+
+
+# Global instance
+login_rate_limiter = LoginRateLimiter(InMemoryRateLimitBackend())
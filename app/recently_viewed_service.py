@@ -1,6 +1,8 @@
+import threading
 from collections import defaultdict, deque
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional, Set
+from app.coview import CoViewIndex, coview_index
 from app.schemas import RecentlyViewedArticleResponse
 from app.models import Article, User
 
@@ -11,21 +13,24 @@ class RecentlyViewedService:
     Uses basic collections and primitives as required
     """
     
-    def __init__(self, max_recent_items: int = 10):
+    def __init__(self, max_recent_items: int = 10, coview_index: Optional[CoViewIndex] = None):
         # Dictionary to store recently viewed articles per user
         # Key: user_id, Value: deque of article data
         self._user_recent_views: Dict[int, deque] = defaultdict(lambda: deque(maxlen=max_recent_items))
+        # Reverse index: article_id -> users whose list holds it, so a deleted
+        # article is evicted without scanning every user
+        self._article_viewers: Dict[int, Set[int]] = defaultdict(set)
+        # Fed with every view paired with the user's earlier ones ("viewers also read")
+        self._coview_index = coview_index
+        # Request threads and the purger thread (remove_article) share the
+        # dicts above; every access to them holds this lock
+        self._lock = threading.Lock()
     
     def add_view(self, user_id: int, article: Article) -> None:
         """
         Add an article to user's recently viewed list
         """
         current_time = datetime.utcnow()
-        
-        # Remove if already exists to avoid duplicates
-        self._remove_existing_view(user_id, article.id)
-        
-        # Add to front of deque (most recent first)
         view_data = {
             'article_id': article.id,
             'title': article.title,
@@ -35,13 +40,29 @@ class RecentlyViewedService:
             'viewed_at': current_time
         }
         
-        self._user_recent_views[user_id].appendleft(view_data)
+        with self._lock:
+            previous = [(view['article_id'], view['viewed_at']) for view in self._user_recent_views.get(user_id, ())]
+            
+            # Remove if already exists to avoid duplicates
+            self._remove_existing_view(user_id, article.id)
+            
+            # Add to front of deque (most recent first)
+            user_views = self._user_recent_views[user_id]
+            if len(user_views) == user_views.maxlen:
+                # appendleft drops the oldest entry
+                self._forget_viewer(user_views[-1]['article_id'], user_id)
+            user_views.appendleft(view_data)
+            self._article_viewers[article.id].add(user_id)
+        
+        if self._coview_index is not None:
+            self._coview_index.record_view(article.id, previous, current_time)
     
     def get_recently_viewed(self, user_id: int) -> List[RecentlyViewedArticleResponse]:
         """
         Get recently viewed articles for a user
         """
-        recent_views = self._user_recent_views.get(user_id, deque())
+        with self._lock:
+            recent_views = list(self._user_recent_views.get(user_id, ()))
         
         result = []
         for view_data in recent_views:
@@ -68,7 +89,7 @@ class RecentlyViewedService:
     
     def _remove_existing_view(self, user_id: int, article_id: int) -> None:
         """
-        Remove existing view of the same article to avoid duplicates
+        Remove existing view of the same article to avoid duplicates; caller holds the lock
         """
         user_views = self._user_recent_views.get(user_id)
         if not user_views:
@@ -81,14 +102,53 @@ class RecentlyViewedService:
         )
         
         self._user_recent_views[user_id] = filtered_views
+        self._forget_viewer(article_id, user_id)
+    
+    def _forget_viewer(self, article_id: int, user_id: int) -> None:
+        # Caller holds the lock
+        viewers = self._article_viewers.get(article_id)
+        if viewers is not None:
+            viewers.discard(user_id)
+            if not viewers:
+                del self._article_viewers[article_id]
+    
+    def remove_article(self, article_id: int) -> int:
+        """
+        Evict a deleted article from every user's list; returns the number of users affected
+        """
+        if self._coview_index is not None:
+            self._coview_index.remove_article(article_id)
+        with self._lock:
+            viewers = self._article_viewers.pop(article_id, set())
+            for user_id in viewers:
+                user_views = self._user_recent_views.get(user_id)
+                if user_views:
+                    self._user_recent_views[user_id] = deque(
+                        [view for view in user_views if view['article_id'] != article_id],
+                        maxlen=user_views.maxlen
+                    )
+        return len(viewers)
     
     def clear_user_views(self, user_id: int) -> None:
         """
         Clear all recently viewed articles for a user
         """
-        if user_id in self._user_recent_views:
-            del self._user_recent_views[user_id]
+        with self._lock:
+            if user_id in self._user_recent_views:
+                for view in self._user_recent_views.pop(user_id):
+                    self._forget_viewer(view['article_id'], user_id)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Number of tracked users and stored views, for monitoring
+        """
+        with self._lock:
+            views = list(self._user_recent_views.values())
+        return {
+            'users': len(views),
+            'entries': sum(len(user_views) for user_views in views),
+        }
 
 
 # Global instance
-recently_viewed_service = RecentlyViewedService()
\ No newline at end of file
+recently_viewed_service = RecentlyViewedService(coview_index=coview_index)
\ No newline at end of file
@@ -0,0 +1,169 @@
+"""
+Read-replica routing for read-only endpoints
+
+Read-only routes take their session from get_read_db, which hands out a
+replica session when replicas are configured (REPLICA_DATABASE_URLS) and
+falls back to the primary session otherwise. After a user writes, their
+reads stay on the primary for READ_AFTER_WRITE_SECONDS so they never see
+replication lag on their own changes. The sticky window is tracked per
+worker process.
+"""
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from fastapi import Depends, Request
+from jose import JWTError, jwt
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import get_db
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REPLICA_DATABASE_URLS = [url.strip() for url in os.getenv("REPLICA_DATABASE_URLS", "").split(",") if url.strip()]
+READ_AFTER_WRITE_SECONDS = float(os.getenv("READ_AFTER_WRITE_SECONDS", "5"))
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class Replica:
+    """
+    A read replica and the time until which it is considered down
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.engine = create_engine(url, pool_pre_ping=True)
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.down_until = 0.0
+
+
+class ReplicaRouter:
+    """
+    Chooses a healthy replica round-robin and remembers recent writers
+    """
+
+    def __init__(self, urls: List[str], sticky_seconds: float = READ_AFTER_WRITE_SECONDS,
+                 retry_seconds: float = REPLICA_RETRY_SECONDS, clock: Callable[[], float] = time.monotonic,
+                 max_writers: int = 100_000):
+        self.replicas = [Replica(url) for url in urls]
+        self.sticky_seconds = sticky_seconds
+        self.retry_seconds = retry_seconds
+        self.clock = clock
+        self.max_writers = max_writers
+        self._next = itertools.count()
+        self._recent_writers: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def pick(self) -> Optional[Replica]:
+        """
+        Next healthy replica, or None when all are down. A replica whose retry
+        time has passed is handed out again to probe whether it recovered.
+        """
+        now = self.clock()
+        count = len(self.replicas)
+        start = next(self._next)
+        for offset in range(count):
+            replica = self.replicas[(start + offset) % count]
+            if replica.down_until <= now:
+                return replica
+        return None
+
+    def mark_down(self, replica: Replica) -> None:
+        replica.down_until = self.clock() + self.retry_seconds
+        logger.warning(f"Replica {replica.url.split('@')[-1]} marked down for {self.retry_seconds}s")
+
+    def record_write(self, key: str) -> None:
+        now = self.clock()
+        with self._lock:
+            if len(self._recent_writers) >= self.max_writers:
+                self._recent_writers = {k: v for k, v in self._recent_writers.items() if v > now}
+            self._recent_writers[key] = now + self.sticky_seconds
+
+    def is_sticky(self, key: str) -> bool:
+        until = self._recent_writers.get(key)
+        return until is not None and until > self.clock()
+
+
+# Global instance
+replica_router = ReplicaRouter(REPLICA_DATABASE_URLS)
+
+
+def client_key(authorization: Optional[str]) -> Optional[str]:
+    """
+    Identify the user behind a bearer token without verifying it; the key only
+    decides which database serves their reads.
+    """
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        return jwt.get_unverified_claims(authorization[7:]).get("sub")
+    except JWTError:
+        return None
+
+
+def get_read_db(request: Request, db: Session = Depends(get_db)):
+    """
+    Dependency for read-only routes: a replica session when one is healthy and
+    the user has not written recently, the primary session otherwise
+    """
+    if not replica_router.enabled:
+        yield db
+        return
+
+    key = client_key(request.headers.get("authorization"))
+    replica = None if key and replica_router.is_sticky(key) else replica_router.pick()
+    if replica is None:
+        yield db
+        return
+
+    session = replica.session_factory()
+    try:
+        # Check out a connection now so a dead replica fails over before the query runs
+        session.connection()
+    except Exception as e:
+        logger.error(f"Replica connection failed: {str(e)}")
+        session.close()
+        replica_router.mark_down(replica)
+        yield db
+        return
+
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+class ReadAfterWriteMiddleware:
+    """
+    Pure ASGI middleware that starts a user's sticky-to-primary window after
+    any successful non-GET request
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or not replica_router.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                authorization = dict(scope["headers"]).get(b"authorization")
+                key = client_key(authorization.decode("latin-1") if authorization else None)
+                if key:
+                    replica_router.record_write(key)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,27 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from typing import List
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import delete, update
+from typing import List, Literal, Optional
+from datetime import datetime
 import math
 from app.database import get_db
-from app.models import Article, User
-from app.auth import get_current_user
+from app.replicas import get_read_db
+from app.models import Article, ArticleTombstone, User
+from app.auth import get_current_user, get_token_subject
+from app.events import article_events
+from app.article_metadata import content_metadata
+from app.sync import InvalidSyncToken, changes_since
+from app import queries
+from app.queries import SORT_COLUMNS
+from app.fieldsets import FieldSet, as_article, parse_fields, project, shape, with_required
 from app.schemas import (
     ArticleResponse,
     ArticleListResponse,
     ArticlesPaginatedResponse,
+    ArticleChangesResponse,
     RecentlyViewedArticleResponse,
+    RelatedArticleResponse,
     ArticleUpdate,
+    UserResponse,
 )
 from app.schemas import (
     ArticleCreate,
 )
 
 from app.recently_viewed_service import recently_viewed_service
+from app.coview import COVIEW_MAX_NEIGHBORS, coview_index
 
 router = APIRouter(prefix="/articles", tags=["articles"])
 
-
 # Here I created a route so that users can create articles. Also all the routes are protected by authentication.user must be logged in to create an article.
 @router.post("/", response_model=ArticleResponse, status_code=status.HTTP_201_CREATED)
 def create_article(
@@ -35,63 +49,176 @@ def create_article(
     new_article = Article(
         title=article_data.title,
         content=article_data.content,
-        author_id=current_user.id
+        author_id=current_user.id,
+        **content_metadata(article_data.content)
     )
     
     db.add(new_article)
     db.commit()
     db.refresh(new_article)
+    # content is deferred; reuse the submitted text instead of reading it back
+    set_committed_value(new_article, "content", article_data.content)
+    article_events.publish("article.created", new_article.id, new_article.author_id, new_article.title)
     
     return new_article
 
 # Here I created a route so that users can req articles and also pagination is implemented.
+# Filters and sort orders are limited to the combinations that have a matching index.
 @router.get("/", response_model=ArticlesPaginatedResponse)
 def get_articles(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(10, ge=1, le=100, description="Items per page"),
-    db: Session = Depends(get_db),
+    author_id: Optional[int] = Query(None, description="Only articles by this author"),
+    created_after: Optional[datetime] = Query(None, description="Only articles created at or after this time"),
+    created_before: Optional[datetime] = Query(None, description="Only articles created before this time"),
+    sort: Literal["created_at", "updated_at", "title"] = Query("created_at", description="Sort order"),
+    after_id: Optional[int] = Query(None, description="Continue after this article (next_after_id of the previous page)"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,title,author.username"),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get paginated list of articles
     """
-    offset = (page - 1) * page_size
+    fieldset = parse_fields(fields, ArticleListResponse)
+    if (created_after or created_before) and sort != "created_at":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="created_after/created_before can only be combined with sort=created_at"
+        )
+    
+    params = {"author_id": author_id, "created_after": created_after, "created_before": created_before}
+    params = {name: value for name, value in params.items() if value is not None}
+    filters = tuple(params)
     
     # Get total count
-    total_articles = db.query(Article).count()
-    
-    # Get articles with pagination, it means we are fetching the articles
-    # ordered by creation date, with an offset and limit for pagination. if user wants to see the most recent articles first.
-    # here i used ordering by created_at in descending order to show the most recent articles first, intentionally.
-    articles = (
-        db.query(Article)
-        .order_by(desc(Article.created_at))
-        .offset(offset)
-        .limit(page_size)
-        .all()
-    )
+    total_articles = db.scalar(queries.article_count(filters), params)
+    
+    if after_id is None:
+        # Offset pagination; deep pages should use after_id instead
+        articles = _fetch(
+            db, queries.article_page(sort, filters), {**params, "offset": (page - 1) * page_size, "limit": page_size},
+            fieldset
+        )
+    else:
+        # A creation window already excludes rows without a created_at
+        column, _ = SORT_COLUMNS[sort]
+        include_nulls = column.nullable and created_after is None and created_before is None
+        articles = _articles_after(db, sort, filters, params, after_id, page_size, include_nulls, fieldset)
     
     total_pages = math.ceil(total_articles / page_size)
     
-    return ArticlesPaginatedResponse(
-        articles=articles,
+    response = ArticlesPaginatedResponse(
+        articles=[] if fieldset else articles,
         total=total_articles,
         page=page,
         page_size=page_size,
-        total_pages=total_pages
+        total_pages=total_pages,
+        next_after_id=articles[-1].id if len(articles) == page_size else None
+    )
+    if fieldset is None:
+        return response
+    # Sparse responses bypass the response model, which would demand every field
+    return JSONResponse(jsonable_encoder({
+        **response.model_dump(), "articles": [shape(row, fieldset) for row in articles]
+    }))
+
+
+def _fetch(db: Session, stmt, params: dict, fieldset: Optional[FieldSet]) -> list:
+    """
+    Run a listing statement: Article objects, or rows of only the fieldset's columns
+    """
+    if fieldset is None:
+        return db.scalars(stmt, params).all()
+    return db.execute(project(stmt, fieldset), params).all()
+
+
+def _articles_after(db: Session, sort: str, filters: tuple, params: dict, after_id: int, limit: int,
+                    include_nulls: bool, fieldset: Optional[FieldSet]) -> list:
+    """
+    Keyset page: the rows that follow article `after_id` in the sort order
+    """
+    cursor = db.execute(queries.sort_key_is_null(sort), {"after_id": after_id}).first()
+    if cursor is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="after_id does not refer to an existing article"
+        )
+    
+    params = {**params, "after_id": after_id, "limit": limit}
+    key_is_null = cursor[0]
+    if key_is_null:
+        # Already in the trailing never-updated rows
+        return _fetch(db, queries.article_seek(sort, filters, "null_tail"), params, fieldset)
+    
+    articles = _fetch(db, queries.article_seek(sort, filters, "after"), params, fieldset)
+    if len(articles) < limit and include_nulls:
+        # NULLs sort last in descending order; continue into them
+        params["limit"] = limit - len(articles)
+        articles += _fetch(db, queries.article_seek(sort, filters, "nulls"), params, fieldset)
+    return articles
+
+
+# Here i created a endpoint for delta sync: clients pass back the next_since token of their
+# previous call and get only the articles changed or deleted since. Declared before /{article_id}.
+@router.get("/changes", response_model=ArticleChangesResponse)
+def get_article_changes(
+    since: Optional[str] = Query(None, description="next_since of the previous sync; omit for a full sync"),
+    limit: int = Query(100, ge=1, le=500, description="Maximum changes and deletions per call"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get articles changed and deleted since a sync token
+    """
+    # Reads the primary: a lagging replica could skip changes behind the watermark
+    try:
+        changed, deleted, next_since, has_more = changes_since(db, since, limit)
+    except InvalidSyncToken:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sync token"
+        )
+    
+    return ArticleChangesResponse(changed=changed, deleted=deleted, next_since=next_since, has_more=has_more)
+
+
+# Here i created a endpoint that pushes article changes as server-sent events, so clients
+# do not have to poll the listing. It must be declared before /{article_id}.
+@router.get("/events")
+async def stream_article_events(
+    last_event_id: Optional[str] = Header(None, description="Resume after this event id"),
+    username: str = Depends(get_token_subject)
+):
+    """
+    Stream article created/updated/deleted events (text/event-stream)
+    """
+    return StreamingResponse(
+        article_events.stream(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
+
 # Here i created a endpoint to view a specific article by its ID. 
 @router.get("/{article_id}", response_model=ArticleResponse)
 def get_article(
     article_id: int,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,title,author.username"),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get a specific article by ID and track it as recently viewed
     """
-    article = db.query(Article).filter(Article.id == article_id).first()
+    fieldset = parse_fields(fields, ArticleResponse)
+    if fieldset is None:
+        article = db.scalars(queries.ARTICLE_BY_ID, {"article_id": article_id}).first()
+    else:
+        # Recently viewed tracking needs these whatever the client asked for
+        selected = with_required(fieldset, ("id", "title", "author_id"), ("username", "email"))
+        row = db.execute(project(queries.ARTICLE_ROW_BY_ID, selected), {"article_id": article_id}).first()
+        article = as_article(row) if row is not None else None
     
     if not article:
         raise HTTPException(
@@ -102,9 +229,41 @@ def get_article(
     # Here i am tracking the article as recently viewed by the user.
     recently_viewed_service.add_view(current_user.id, article)
     
+    if fieldset is not None:
+        return JSONResponse(jsonable_encoder(shape(row, fieldset)))
     return article
 
 
+# Here i created a endpoint for "viewers also read": the related ids and scores come from the
+# in-memory co-view index, so the only query loads the K articles themselves.
+@router.get("/{article_id}/related", response_model=List[RelatedArticleResponse])
+def get_related_articles(
+    article_id: int,
+    limit: int = Query(10, ge=1, le=COVIEW_MAX_NEIGHBORS, description="Maximum related articles"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the articles most often viewed together with this one
+    """
+    related = coview_index.related(article_id, limit)
+    if not related:
+        if db.scalar(queries.ARTICLE_ID_BY_ID, {"article_id": article_id}) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Article not found"
+            )
+        return []
+    
+    rows = {row.id: row for row in db.execute(
+        queries.ARTICLE_SUMMARIES_BY_IDS, {"article_ids": [other_id for other_id, _ in related]}
+    )}
+    return [
+        RelatedArticleResponse(**rows[other_id]._mapping, score=round(score, 4))
+        for other_id, score in related if other_id in rows
+    ]
+
+
 # Here i created a endpoint to get the recently viewed articles for the current user.
 @router.get("/recently-viewed/me", response_model=List[RecentlyViewedArticleResponse])
 def get_recently_viewed_articles(
@@ -128,34 +287,51 @@ def update_article(
     """
     Update an article (only by the author)
     """
-    article = db.query(Article).filter(Article.id == article_id).first()
-    
-    if not article:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Article not found"
-        )
-    
-    # Check if current user is the author
-    if article.author_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You can only update your own articles"
-        )
-    
     # Update fields if provided, we can customize it as per the entities of the article.now we have only title and content.
+    values = {}
     if article_update.title is not None:
-        article.title = article_update.title
+        values["title"] = article_update.title
     if article_update.content is not None:
-        article.content = article_update.content
+        values["content"] = article_update.content
+        values.update(content_metadata(article_update.content))
+    
+    # Serialize the author up front; current_user is expired by the commit
+    author = UserResponse.model_validate(current_user)
+    
+    if not values:
+        row = db.execute(queries.ARTICLE_ROW_BY_ID, {"article_id": article_id}).first()
+        if row is None or row.author_id != current_user.id:
+            raise _missing_or_forbidden(db, article_id, "update")
+        return ArticleResponse(**row._mapping, author=author)
+    
+    # The ownership check is part of the UPDATE itself, so the happy path is
+    # one statement (plus a re-read on databases without RETURNING).
+    stmt = (
+        update(Article)
+        .where(Article.id == article_id, Article.author_id == current_user.id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if db.get_bind().dialect.update_returning:
+        row = db.execute(stmt.returning(*queries.ARTICLE_COLUMNS)).first()
+    else:
+        result = db.execute(stmt)
+        row = None
+        if result.rowcount:
+            row = db.execute(queries.ARTICLE_ROW_BY_ID, {"article_id": article_id}).first()
+    
+    if row is None:
+        db.rollback()
+        raise _missing_or_forbidden(db, article_id, "update")
     
     db.commit()
-    db.refresh(article)
+    article_events.publish("article.updated", row.id, row.author_id, row.title)
     
-    return article
+    return ArticleResponse(**row._mapping, author=author)
 
 
 # here i created a endpoint to delete the article using its id. Also i am adding functionality that only the author of the article can delete it.
+# The delete only removes the row and writes a tombstone, so it returns immediately however many views the article has.
 
 @router.delete("/{article_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_article(
@@ -166,20 +342,38 @@ def delete_article(
     """
     Delete an article (only by the author)
     """
-    article = db.query(Article).filter(Article.id == article_id).first()
+    author_id = current_user.id
+    result = db.execute(
+        delete(Article)
+        .where(Article.id == article_id, Article.author_id == author_id)
+        .execution_options(synchronize_session=False)
+    )
     
-    if not article:
-        raise HTTPException(
+    if result.rowcount == 0:
+        db.rollback()
+        raise _missing_or_forbidden(db, article_id, "delete")
+    
+    # Recorded in the same transaction so delta sync can report the deletion
+    db.execute(ArticleTombstone.__table__.insert().values(article_id=article_id, author_id=author_id))
+    db.commit()
+    # Views are purged in the background (app.purger); this worker's recently
+    # viewed lists can drop the article right away
+    recently_viewed_service.remove_article(article_id)
+    article_events.publish("article.deleted", article_id, author_id)
+
+
+def _missing_or_forbidden(db: Session, article_id: int, action: str) -> HTTPException:
+    """
+    Work out why a conditional write matched no row: the article does not
+    exist (404) or belongs to someone else (403)
+    """
+    exists = db.scalar(queries.ARTICLE_ID_BY_ID, {"article_id": article_id})
+    if exists is None:
+        return HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Article not found"
         )
-    
-    # Check if current user is the author
-    if article.author_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You can only delete your own articles"
-        )
-    
-    db.delete(article)
-    db.commit()
\ No newline at end of file
+    return HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail=f"You can only {action} your own articles"
+    )
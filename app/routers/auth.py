@@ -1,5 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import User
@@ -10,6 +12,8 @@ from app.auth import (
     create_access_token, 
     get_current_user
 )
+from app.rate_limit import client_ip, login_rate_limiter
+import math
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -22,45 +26,58 @@ def register_user(
     """
     Register a new user
     """
-    # Check if username already exists
-    existing_user = db.query(User).filter(User.username == user_data.username).first()
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered"
-        )
+    # The unique constraints on username and email decide duplicates, so the
+    # happy path is a single INSERT instead of two SELECTs before it.
+    hashed_password = get_password_hash(user_data.password)
+    values = {
+        "username": user_data.username,
+        "email": user_data.email,
+        "hashed_password": hashed_password,
+    }
     
-    # Check if email already exists
-    existing_email = db.query(User).filter(User.email == user_data.email).first()
-    if existing_email:
+    try:
+        if db.get_bind().dialect.insert_returning:
+            new_user = db.scalars(insert(User).values(**values).returning(User)).one()
+            # Serialize before commit, which would expire the returned row
+            response = UserResponse.model_validate(new_user)
+            db.commit()
+        else:
+            new_user = User(**values)
+            db.add(new_user)
+            db.commit()
+            db.refresh(new_user)
+            response = UserResponse.model_validate(new_user)
+    except IntegrityError:
+        db.rollback()
+        # Only the failure path pays for finding out which field clashed
+        existing_user = db.scalar(select(User.id).where(User.username == user_data.username))
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
+            detail="Username already registered" if existing_user else "Email already registered"
         )
     
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
-    new_user = User(
-        username=user_data.username,
-        email=user_data.email,
-        hashed_password=hashed_password
-    )
-    
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    
-    return new_user
+    return response
 
 
 @router.post("/login", response_model=Token)
 def login_user(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
     """
     Login user and return access token
     """
+    # Throttle before any password hashing so abusive clients cannot burn CPU
+    ip = client_ip(request.client.host if request.client else None, request.headers.get("x-forwarded-for"))
+    retry_after = login_rate_limiter.check(ip, form_data.username)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, please try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
     user = authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
@@ -68,6 +85,7 @@ def login_user(
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    login_rate_limiter.record_success(ip, form_data.username)
     
     access_token = create_access_token(data={"sub": user.username})
     return {"access_token": access_token, "token_type": "bearer"}
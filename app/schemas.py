@@ -48,6 +48,9 @@ class ArticleResponse(ArticleBase):
 class ArticleListResponse(BaseModel):
     id: int
     title: str
+    excerpt: Optional[str] = None
+    word_count: Optional[int] = None
+    content_hash: Optional[str] = None
     author_id: int
     created_at: datetime
     updated_at: Optional[datetime] = None
@@ -62,6 +65,41 @@ class ArticlesPaginatedResponse(BaseModel):
     page: int
     page_size: int
     total_pages: int
+    next_after_id: Optional[int] = None
+
+
+class RelatedArticleResponse(BaseModel):
+    id: int
+    title: str
+    excerpt: Optional[str] = None
+    author_id: int
+    score: float
+
+
+class ArticleChangeResponse(ArticleBase):
+    id: int
+    author_id: int
+    content_hash: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    changed_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ArticleDeletionResponse(BaseModel):
+    article_id: int
+    author_id: int
+    deleted_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ArticleChangesResponse(BaseModel):
+    changed: List[ArticleChangeResponse]
+    deleted: List[ArticleDeletionResponse]
+    next_since: str
+    has_more: bool
 
 
 class RecentlyViewedArticleResponse(BaseModel):
@@ -0,0 +1,323 @@
+"""
+Production server launcher
+
+    python -m app.serve --workers 4 --port 8000
+
+The app is imported once in this (master) process and SERVE_WORKERS worker
+processes are forked from it, each running uvicorn with uvloop and httptools
+on the one shared listening socket. Workers inherit the imported code instead
+of importing it again, so they start quickly and share those memory pages.
+The schema check runs once in the master before forking. Anything holding
+connections or threads is per worker: the SQLAlchemy engines are disposed
+right after fork, and the rest of the app lifespan (co-view snapshot, health
+monitor, purger) runs in each worker.
+
+Signals to the master:
+    SIGTERM, SIGINT - graceful shutdown; workers stop accepting and finish
+                      in-flight requests for up to SERVE_GRACEFUL_TIMEOUT_SECONDS
+    SIGHUP          - rolling restart; replacement workers are forked before
+                      the old ones are stopped
+    SIGTTIN/SIGTTOU - one worker more / one worker fewer
+
+Workers that exit unexpectedly, or after serving SERVE_MAX_REQUESTS, are
+replaced. Code is preloaded, so SIGHUP does not pick up new code; restart
+the master to deploy.
+
+In-process state (metrics, recently viewed, co-view index, admission limits
+and threadpool) is per worker.
+"""
+import argparse
+import gc
+import logging
+import os
+import random
+import signal
+import socket
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SERVE_HOST = os.getenv("SERVE_HOST", "0.0.0.0")
+SERVE_PORT = int(os.getenv("SERVE_PORT", "8000"))
+# 0 means one worker per available CPU
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", "0"))
+# Kernel accept queue, shared by all workers; capped by net.core.somaxconn
+SERVE_BACKLOG = int(os.getenv("SERVE_BACKLOG", "2048"))
+# Longer than the load balancer's idle timeout (60s on most), so the balancer
+# closes idle connections first and never reuses one the server is closing
+SERVE_KEEPALIVE_SECONDS = int(os.getenv("SERVE_KEEPALIVE_SECONDS", "75"))
+SERVE_GRACEFUL_TIMEOUT_SECONDS = int(os.getenv("SERVE_GRACEFUL_TIMEOUT_SECONDS", "30"))
+# Recycle a worker after about this many requests; 0 disables
+SERVE_MAX_REQUESTS = int(os.getenv("SERVE_MAX_REQUESTS", "0"))
+SERVE_ACCESS_LOG = os.getenv("SERVE_ACCESS_LOG", "true").lower() == "true"
+
+# Exit status of a worker whose app failed to start; retrying would not help
+WORKER_BOOT_ERROR = 3
+
+
+def worker_count(configured: int = SERVE_WORKERS) -> int:
+    """
+    Number of workers to run: the configured number, or one per CPU this
+    process may run on (which respects container CPU sets)
+    """
+    if configured > 0:
+        return configured
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+def event_loop_and_http() -> tuple:
+    """
+    uvloop and httptools when installed, otherwise the pure Python defaults
+    """
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        logger.warning("uvloop is not installed; using the asyncio event loop")
+        loop = "asyncio"
+    try:
+        import httptools  # noqa: F401
+        http = "httptools"
+    except ImportError:
+        logger.warning("httptools is not installed; using the h11 HTTP parser")
+        http = "h11"
+    return loop, http
+
+
+def listen_socket(host: str, port: int, backlog: int) -> socket.socket:
+    """
+    Bound, listening socket inherited by every worker
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def dispose_engines() -> None:
+    """
+    Abandon database connections inherited from the master. A pooled
+    connection used from two processes corrupts both sides' protocol state.
+    """
+    from app.database import dispose_engine
+    from app.replicas import replica_router
+
+    dispose_engine(close=False)
+    for replica in replica_router.replicas:
+        replica.engine.dispose(close=False)
+
+
+def run_worker(app, sock: socket.socket, options: dict) -> int:
+    """
+    Serve `app` on the inherited socket until told to stop; the exit status
+    """
+    import uvicorn
+
+    dispose_engines()
+    max_requests = options.get("max_requests") or None
+    if max_requests:
+        # Jittered, so workers started together are not all recycled together
+        max_requests += random.Random(os.getpid()).randint(0, max(1, max_requests // 10))
+    config = uvicorn.Config(
+        app,
+        loop=options["loop"],
+        http=options["http"],
+        lifespan="on",
+        backlog=options["backlog"],
+        timeout_keep_alive=options["keepalive"],
+        timeout_graceful_shutdown=options["graceful_timeout"],
+        limit_max_requests=max_requests,
+        access_log=options["access_log"],
+    )
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+    return 0 if server.started else WORKER_BOOT_ERROR
+
+
+class Arbiter:
+    """
+    Keeps `workers` forked worker processes running until stopped
+    """
+
+    def __init__(self, target: Callable[[], int], workers: int, graceful_timeout: float = SERVE_GRACEFUL_TIMEOUT_SECONDS):
+        self.target = target
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        # Workers counted towards `workers`, and workers being stopped
+        self.children: Dict[int, float] = {}
+        self.retiring: Dict[int, float] = {}
+        self._signals: List[int] = []
+        self._stopping = False
+        self.exit_status = 0
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU):
+                    signal.signal(sig, signal.SIG_DFL)
+                status = self.target()
+            except BaseException:
+                logger.exception("Worker failed")
+            finally:
+                # Never return into the master's code in the child
+                os._exit(status)
+        self.children[pid] = time.monotonic()
+        logger.info(f"Started worker {pid}")
+        return pid
+
+    def signal_workers(self, pids, sig: int) -> None:
+        for pid in list(pids):
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def reap(self) -> None:
+        """
+        Collect exited workers; a worker that failed to boot stops the master
+        """
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            code = os.waitstatus_to_exitcode(status)
+            if self.retiring.pop(pid, None) is not None:
+                continue
+            if self.children.pop(pid, None) is None:
+                continue
+            if code == WORKER_BOOT_ERROR:
+                logger.error(f"Worker {pid} failed to start; shutting down")
+                self.exit_status = 1
+                self._signals.append(signal.SIGTERM)
+            elif not self._stopping:
+                logger.warning(f"Worker {pid} exited with status {code}; replacing it")
+
+    def restart(self) -> None:
+        """
+        Fork replacements first, then stop the old workers gracefully. New
+        connections wait in the shared accept queue meanwhile, so none are
+        refused.
+        """
+        old = self.children
+        self.children = {}
+        for _ in range(self.workers):
+            self.spawn()
+        self.retiring.update(old)
+        self.signal_workers(old, signal.SIGTERM)
+
+    def handle(self, sig: int) -> None:
+        if sig in (signal.SIGTERM, signal.SIGINT):
+            self._stopping = True
+        elif sig == signal.SIGHUP:
+            logger.info("Restarting workers")
+            self.restart()
+        elif sig == signal.SIGTTIN:
+            self.workers += 1
+        elif sig == signal.SIGTTOU and self.workers > 1:
+            self.workers -= 1
+            # With no live worker (all crashed, not yet respawned) the lower
+            # target alone means one fewer is started
+            if self.children:
+                pid = min(self.children, key=self.children.get)
+                self.retiring[pid] = self.children.pop(pid)
+                self.signal_workers([pid], signal.SIGTERM)
+
+    def stop(self) -> None:
+        """
+        Stop every worker, killing any still running after the graceful timeout
+        """
+        pids = {**self.children, **self.retiring}
+        self.retiring.update(self.children)
+        self.children = {}
+        self.signal_workers(pids, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self.retiring and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        if self.retiring:
+            logger.warning(f"Killing workers that did not stop in time: {sorted(self.retiring)}")
+            self.signal_workers(self.retiring, signal.SIGKILL)
+            while self.retiring:
+                self.reap()
+                time.sleep(0.1)
+
+    def run(self) -> int:
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU):
+            signal.signal(sig, lambda signum, frame: self._signals.append(signum))
+        while not self._stopping:
+            self.reap()
+            while self._signals and not self._stopping:
+                self.handle(self._signals.pop(0))
+            if self._stopping:
+                break
+            while len(self.children) < self.workers:
+                self.spawn()
+            time.sleep(0.2)
+        logger.info("Shutting down")
+        self.stop()
+        return self.exit_status
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the API with prefork uvicorn workers")
+    parser.add_argument("--host", default=SERVE_HOST)
+    parser.add_argument("--port", type=int, default=SERVE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS, help="0 for one per CPU")
+    parser.add_argument("--backlog", type=int, default=SERVE_BACKLOG)
+    parser.add_argument("--keepalive", type=int, default=SERVE_KEEPALIVE_SECONDS)
+    parser.add_argument("--graceful-timeout", type=int, default=SERVE_GRACEFUL_TIMEOUT_SECONDS)
+    parser.add_argument("--max-requests", type=int, default=SERVE_MAX_REQUESTS)
+    args = parser.parse_args(argv)
+
+    loop, http = event_loop_and_http()
+    options = {
+        "loop": loop,
+        "http": http,
+        "backlog": args.backlog,
+        "keepalive": args.keepalive,
+        "graceful_timeout": args.graceful_timeout,
+        "max_requests": args.max_requests,
+        "access_log": SERVE_ACCESS_LOG,
+    }
+
+    # Preload: import the app once, before forking
+    from app.database import dispose_engine, get_engine
+    from app.main import app, check_schema
+    from app.startup import StartupTimer
+
+    # Once here rather than in every worker: concurrent create_all calls
+    # race, and a bad schema should stop the launcher before it forks
+    try:
+        check_schema(get_engine(), StartupTimer())
+    except Exception as e:
+        logger.error(f"Schema check failed: {str(e)}")
+        return 1
+    app.state.schema_checked = True
+    dispose_engine()
+
+    # Keep the garbage collector from touching (and so copying) the
+    # preloaded objects in every worker
+    gc.freeze()
+
+    sock = listen_socket(args.host, args.port, args.backlog)
+    workers = worker_count(args.workers)
+    logger.info(f"Listening on {args.host}:{args.port} with {workers} workers ({loop}, {http})")
+    arbiter = Arbiter(lambda: run_worker(app, sock, options), workers, args.graceful_timeout)
+    return arbiter.run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# How the schema is checked when a worker starts:
+#   create_all - run Base.metadata.create_all (reflects every table)
+#   alembic    - compare the database's Alembic revision with the script head
+#   none       - skip the check entirely
+STARTUP_SCHEMA_CHECK = os.getenv("STARTUP_SCHEMA_CHECK", "create_all")
+
+# The schema create_all produced before migrations existed. Such a database
+# has no alembic_version; `alembic upgrade head` stamps it at this revision
+# (see alembic/env.py) and migrates from there.
+BASELINE_REVISION = "3f1c2a9d8b7e"
+BASELINE_ARTICLE_COLUMNS = {"id", "title", "content", "author_id", "created_at", "updated_at"}
+
+ALEMBIC_SCRIPT_LOCATION = os.path.join(os.path.dirname(os.path.dirname(__file__)), "alembic")
+
+
+class StartupTimer:
+    """
+    Records how long each startup phase takes
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+
+    def summary(self) -> str:
+        total = sum(self.phases.values())
+        parts = ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in self.phases.items())
+        return f"total={total * 1000:.1f}ms ({parts})"
+
+
+def get_alembic_head() -> Optional[str]:
+    """
+    Return the head revision of the migration scripts shipped with the app
+    """
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory(ALEMBIC_SCRIPT_LOCATION).get_current_head()
+
+
+def verify_schema_revision(engine: Engine, expected: Optional[str] = None) -> str:
+    """
+    Check that the database is migrated to the expected Alembic revision.
+
+    This is a single query against alembic_version, which also proves the
+    database is reachable, so it replaces both the connection check and
+    create_all on startup.
+    """
+    if expected is None:
+        expected = get_alembic_head()
+
+    try:
+        with engine.connect() as conn:
+            current = conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except Exception as e:
+        raise RuntimeError(f"Could not read Alembic revision, run 'alembic upgrade head': {str(e)}")
+
+    if current != expected:
+        raise RuntimeError(
+            f"Database schema is at revision {current}, expected {expected}; run 'alembic upgrade head'"
+        )
+    logger.info(f"Database schema at expected revision {current}")
+    return current
+
+
+def is_unversioned_baseline(conn: Connection) -> bool:
+    """
+    Whether the database holds the pre-migration create_all schema and no
+    alembic_version
+    """
+    inspector = inspect(conn)
+    tables = set(inspector.get_table_names())
+    if "alembic_version" in tables or not {"users", "articles", "article_views"} <= tables:
+        return False
+    return {column["name"] for column in inspector.get_columns("articles")} == BASELINE_ARTICLE_COLUMNS
+
+
+def verify_not_stale(engine: Engine) -> None:
+    """
+    For create_all startups: create_all adds missing tables but never
+    columns, so refuse to serve a database that migrations have not brought
+    up to the current schema
+    """
+    with engine.connect() as conn:
+        if is_unversioned_baseline(conn):
+            raise RuntimeError("Database predates the migrations; run 'alembic upgrade head'")
+        if not inspect(conn).has_table("alembic_version"):
+            return
+        current = conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    expected = get_alembic_head()
+    if current != expected:
+        raise RuntimeError(
+            f"Database schema is at revision {current}, expected {expected}; run 'alembic upgrade head'"
+        )
@@ -0,0 +1,285 @@
+"""
+Time-bucketed storage for article views
+
+MySQL keeps article_views RANGE-partitioned by month (pYYYYMM partitions plus
+a p_future catch-all); SQLite uses one article_views_YYYYMM table per month.
+Retention drops whole expired buckets instead of deleting rows, and window
+queries only read the buckets that overlap the window.
+
+Usage:
+    python -m app.view_storage ensure --months-ahead 3
+    python -m app.view_storage prune --retention-months 13
+"""
+import argparse
+import logging
+import os
+import sys
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, Table, delete, func, insert, select, text
+from sqlalchemy.engine import Connection
+
+from app.models import ArticleView
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+VIEW_RETENTION_MONTHS = int(os.getenv("VIEW_RETENTION_MONTHS", "13"))
+VIEW_PARTITIONS_AHEAD = int(os.getenv("VIEW_PARTITIONS_AHEAD", "2"))
+
+SQLITE_TABLE_PREFIX = "article_views_"
+FUTURE_PARTITION = "p_future"
+
+_sqlite_tables: Dict[str, Table] = {}
+
+
+def month_start(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _is_mysql(conn: Connection) -> bool:
+    return conn.dialect.name in ("mysql", "mariadb")
+
+
+def _to_days(day: date) -> int:
+    # MySQL TO_DAYS counts from year 0, Python ordinals from year 1
+    return day.toordinal() + 365
+
+
+def _from_days(days: int) -> date:
+    return date.fromordinal(days - 365)
+
+
+def sqlite_table(month: date) -> Table:
+    """
+    Table object for a SQLite monthly bucket, with the same columns as article_views
+    """
+    name = f"{SQLITE_TABLE_PREFIX}{month:%Y%m}"
+    table = _sqlite_tables.get(name)
+    if table is None:
+        table = Table(
+            name, MetaData(),
+            Column("id", Integer, primary_key=True),
+            Column("user_id", Integer, nullable=False),
+            Column("article_id", Integer, nullable=False),
+            Column("viewed_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+            Index(f"ix_{name}_article_id_viewed_at", "article_id", "viewed_at"),
+            Index(f"ix_{name}_user_id_viewed_at", "user_id", "viewed_at"),
+        )
+        _sqlite_tables[name] = table
+    return table
+
+
+def list_buckets(conn: Connection) -> List[Tuple[str, Optional[date]]]:
+    """
+    Existing buckets as (name, exclusive upper bound); None means unbounded
+    """
+    if _is_mysql(conn):
+        rows = conn.execute(text(
+            "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'article_views' "
+            "AND PARTITION_NAME IS NOT NULL ORDER BY PARTITION_ORDINAL_POSITION"
+        )).all()
+        return [
+            (name, None if description == "MAXVALUE" else _from_days(int(description)))
+            for name, description in rows
+        ]
+
+    rows = conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE :pattern ORDER BY name"
+    ), {"pattern": f"{SQLITE_TABLE_PREFIX}______"}).scalars().all()
+    buckets = []
+    for name in rows:
+        suffix = name[len(SQLITE_TABLE_PREFIX):]
+        if suffix.isdigit():
+            month = date(int(suffix[:4]), int(suffix[4:]), 1)
+            buckets.append((name, add_months(month, 1)))
+    return buckets
+
+
+def ensure_buckets(conn: Connection, months_ahead: int = VIEW_PARTITIONS_AHEAD,
+                   now: Optional[datetime] = None) -> List[str]:
+    """
+    Create buckets from the current month through `months_ahead` months ahead
+    """
+    current = month_start(now or datetime.utcnow())
+    months = [add_months(current, offset) for offset in range(months_ahead + 1)]
+    created = []
+
+    if _is_mysql(conn):
+        buckets = list_buckets(conn)
+        if not buckets:
+            logger.warning("article_views is not partitioned; run the Alembic migrations first")
+            return created
+        highest = max((bound for _, bound in buckets if bound is not None), default=None)
+        new = [month for month in months if highest is None or add_months(month, 1) > highest]
+        if new:
+            definitions = ", ".join(
+                f"PARTITION p{month:%Y%m} VALUES LESS THAN ({_to_days(add_months(month, 1))})" for month in new
+            )
+            conn.execute(text(
+                f"ALTER TABLE article_views REORGANIZE PARTITION {FUTURE_PARTITION} INTO "
+                f"({definitions}, PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE)"
+            ))
+            created = [f"p{month:%Y%m}" for month in new]
+    else:
+        existing = {name for name, _ in list_buckets(conn)}
+        for month in months:
+            table = sqlite_table(month)
+            if table.name not in existing:
+                table.create(conn, checkfirst=True)
+                created.append(table.name)
+
+    if created:
+        logger.info(f"Created view buckets: {', '.join(created)}")
+    return created
+
+
+def insert_views(conn: Connection, rows: List[dict]) -> None:
+    """
+    Bulk insert views; rows need user_id, article_id and viewed_at
+    """
+    if not rows:
+        return
+    if _is_mysql(conn):
+        conn.execute(insert(ArticleView.__table__), rows)
+        return
+
+    by_month: Dict[date, List[dict]] = {}
+    for row in rows:
+        by_month.setdefault(month_start(row["viewed_at"]), []).append(row)
+    for month, month_rows in by_month.items():
+        table = sqlite_table(month)
+        table.create(conn, checkfirst=True)
+        conn.execute(insert(table), month_rows)
+
+
+def record_view(conn: Connection, user_id: int, article_id: int, viewed_at: Optional[datetime] = None) -> None:
+    insert_views(conn, [{
+        "user_id": user_id,
+        "article_id": article_id,
+        "viewed_at": viewed_at or datetime.utcnow(),
+    }])
+
+
+def _buckets_in_window(conn: Connection, start: datetime, end: datetime) -> List[str]:
+    first = month_start(start)
+    last = month_start(end)
+    names = []
+    for name, bound in list_buckets(conn):
+        if bound is not None and bound <= first:
+            continue
+        if name == FUTURE_PARTITION or name.startswith("p_"):
+            names.append(name)
+            continue
+        month = date(int(name[-6:-2]), int(name[-2:]), 1)
+        if first <= month <= last:
+            names.append(name)
+    return names
+
+
+def views_in_window(conn: Connection, start: datetime, end: datetime,
+                    article_id: Optional[int] = None, user_id: Optional[int] = None,
+                    limit: Optional[int] = None) -> List[tuple]:
+    """
+    (user_id, article_id, viewed_at) rows with start <= viewed_at < end,
+    oldest first, reading only the buckets that overlap the window
+    """
+    buckets = _buckets_in_window(conn, start, end)
+    if not buckets:
+        return []
+
+    def query(table):
+        stmt = select(table.c.user_id, table.c.article_id, table.c.viewed_at).where(
+            table.c.viewed_at >= start, table.c.viewed_at < end
+        )
+        if article_id is not None:
+            stmt = stmt.where(table.c.article_id == article_id)
+        if user_id is not None:
+            stmt = stmt.where(table.c.user_id == user_id)
+        return stmt
+
+    if _is_mysql(conn):
+        table = ArticleView.__table__
+        stmt = query(table).with_hint(table, f"PARTITION ({', '.join(buckets)})", "mysql")
+    else:
+        months = [date(int(name[-6:-2]), int(name[-2:]), 1) for name in buckets]
+        parts = [query(sqlite_table(month)) for month in months]
+        stmt = parts[0] if len(parts) == 1 else parts[0].union_all(*parts[1:])
+        stmt = select(stmt.subquery())
+    stmt = stmt.order_by(text("viewed_at"))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return conn.execute(stmt).all()
+
+
+def delete_article_views(conn: Connection, article_id: int, limit: int) -> int:
+    """
+    Delete up to `limit` views of an article; returns how many were deleted.
+    Callers repeat until fewer than `limit` come back, keeping each
+    transaction (and the locks it holds) small.
+    """
+    if _is_mysql(conn):
+        table = ArticleView.__table__
+        result = conn.execute(
+            delete(table).where(table.c.article_id == article_id).with_dialect_options(mysql_limit=limit)
+        )
+        return result.rowcount
+
+    deleted = 0
+    for name, _ in list_buckets(conn):
+        table = sqlite_table(date(int(name[-6:-2]), int(name[-2:]), 1))
+        batch = select(table.c.id).where(table.c.article_id == article_id).limit(limit - deleted)
+        deleted += conn.execute(delete(table).where(table.c.id.in_(batch))).rowcount
+        if deleted >= limit:
+            break
+    return deleted
+
+
+def prune_expired(conn: Connection, retention_months: int = VIEW_RETENTION_MONTHS,
+                  now: Optional[datetime] = None) -> List[str]:
+    """
+    Drop every bucket whose rows are all older than the retention window
+    """
+    cutoff = add_months(month_start(now or datetime.utcnow()), -retention_months)
+    expired = [name for name, bound in list_buckets(conn) if bound is not None and bound <= cutoff]
+    if not expired:
+        return []
+
+    if _is_mysql(conn):
+        conn.execute(text(f"ALTER TABLE article_views DROP PARTITION {', '.join(expired)}"))
+    else:
+        for name in expired:
+            conn.execute(text(f'DROP TABLE "{name}"'))
+            _sqlite_tables.pop(name, None)
+    logger.info(f"Dropped expired view buckets: {', '.join(expired)}")
+    return expired
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Maintain time-bucketed article view storage")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    ensure_parser = subparsers.add_parser("ensure", help="Create upcoming monthly buckets")
+    ensure_parser.add_argument("--months-ahead", type=int, default=VIEW_PARTITIONS_AHEAD)
+    prune_parser = subparsers.add_parser("prune", help="Drop buckets older than the retention window")
+    prune_parser.add_argument("--retention-months", type=int, default=VIEW_RETENTION_MONTHS)
+    args = parser.parse_args(argv)
+
+    from app.database import get_engine
+
+    with get_engine().begin() as conn:
+        if args.command == "ensure":
+            ensure_buckets(conn, args.months_ahead)
+        else:
+            prune_expired(conn, args.retention_months)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
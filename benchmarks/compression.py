@@ -0,0 +1,113 @@
+"""
+Article content compression benchmark
+
+Compresses a sample of article bodies with each available codec and level
+and reports the bytes saved and the CPU time spent compressing and
+decompressing. Bodies come from an existing database (--database-url) or
+are generated with the same text model as benchmarks.generate_dataset.
+
+Usage:
+    python -m benchmarks.compression --articles 5000
+    python -m benchmarks.compression --database-url sqlite:///capacity.db --articles 20000
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from typing import List, Tuple
+
+from sqlalchemy import create_engine, select
+
+from app.compression import compress_text, decompress_text, zstandard
+from benchmarks.generate_dataset import TextCorpus
+
+CODECS = [("zlib", 1), ("zlib", 6), ("zlib", 9), ("zstd", 1), ("zstd", 3), ("zstd", 9)]
+
+
+def generated_articles(count: int, median_words: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    corpus = TextCorpus(rng)
+    mu = math.log(median_words)
+    return [corpus.slice(rng, max(20, min(20_000, int(rng.lognormvariate(mu, 0.9))))) for _ in range(count)]
+
+
+def database_articles(database_url: str, count: int) -> List[str]:
+    from app.models import Article
+
+    engine = create_engine(database_url)
+    with engine.connect() as conn:
+        return list(conn.execute(select(Article.content).order_by(Article.id).limit(count)).scalars())
+
+
+def measure(articles: List[str], algorithm: str, level: int) -> dict:
+    raw_bytes = sum(len(text.encode("utf-8")) for text in articles)
+
+    started = time.process_time()
+    stored = [compress_text(text, algorithm, min_bytes=0, level=level) for text in articles]
+    compress_seconds = time.process_time() - started
+
+    started = time.process_time()
+    for data in stored:
+        decompress_text(data)
+    decompress_seconds = time.process_time() - started
+
+    stored_bytes = sum(len(data) for data in stored)
+    raw_mb = raw_bytes / 1_000_000
+    return {
+        "codec": f"{algorithm}-{level}",
+        "raw_bytes": raw_bytes,
+        "stored_bytes": stored_bytes,
+        "saved_pct": 100.0 * (raw_bytes - stored_bytes) / raw_bytes if raw_bytes else 0.0,
+        "compress_us_per_article": compress_seconds / len(articles) * 1e6,
+        "decompress_us_per_article": decompress_seconds / len(articles) * 1e6,
+        "compress_mb_s": raw_mb / compress_seconds if compress_seconds else 0.0,
+        "decompress_mb_s": raw_mb / decompress_seconds if decompress_seconds else 0.0,
+    }
+
+
+def available_codecs() -> List[Tuple[str, int]]:
+    return [(algorithm, level) for algorithm, level in CODECS if algorithm != "zstd" or zstandard is not None]
+
+
+def print_report(results: List[dict]) -> None:
+    print(f"{'codec':<8} {'raw MB':>9} {'stored MB':>10} {'saved':>7} {'comp us':>9} {'decomp us':>10} "
+          f"{'comp MB/s':>10} {'decomp MB/s':>12}")
+    for r in results:
+        print(
+            f"{r['codec']:<8} {r['raw_bytes'] / 1e6:>9.2f} {r['stored_bytes'] / 1e6:>10.2f} {r['saved_pct']:>6.1f}% "
+            f"{r['compress_us_per_article']:>9.1f} {r['decompress_us_per_article']:>10.1f} "
+            f"{r['compress_mb_s']:>10.1f} {r['decompress_mb_s']:>12.1f}"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure article content compression ratio and CPU cost")
+    parser.add_argument("--database-url", help="Sample article bodies from this database instead of generating them")
+    parser.add_argument("--articles", type=int, default=5000)
+    parser.add_argument("--median-words", type=int, default=120)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    if args.database_url:
+        articles = database_articles(args.database_url, args.articles)
+    else:
+        articles = generated_articles(args.articles, args.median_words, args.seed)
+    if not articles:
+        parser.error("no articles to compress")
+
+    results = [measure(articles, algorithm, level) for algorithm, level in available_codecs()]
+    print_report(results)
+    if zstandard is None:
+        print("zstd skipped: install the zstandard package to include it")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+Synthetic large-dataset generator for capacity testing
+
+Fills a database with users, articles with a skewed size distribution and
+article views with Zipf-distributed popularity, using bulk Core inserts
+against the app.models schema. The same seed always produces the same rows;
+timestamps are spread over a window ending at the current time. Every generated user can log in with the password "password".
+
+Usage:
+    python -m benchmarks.generate_dataset --database-url sqlite:///capacity.db \
+        --users 200000 --articles 1000000 --views 10000000 --seed 1
+"""
+import argparse
+import logging
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Callable, Iterator, List, Optional
+
+from sqlalchemy import create_engine, event, func, insert, select
+from sqlalchemy.engine import Connection, Engine
+
+from app.article_metadata import content_metadata
+from app.models import Base, User, Article, ArticleView
+from app.view_storage import insert_views
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+WORDS = (
+    "the of and to in is that for it as was with be by on not he this are or his from at which "
+    "but have an they you were her she there been one all we their has would when if so no will "
+    "system data article report market policy research growth model network value service design "
+    "process customer support analysis quality project content review change issue result public "
+    "account business credit income finance document record statement payment balance "
+    "history period reading writing editor summary detail example series section update"
+).split()
+
+
+class ZipfSampler:
+    """
+    Draws ranks 0..n-1 with probability proportional to 1 / (rank + 1) ** s
+    """
+
+    def __init__(self, n: int, s: float, rng: random.Random):
+        self.rng = rng
+        self.population = range(n)
+        self.cum_weights = list(accumulate(1.0 / (rank + 1) ** s for rank in range(n)))
+
+    def sample(self, k: int) -> List[int]:
+        return self.rng.choices(self.population, cum_weights=self.cum_weights, k=k)
+
+
+class TextCorpus:
+    """
+    A large block of generated words that article bodies are sliced from
+    """
+
+    def __init__(self, rng: random.Random, words: int = 500_000):
+        tokens = rng.choices(WORDS, k=words)
+        self.offsets = list(accumulate((len(token) + 1 for token in tokens), initial=0))
+        self.text = " ".join(tokens) + " "
+        self.words = words
+
+    def slice(self, rng: random.Random, word_count: int) -> str:
+        word_count = min(word_count, self.words)
+        start = rng.randrange(0, self.words - word_count + 1)
+        return self.text[self.offsets[start]:self.offsets[start + word_count] - 1]
+
+
+def tune_for_bulk_load(engine: Engine) -> None:
+    """
+    Trade durability for load speed on SQLite; the data is disposable
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=OFF")
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA cache_size=-262144")
+        cursor.close()
+
+
+def insert_batches(engine: Engine, table, total: int, batch_size: int,
+                   make_rows: Callable[[int, int], Iterator[dict]],
+                   write: Optional[Callable[[Connection, List[dict]], None]] = None) -> None:
+    """
+    Insert `total` rows in batches of `batch_size`, one transaction per batch;
+    `write` replaces the plain INSERT into `table` when given
+    """
+    started = time.perf_counter()
+    done = 0
+    while done < total:
+        count = min(batch_size, total - done)
+        with engine.begin() as conn:
+            rows = list(make_rows(done, count))
+            if write is None:
+                conn.execute(insert(table), rows)
+            else:
+                write(conn, rows)
+        done += count
+        elapsed = time.perf_counter() - started
+        logger.info(f"{table.name}: {done}/{total} rows ({done / elapsed:.0f} rows/s)")
+
+
+def generate(engine: Engine, users: int, articles: int, views: int, seed: int,
+             batch_size: int = 10_000, zipf_s: float = 1.1, median_words: int = 120,
+             days: int = 365) -> None:
+    rng = random.Random(seed)
+    Base.metadata.create_all(bind=engine)
+
+    with engine.connect() as conn:
+        first_user_id = (conn.execute(select(func.max(User.id))).scalar() or 0) + 1
+        first_article_id = (conn.execute(select(func.max(Article.id))).scalar() or 0) + 1
+
+    end = datetime.utcnow().replace(microsecond=0)
+    start = end - timedelta(days=days)
+    span = (end - start).total_seconds()
+
+    def article_created_at(index: int) -> datetime:
+        # Articles are created in id order across the window
+        return start + timedelta(seconds=span * index / max(articles, 1))
+
+    # One hash for everyone: bcrypt per user would dominate the run time
+    from app.auth import get_password_hash
+    hashed_password = get_password_hash("password")
+
+    def user_rows(offset: int, count: int) -> Iterator[dict]:
+        for i in range(offset, offset + count):
+            user_id = first_user_id + i
+            yield {
+                "id": user_id,
+                "username": f"user_{user_id}",
+                "email": f"user_{user_id}@example.com",
+                "hashed_password": hashed_password,
+                "is_active": True,
+                "created_at": start + timedelta(seconds=rng.random() * span),
+            }
+
+    insert_batches(engine, User.__table__, users, batch_size, user_rows)
+
+    corpus = TextCorpus(rng)
+    # A few prolific authors write most of the articles
+    author_sampler = ZipfSampler(users, 1.0, rng)
+    mu = math.log(median_words)
+
+    def article_rows(offset: int, count: int) -> Iterator[dict]:
+        authors = author_sampler.sample(count)
+        for n, i in enumerate(range(offset, offset + count)):
+            created_at = article_created_at(i)
+            word_count = max(20, min(20_000, int(rng.lognormvariate(mu, 0.9))))
+            updated = rng.random() < 0.2
+            content = corpus.slice(rng, word_count)
+            updated_at = (
+                created_at + timedelta(seconds=rng.random() * (end - created_at).total_seconds())
+                if updated else None
+            )
+            yield {
+                "id": first_article_id + i,
+                "title": corpus.slice(rng, rng.randint(3, 10)).capitalize()[:200],
+                "content": content,
+                **content_metadata(content),
+                "author_id": first_user_id + authors[n],
+                "created_at": created_at,
+                "updated_at": updated_at,
+                "changed_at": updated_at or created_at,
+            }
+
+    insert_batches(engine, Article.__table__, articles, batch_size, article_rows)
+
+    # Popularity rank is shuffled so the hottest articles are spread across ids
+    popularity = list(range(articles))
+    rng.shuffle(popularity)
+    article_sampler = ZipfSampler(articles, zipf_s, rng)
+
+    def view_rows(offset: int, count: int) -> Iterator[dict]:
+        for rank in article_sampler.sample(count):
+            index = popularity[rank]
+            created_at = article_created_at(index)
+            yield {
+                "user_id": first_user_id + rng.randrange(users),
+                "article_id": first_article_id + index,
+                "viewed_at": created_at + timedelta(seconds=rng.random() * (end - created_at).total_seconds()),
+            }
+
+    # Views are routed into their monthly partition or table
+    insert_batches(engine, ArticleView.__table__, views, batch_size, view_rows, write=insert_views)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a large synthetic dataset")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"),
+                        help="Target database (defaults to DATABASE_URL)")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--articles", type=int, default=1_000_000)
+    parser.add_argument("--views", type=int, default=10_000_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of article popularity")
+    parser.add_argument("--median-words", type=int, default=120, help="Median article length in words")
+    parser.add_argument("--days", type=int, default=365, help="Time window the data is spread over")
+    args = parser.parse_args(argv)
+
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+    if args.users < 1 or (args.views and args.articles < 1):
+        parser.error("at least one user is required, and one article when generating views")
+
+    engine = create_engine(args.database_url)
+    tune_for_bulk_load(engine)
+
+    started = time.perf_counter()
+    generate(engine, args.users, args.articles, args.views, args.seed,
+             batch_size=args.batch_size, zipf_s=args.zipf,
+             median_words=args.median_words, days=args.days)
+    logger.info(f"Dataset generated in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
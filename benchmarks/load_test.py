@@ -0,0 +1,321 @@
+"""
+In-process load test for the HTTP API
+
+Runs the FastAPI app against a throwaway SQLite database through an async
+httpx client and reports throughput and p50/p95/p99 latency per route.
+
+Usage:
+    python -m benchmarks.load_test --concurrency 16 --requests 2000 --output results.json
+    python -m benchmarks.load_test --output results.json --baseline baseline.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+DEFAULT_MIX = {
+    "register": 2,
+    "login": 5,
+    "list": 35,
+    "get": 30,
+    "update": 13,
+    "recently_viewed": 15,
+}
+
+PASSWORD = "benchpassword123"
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """
+    Parse a mix such as "list=50,get=50" into route weights
+    """
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown operation: {name}")
+        mix[name] = int(weight)
+    return mix
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: Dict[str, List[float]], errors: Dict[str, int], elapsed: float) -> dict:
+    """
+    Build the per-route report from raw latencies in seconds
+    """
+    routes = {}
+    for route, values in sorted(latencies.items()):
+        values.sort()
+        routes[route] = {
+            "count": len(values),
+            "errors": errors.get(route, 0),
+            "throughput_rps": len(values) / elapsed if elapsed else 0.0,
+            "mean_ms": sum(values) / len(values) * 1000,
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+        }
+    total = sum(len(v) for v in latencies.values())
+    return {
+        "elapsed_s": elapsed,
+        "total_requests": total,
+        "total_errors": sum(errors.values()),
+        "throughput_rps": total / elapsed if elapsed else 0.0,
+        "routes": routes,
+    }
+
+
+def compare_with_baseline(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    Return a description of every route that regressed beyond the tolerance
+    """
+    regressions = []
+    for route, current in results["routes"].items():
+        previous = baseline.get("routes", {}).get(route)
+        if not previous:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if previous[metric] and current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{route} {metric}: {previous[metric]:.2f} -> {current[metric]:.2f}"
+                )
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{route} throughput_rps: {previous['throughput_rps']:.1f} -> {current['throughput_rps']:.1f}"
+            )
+    return regressions
+
+
+class LoadTest:
+    """
+    Drives a weighted mix of API operations with a fixed number of workers
+    """
+
+    def __init__(self, client: httpx.AsyncClient, mix: Dict[str, int], seed: int):
+        self.client = client
+        self.operations = list(mix)
+        self.weights = [mix[name] for name in self.operations]
+        self.random = random.Random(seed)
+        self.users: List[dict] = []
+        self.article_ids: List[int] = []
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self._user_counter = 0
+
+    async def request(self, route: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.latencies[route].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[route] += 1
+        return response
+
+    def new_username(self) -> str:
+        self._user_counter += 1
+        return f"bench_user_{self._user_counter}"
+
+    async def register(self) -> dict:
+        username = self.new_username()
+        await self.request("POST /auth/register", "POST", "/auth/register", json={
+            "username": username,
+            "email": f"{username}@example.com",
+            "password": PASSWORD,
+        })
+        return {"username": username}
+
+    async def login(self, user: dict) -> None:
+        response = await self.request("POST /auth/login", "POST", "/auth/login", data={
+            "username": user["username"],
+            "password": PASSWORD,
+        })
+        if response.status_code == 200:
+            user["headers"] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def seed(self, users: int, articles: int) -> None:
+        """
+        Create the users and articles the measured operations work on
+        """
+        for _ in range(users):
+            user = await self.register()
+            await self.login(user)
+            self.users.append(user)
+        for i in range(articles):
+            user = self.users[i % len(self.users)]
+            response = await self.client.post("/articles/", headers=user["headers"], json={
+                "title": f"Benchmark article {i}",
+                "content": "Lorem ipsum dolor sit amet. " * self.random.randint(5, 200),
+            })
+            self.article_ids.append(response.json()["id"])
+            user.setdefault("article_ids", []).append(self.article_ids[-1])
+        self.latencies.clear()
+        self.errors.clear()
+
+    async def run_operation(self, name: str) -> None:
+        user = self.random.choice(self.users)
+        headers = user["headers"]
+        if name == "register":
+            await self.register()
+        elif name == "login":
+            await self.login(user)
+        elif name == "list":
+            page = self.random.randint(1, max(1, len(self.article_ids) // 10))
+            await self.request("GET /articles/", "GET", f"/articles/?page={page}&page_size=10", headers=headers)
+        elif name == "get":
+            article_id = self.random.choice(self.article_ids)
+            await self.request("GET /articles/{article_id}", "GET", f"/articles/{article_id}", headers=headers)
+        elif name == "update":
+            if not user.get("article_ids"):
+                return
+            article_id = self.random.choice(user["article_ids"])
+            await self.request("PUT /articles/{article_id}", "PUT", f"/articles/{article_id}", headers=headers,
+                               json={"title": f"Updated {self.random.random():.6f}"})
+        elif name == "recently_viewed":
+            await self.request("GET /articles/recently-viewed/me", "GET", "/articles/recently-viewed/me",
+                               headers=headers)
+
+    async def run(self, concurrency: int, total_requests: int, duration: Optional[float]) -> float:
+        """
+        Run the mix until the request budget or the duration is exhausted
+        """
+        remaining = total_requests
+        deadline = time.perf_counter() + duration if duration else None
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0 and (deadline is None or time.perf_counter() < deadline):
+                remaining -= 1
+                name = self.random.choices(self.operations, weights=self.weights)[0]
+                await self.run_operation(name)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+
+def create_app(database_path: str, rate_limit: bool = False):
+    """
+    Import the app and point it at a fresh SQLite database
+    """
+    from app.main import app
+    from app.database import Base, get_db
+    from app.rate_limit import login_rate_limiter
+
+    # The mix logs the same few users in repeatedly, which the login
+    # throttle would otherwise reject
+    login_rate_limiter.enabled = rate_limit
+
+    engine = create_engine(
+        f"sqlite:///{database_path}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    Base.metadata.create_all(bind=engine)
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return app
+
+
+async def run_benchmark(args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(os.path.join(tmp, "bench.db"), args.rate_limit)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            load_test = LoadTest(client, args.mix, args.seed)
+            await load_test.seed(args.users, args.articles)
+            elapsed = await load_test.run(args.concurrency, args.requests, args.duration)
+        app.dependency_overrides.clear()
+
+    results = summarize(load_test.latencies, load_test.errors, elapsed)
+    results["config"] = {
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "duration": args.duration,
+        "users": args.users,
+        "articles": args.articles,
+        "mix": args.mix,
+        "seed": args.seed,
+        "rate_limit": args.rate_limit,
+    }
+    return results
+
+
+def print_report(results: dict) -> None:
+    print(f"{'route':<36} {'count':>7} {'err':>5} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for route, stats in results["routes"].items():
+        print(
+            f"{route:<36} {stats['count']:>7} {stats['errors']:>5} {stats['throughput_rps']:>9.1f} "
+            f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}"
+        )
+    print(
+        f"total: {results['total_requests']} requests, {results['total_errors']} errors, "
+        f"{results['throughput_rps']:.1f} req/s over {results['elapsed_s']:.1f}s"
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the API in-process against SQLite")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=1000, help="Total measured requests")
+    parser.add_argument("--duration", type=float, help="Stop after this many seconds")
+    parser.add_argument("--users", type=int, default=10, help="Users created before measuring")
+    parser.add_argument("--articles", type=int, default=200, help="Articles created before measuring")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="Operation weights, e.g. list=40,get=40,update=20")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--rate-limit", action="store_true", help="Keep login throttling enabled")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against a previous results file")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative regression before failing (default 0.2)")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    results = asyncio.run(run_benchmark(args))
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("Regressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
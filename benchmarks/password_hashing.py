@@ -0,0 +1,64 @@
+"""
+bcrypt verify latency per cost
+
+Verifies a password against hashes of each cost and reports the latency
+percentiles and the logins per second one core can check, to show what a
+BCRYPT_ROUNDS setting means for login latency and CPU on this machine.
+
+Usage:
+    python -m benchmarks.password_hashing --min-rounds 10 --max-rounds 14 --iterations 20
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from typing import List
+
+from passlib.hash import bcrypt
+
+PASSWORD = "benchmark-password-123"
+
+
+def measure(rounds: int, iterations: int) -> dict:
+    stored = bcrypt.using(rounds=rounds).hash(PASSWORD)
+    timings: List[float] = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        bcrypt.verify(PASSWORD, stored)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    median = statistics.median(timings)
+    return {
+        "rounds": rounds,
+        "p50_ms": median * 1000,
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000,
+        "verifies_per_core_s": 1 / median,
+    }
+
+
+def print_report(results: List[dict]) -> None:
+    print(f"{'cost':>4} {'p50 ms':>9} {'p95 ms':>9} {'logins/s/core':>14}")
+    for r in results:
+        print(f"{r['rounds']:>4} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['verifies_per_core_s']:>14.1f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure bcrypt verify latency per cost")
+    parser.add_argument("--min-rounds", type=int, default=10)
+    parser.add_argument("--max-rounds", type=int, default=14)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    results = [measure(rounds, args.iterations) for rounds in range(args.min_rounds, args.max_rounds + 1)]
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Per-request ORM overhead of the hot-path queries
+
+Runs each hot-path lookup many times against a small in-memory SQLite
+database, once built per call the way the routes used to (legacy
+db.query() chains and per-request select()) and once through the prebuilt
+statements in app.queries. The SQL executed is the same, so the difference
+is the Python-side statement construction and cache key work.
+
+Usage:
+    python -m benchmarks.query_overhead --iterations 20000
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Callable, List
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session, undefer
+
+from app import queries
+from app.database import Base
+from app.models import Article, User
+
+
+def setup_session(articles: int) -> Session:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": 1, "username": "user_1", "email": "u@example.com", "hashed_password": "x"}])
+        conn.execute(insert(Article), [
+            {"id": i, "title": f"Article {i}", "content": "body", "author_id": 1} for i in range(1, articles + 1)
+        ])
+    return Session(engine)
+
+
+def cases(db: Session) -> List[tuple]:
+    """
+    (name, per-call construction, prebuilt statement) for each hot path
+    """
+    return [
+        (
+            "user_by_username",
+            lambda: db.query(User).filter(User.username == "user_1").first(),
+            lambda: db.scalars(queries.USER_BY_USERNAME, {"username": "user_1"}).first(),
+        ),
+        (
+            "article_by_id",
+            lambda: db.query(Article).options(undefer(Article.content)).filter(Article.id == 7).first(),
+            lambda: db.scalars(queries.ARTICLE_BY_ID, {"article_id": 7}).first(),
+        ),
+        (
+            "list_page",
+            lambda: db.scalars(
+                select(Article).order_by(Article.created_at.desc(), Article.id.desc()).offset(10).limit(10)
+            ).all(),
+            lambda: db.scalars(queries.article_page("created_at", ()), {"offset": 10, "limit": 10}).all(),
+        ),
+        (
+            "count",
+            lambda: db.scalar(select(func.count()).select_from(Article)),
+            lambda: db.scalar(queries.article_count(()), {}),
+        ),
+    ]
+
+
+def time_calls(call: Callable[[], object], iterations: int) -> float:
+    for _ in range(min(100, iterations)):
+        call()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call()
+    return (time.perf_counter() - started) / iterations
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare per-call and prebuilt hot-path statements")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--articles", type=int, default=100)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    db = setup_session(args.articles)
+    results = []
+    for name, built, prebuilt in cases(db):
+        before = time_calls(built, args.iterations)
+        after = time_calls(prebuilt, args.iterations)
+        db.expunge_all()
+        results.append({
+            "query": name,
+            "per_call_us": before * 1e6,
+            "prebuilt_us": after * 1e6,
+            "saved_pct": 100.0 * (before - after) / before,
+        })
+
+    print(f"{'query':<18} {'per-call us':>12} {'prebuilt us':>12} {'saved':>7}")
+    for r in results:
+        print(f"{r['query']:<18} {r['per_call_us']:>12.1f} {r['prebuilt_us']:>12.1f} {r['saved_pct']:>6.1f}%")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Throughput of the server configurations over real HTTP
+
+Starts the app in each configuration against one temporary SQLite database
+and drives it with keep-alive clients from separate processes:
+
+    uvicorn       - single `uvicorn app.main:app` process, asyncio loop and h11
+    serve-1       - app.serve with one worker (uvloop and httptools)
+    serve-N       - app.serve with N prefork workers
+
+Each configuration is measured on a cheap route (GET /health/live, mostly
+server and framework overhead) and an authenticated article listing. The
+clients share the machine with the server, so leave cores for them: the
+results compare configurations, they are not capacity numbers.
+
+Usage:
+    python -m benchmarks.server_throughput --workers 4 --duration 10 --output throughput.json
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.load_test import percentile
+
+PASSWORD = "benchpassword123"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_command(name: str, port: int, workers: int) -> List[str]:
+    if name == "uvicorn":
+        return [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+                "--loop", "asyncio", "--http", "h11", "--no-access-log"]
+    return [sys.executable, "-m", "app.serve", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)]
+
+
+def start_server(command: List[str], env: dict, base_url: str, timeout: float = 30) -> subprocess.Popen:
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health/live").status_code == 200:
+                return process
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"Server did not start: {' '.join(command)}")
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def seed(base_url: str, articles: int) -> Dict[str, str]:
+    """
+    Create a user and some articles; the auth headers for the listing route
+    """
+    with httpx.Client(base_url=base_url) as client:
+        client.post("/auth/register", json={
+            "username": "bench_user", "email": "bench_user@example.com", "password": PASSWORD,
+        })
+        token = client.post("/auth/login", data={"username": "bench_user", "password": PASSWORD}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        for i in range(articles):
+            client.post("/articles/", headers=headers, json={
+                "title": f"Benchmark article {i}", "content": "Lorem ipsum dolor sit amet. " * 40,
+            })
+    return headers
+
+
+async def drive(url: str, headers: Dict[str, str], connections: int, duration: float) -> List[float]:
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def connection(client: httpx.AsyncClient) -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await client.get(url, headers=headers)
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        await asyncio.gather(*(connection(client) for _ in range(connections)))
+    return latencies + [-1.0] * errors
+
+
+def client_process(args) -> List[float]:
+    return asyncio.run(drive(*args))
+
+
+def measure(url: str, headers: Dict[str, str], clients: int, connections: int, duration: float) -> dict:
+    """
+    Load `url` from `clients` processes with `connections` keep-alive connections each
+    """
+    with multiprocessing.get_context("spawn").Pool(clients) as pool:
+        results = pool.map(client_process, [(url, headers, connections, duration)] * clients)
+    latencies = sorted(value for result in results for value in result if value >= 0)
+    errors = sum(1 for result in results for value in result if value < 0)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / duration,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare server throughput across launch configurations")
+    parser.add_argument("--workers", type=int, default=max(2, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--clients", type=int, default=2, help="Client processes")
+    parser.add_argument("--connections", type=int, default=32, help="Connections per client process")
+    parser.add_argument("--articles", type=int, default=50)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    configurations = [("uvicorn", 1), ("serve-1", 1), (f"serve-{args.workers}", args.workers)]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'throughput.db')}",
+            "SECRET_KEY": os.getenv("SECRET_KEY", "benchmark-secret"),
+            "STARTUP_SCHEMA_CHECK": "create_all",
+            "PURGE_ENABLED": "false",
+            "SERVE_ACCESS_LOG": "false",
+            # Measure the server, not request shedding
+            "ADMISSION_CONTROL_ENABLED": "false",
+        }
+        headers = None
+        for name, workers in configurations:
+            port = free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            process = start_server(server_command(name, port, workers), env, base_url)
+            try:
+                if headers is None:
+                    headers = seed(base_url, args.articles)
+                for route, path in (("GET /health/live", "/health/live"), ("GET /articles/", "/articles/?page_size=10")):
+                    result = measure(base_url + path, headers, args.clients, args.connections, args.duration)
+                    results.append({"server": name, "route": route, **result})
+            finally:
+                stop_server(process)
+
+    print(f"{'server':<10} {'route':<18} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for r in results:
+        print(f"{r['server']:<10} {r['route']:<18} {r['throughput_rps']:>9.0f} {r['p50_ms']:>8.1f} "
+              f"{r['p99_ms']:>8.1f} {r['errors']:>7}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
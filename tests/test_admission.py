@@ -0,0 +1,85 @@
+import asyncio
+
+import httpx
+
+from app.admission import AdmissionControlMiddleware, AdmissionGate, route_class
+
+
+def slow_app(release: asyncio.Event):
+    """ASGI app whose responses wait until `release` is set"""
+    async def app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+    return app
+
+
+class TestAdmission:
+
+    def test_route_classes(self):
+        """Test how requests are classified, and that streams and probes bypass admission"""
+        assert route_class("POST", "/auth/login") == "auth"
+        assert route_class("GET", "/articles/5") == "read"
+        assert route_class("PUT", "/articles/5") == "write"
+        assert route_class("GET", "/articles/events") is None
+        assert route_class("GET", "/health/ready") is None
+        assert route_class("GET", "/metrics") is None
+
+    def test_gate_queues_then_sheds(self):
+        """Test that requests over the limit wait in a bounded queue and the rest are shed"""
+        async def scenario():
+            gate = AdmissionGate(limit=1, queue_size=1, timeout=1.0)
+            assert await gate.acquire()
+            waiting = asyncio.create_task(gate.acquire())
+            await asyncio.sleep(0)
+            assert gate.queue_depth == 1
+            assert await gate.acquire() is False
+
+            gate.release()
+            assert await waiting is True
+            assert gate.in_flight == 1 and gate.queue_depth == 0
+            gate.release()
+            return gate
+
+        gate = asyncio.run(scenario())
+
+        assert gate.in_flight == 0
+        assert gate.shed == 1
+
+    def test_gate_sheds_after_queue_timeout(self):
+        """Test that a queued request gives up after the wait timeout"""
+        async def scenario():
+            gate = AdmissionGate(limit=1, queue_size=5, timeout=0.05)
+            await gate.acquire()
+            admitted = await gate.acquire()
+            gate.release()
+            return gate, admitted
+
+        gate, admitted = asyncio.run(scenario())
+
+        assert admitted is False
+        assert gate.in_flight == 0 and gate.queue_depth == 0
+
+    def test_middleware_returns_503_with_retry_after(self):
+        """Test that overload is answered quickly with 503 and Retry-After"""
+        async def scenario():
+            release = asyncio.Event()
+            app = AdmissionControlMiddleware(
+                slow_app(release), limits={"auth": (1, 0), "read": (1, 0), "write": (1, 0)}, retry_after=2
+            )
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                first = asyncio.create_task(client.get("/articles/1"))
+                await asyncio.sleep(0.05)
+                shed = await client.get("/articles/2")
+                # Other route classes have their own limits
+                other = asyncio.create_task(client.put("/articles/1"))
+                await asyncio.sleep(0.05)
+                release.set()
+                return shed, await first, await other
+
+        shed, first, other = asyncio.run(scenario())
+
+        assert shed.status_code == 503
+        assert shed.headers["retry-after"] == "2"
+        assert first.status_code == 200
+        assert other.status_code == 200
@@ -1,10 +1,15 @@
 import pytest
+from contextlib import contextmanager
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 from app.main import app
+from app.rate_limit import login_rate_limiter
 from app.database import get_db , Base
 from app.recently_viewed_service import recently_viewed_service
+from app.coview import coview_index
+from app import sync
 
 # Test database URL - using SQLite for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -30,14 +35,38 @@ app.dependency_overrides[get_db] = override_get_db
 client = TestClient(app)
 
 
+@contextmanager
+def count_statements(with_parameters=False):
+    """Collect the SQL statements (or (statement, parameters) pairs) executed during the block"""
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters) if with_parameters else statement)
+    
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+
 class TestArticles:
     
     def setup_method(self):
         """Setup test database for each test"""
         Base.metadata.drop_all(bind=engine)
         Base.metadata.create_all(bind=engine)
+        login_rate_limiter.reset()
         # Clear recently viewed service
         recently_viewed_service._user_recent_views.clear()
+        recently_viewed_service._article_viewers.clear()
+        coview_index.clear()
+        # Let delta sync see changes made moments ago
+        self.settle_seconds = sync.SYNC_SETTLE_SECONDS
+        sync.SYNC_SETTLE_SECONDS = 0
+    
+    def teardown_method(self):
+        sync.SYNC_SETTLE_SECONDS = self.settle_seconds
     
     def create_user_and_get_token(self, username="testuser", email="test@example.com"):
         """Helper method to create user and get auth token"""
@@ -261,4 +290,261 @@ class TestArticles:
         # Should be in reverse order (most recent first)
         assert data[0]["title"] == "Article 2"
         assert data[1]["title"] == "Article 1"
-        assert data[2]["title"] == "Article 0"
\ No newline at end of file
+        assert data[2]["title"] == "Article 0"
+    
+    def test_update_article_single_statement(self):
+        """Test that an update by the author is one conditional UPDATE after authentication"""
+        token = self.create_user_and_get_token()
+        headers = {"Authorization": f"Bearer {token}"}
+        create_response = client.post("/articles/", json={"title": "Original", "content": "Body"}, headers=headers)
+        article_id = create_response.json()["id"]
+        
+        with count_statements() as statements:
+            response = client.put(f"/articles/{article_id}", json={"title": "Changed"}, headers=headers)
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["title"] == "Changed"
+        assert data["content"] == "Body"
+        assert data["updated_at"] is not None
+        assert data["author"]["username"] == "testuser"
+        # One SELECT for the current user, one UPDATE ... RETURNING
+        assert len(statements) == 2
+        assert statements[1].startswith("UPDATE articles")
+    
+    def test_delete_article_single_statement(self):
+        """Test that a delete by the author is one conditional DELETE after authentication"""
+        token = self.create_user_and_get_token()
+        headers = {"Authorization": f"Bearer {token}"}
+        create_response = client.post("/articles/", json={"title": "Title", "content": "Body"}, headers=headers)
+        article_id = create_response.json()["id"]
+        
+        with count_statements() as statements:
+            response = client.delete(f"/articles/{article_id}", headers=headers)
+        
+        assert response.status_code == 204
+        # One SELECT for the current user, the DELETE and its sync tombstone
+        assert len(statements) == 3
+        assert statements[1].startswith("DELETE FROM articles")
+        assert statements[2].startswith("INSERT INTO article_tombstones")
+    
+    def test_update_and_delete_nonexistent_article(self):
+        """Test that conditional writes still report 404 for missing articles"""
+        token = self.create_user_and_get_token()
+        headers = {"Authorization": f"Bearer {token}"}
+        
+        update_response = client.put("/articles/999", json={"title": "Changed"}, headers=headers)
+        delete_response = client.delete("/articles/999", headers=headers)
+        
+        assert update_response.status_code == 404
+        assert delete_response.status_code == 404
+        assert "Article not found" in delete_response.json()["detail"]
+    
+    def test_article_list_does_not_load_content(self):
+        """Test that content is only read by the routes that return it"""
+        token = self.create_user_and_get_token()
+        headers = {"Authorization": f"Bearer {token}"}
+        content = "Long repetitive article body. " * 100
+        create_response = client.post("/articles/", json={"title": "Long", "content": content}, headers=headers)
+        article_id = create_response.json()["id"]
+        assert create_response.json()["content"] == content
+        
+        with count_statements() as statements:
+            list_response = client.get("/articles/", headers=headers)
+        assert "articles.content AS" not in statements[-1]
+        preview = list_response.json()["articles"][0]
+        assert preview["excerpt"].startswith("Long repetitive article body.")
+        assert preview["excerpt"].endswith("…")
+        assert preview["word_count"] == 400
+        
+        response = client.get(f"/articles/{article_id}", headers=headers)
+        assert response.json()["content"] == content
+    
+    def test_update_recomputes_metadata(self):
+        """Test that changing the content refreshes the excerpt and hash"""
+        token = self.create_user_and_get_token()
+        headers = {"Authorization": f"Bearer {token}"}
+        article_id = client.post("/articles/", json={"title": "T", "content": "First body"}, headers=headers).json()["id"]
+        before = client.get("/articles/", headers=headers).json()["articles"][0]
+        
+        client.put(f"/articles/{article_id}", json={"content": "Second body text"}, headers=headers)
+        
+        after = client.get("/articles/", headers=headers).json()["articles"][0]
+        assert after["excerpt"] == "Second body text"
+        assert after["word_count"] == 3
+        assert after["content_hash"] != before["content_hash"]
+    
+    def create_articles(self, headers, titles):
+        return [
+            client.post("/articles/", json={"title": title, "content": "Body"}, headers=headers).json()["id"]
+            for title in titles
+        ]
+    
+    def test_get_articles_filtered_by_author(self):
+        """Test listing only one author's articles"""
+        headers = {"Authorization": f"Bearer {self.create_user_and_get_token()}"}
+        other_headers = {"Authorization": f"Bearer {self.create_user_and_get_token('other', 'other@example.com')}"}
+        self.create_articles(headers, ["Mine 1", "Mine 2"])
+        self.create_articles(other_headers, ["Theirs"])
+        
+        response = client.get("/articles/?author_id=1", headers=headers)
+        
+        data = response.json()
+        assert data["total"] == 2
+        assert {a["title"] for a in data["articles"]} == {"Mine 1", "Mine 2"}
+    
+    def test_get_articles_filtered_by_creation_window(self):
+        """Test created_after/created_before and their restriction to sort=created_at"""
+        headers = {"Authorization": f"Bearer {self.create_user_and_get_token()}"}
+        self.create_articles(headers, ["A"])
+        
+        assert client.get("/articles/?created_after=2000-01-01T00:00:00", headers=headers).json()["total"] == 1
+        assert client.get("/articles/?created_before=2000-01-01T00:00:00", headers=headers).json()["total"] == 0
+        response = client.get("/articles/?created_after=2000-01-01T00:00:00&sort=title", headers=headers)
+        assert response.status_code == 400
+    
+    def test_keyset_pagination_visits_every_article_once(self):
+        """Test following next_after_id through every sort order"""
+        headers = {"Authorization": f"Bearer {self.create_user_and_get_token()}"}
+        ids = self.create_articles(headers, ["delta", "alpha", "charlie", "bravo", "echo"])
+        client.put(f"/articles/{ids[1]}", json={"title": "alpha"}, headers=headers)
+        client.put(f"/articles/{ids[3]}", json={"title": "bravo"}, headers=headers)
+        
+        for sort in ("created_at", "updated_at", "title"):
+            seen = []
+            url = f"/articles/?page_size=2&sort={sort}"
+            while url:
+                data = client.get(url, headers=headers).json()
+                seen += [a["title"] for a in data["articles"]]
+                url = f"/articles/?page_size=2&sort={sort}&after_id={data['next_after_id']}" if data["next_after_id"] else None
+            assert sorted(seen) == ["alpha", "bravo", "charlie", "delta", "echo"], sort
+            if sort == "title":
+                assert seen == ["alpha", "bravo", "charlie", "delta", "echo"]
+            if sort == "updated_at":
+                assert set(seen[:2]) == {"alpha", "bravo"}
+        
+        assert client.get("/articles/?after_id=999", headers=headers).status_code == 400
+    
+    def test_listing_query_plans_use_indexes(self):
+        """Test that every supported filter/sort combination is an index scan without a sort step"""
+        headers = {"Authorization": f"Bearer {self.create_user_and_get_token()}"}
+        ids = self.create_articles(headers, ["a", "b", "c"])
+        client.put(f"/articles/{ids[0]}", json={"title": "a2"}, headers=headers)
+        window = "created_after=2000-01-01T00:00:00&created_before=2100-01-01T00:00:00"
+        urls = [
+            f"/articles/?sort={sort}{extra}{after}"
+            for sort in ("created_at", "updated_at", "title")
+            for extra in ("", "&author_id=1")
+            for after in ("", f"&after_id={ids[1]}")
+        ] + [
+            f"/articles/?{window}",
+            f"/articles/?{window}&author_id=1&after_id={ids[1]}",
+        ]
+        
+        for url in urls:
+            with count_statements(with_parameters=True) as queries:
+                assert client.get(url, headers=headers).status_code == 200
+            listing = [(sql, params) for sql, params in queries if "ORDER BY" in sql]
+            assert listing, url
+            with engine.connect() as conn:
+                for sql, params in listing:
+                    plan = " | ".join(row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params))
+                    assert "TEMP B-TREE" not in plan, f"{url}: {plan}"
+                    assert "USING INDEX ix_articles" in plan, f"{url}: {plan}"
+    
+    def test_delta_sync_returns_only_changes_since_token(self):
+        """Test that a sync token picks up updates and deletions made after it"""
+        headers = {"Authorization": f"Bearer {self.create_user_and_get_token()}"}
+        ids = self.create_articles(headers, ["a", "b", "c"])
+        
+        first = client.get("/articles/changes", headers=headers).json()
+        assert [article["id"] for article in first["changed"]] == ids
+        assert first["changed"][0]["content"] == "Body"
+        assert first["deleted"] == []
+        assert first["has_more"] is False
+        
+        client.put(f"/articles/{ids[1]}", json={"title": "b2"}, headers=headers)
+        client.delete(f"/articles/{ids[2]}", headers=headers)
+        second = client.get(f"/articles/changes?since={first['next_since']}", headers=headers).json()
+        
+        assert [article["title"] for article in second["changed"]] == ["b2"]
+        assert [deletion["article_id"] for deletion in second["deleted"]] == [ids[2]]
+        
+        third = client.get(f"/articles/changes?since={second['next_since']}", headers=headers).json()
+        assert third["changed"] == [] and third["deleted"] == []
+        assert third["next_since"] == second["next_since"]
+    
+    def test_delta_sync_pages_and_rejects_bad_tokens(self):
+        """Test that a limited sync continues where it stopped and bad tokens are a 400"""
+        headers = {"Authorization": f"Bearer {self.create_user_and_get_token()}"}
+        ids = self.create_articles(headers, ["a", "b", "c"])
+        
+        seen = []
+        since = ""
+        while True:
+            data = client.get(f"/articles/changes?limit=2&since={since}", headers=headers).json()
+            seen += [article["id"] for article in data["changed"]]
+            since = data["next_since"]
+            if not data["has_more"]:
+                break
+        
+        assert seen == ids
+        assert client.get("/articles/changes?since=not-a-token", headers=headers).status_code == 400
+    
+    def test_delete_evicts_from_recently_viewed(self):
+        """Test that a deleted article disappears from recently viewed lists"""
+        headers = {"Authorization": f"Bearer {self.create_user_and_get_token()}"}
+        ids = self.create_articles(headers, ["kept", "deleted"])
+        for article_id in ids:
+            client.get(f"/articles/{article_id}", headers=headers)
+        
+        client.delete(f"/articles/{ids[1]}", headers=headers)
+        
+        recent = client.get("/articles/recently-viewed/me", headers=headers).json()
+        assert [article["id"] for article in recent] == [ids[0]]
+    
+    def test_related_articles_from_co_views(self):
+        """Test that articles viewed together are returned as related"""
+        headers = {"Authorization": f"Bearer {self.create_user_and_get_token()}"}
+        ids = self.create_articles(headers, ["a", "b", "c"])
+        for article_id in (ids[0], ids[1]):
+            client.get(f"/articles/{article_id}", headers=headers)
+        
+        response = client.get(f"/articles/{ids[0]}/related", headers=headers)
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert [article["id"] for article in data] == [ids[1]]
+        assert data[0]["title"] == "b" and data[0]["score"] > 0
+        assert client.get(f"/articles/{ids[2]}/related", headers=headers).json() == []
+        assert client.get("/articles/999/related", headers=headers).status_code == 404
+    
+    def test_sparse_fieldsets(self):
+        """Test that fields= narrows both the response and the SQL"""
+        headers = {"Authorization": f"Bearer {self.create_user_and_get_token()}"}
+        ids = self.create_articles(headers, ["first", "second", "third"])
+        
+        with count_statements() as statements:
+            response = client.get("/articles/?fields=id,title&page_size=2", headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["articles"] == [{"id": ids[2], "title": "third"}, {"id": ids[1], "title": "second"}]
+        assert data["total"] == 3 and data["next_after_id"] == ids[1]
+        assert "articles.excerpt" not in statements[-1] and "JOIN users" not in statements[-1]
+        
+        next_page = client.get(f"/articles/?fields=title&page_size=2&after_id={ids[1]}", headers=headers).json()
+        assert next_page["articles"] == [{"title": "first"}]
+        
+        with count_statements() as statements:
+            response = client.get(f"/articles/{ids[0]}?fields=title,author.username", headers=headers)
+        assert response.json() == {"title": "first", "author": {"username": "testuser"}}
+        assert "articles.content" not in statements[-1]
+        # Still tracked as recently viewed
+        recent = client.get("/articles/recently-viewed/me", headers=headers).json()
+        assert [article["id"] for article in recent] == [ids[0]]
+        assert recent[0]["author"]["username"] == "testuser"
+        
+        assert client.get("/articles/?fields=id,password", headers=headers).status_code == 400
+        assert client.get(f"/articles/{ids[0]}?fields=author.hashed_password", headers=headers).status_code == 400
+        assert client.get("/articles/?fields=,", headers=headers).status_code == 400
+        assert client.get("/articles/999?fields=id", headers=headers).status_code == 404
@@ -0,0 +1,43 @@
+import hashlib
+
+from sqlalchemy import create_engine, insert, select
+
+from app.article_metadata import backfill, build_excerpt, content_metadata
+from app.database import Base
+from app.models import Article, User
+
+
+class TestArticleMetadata:
+
+    def setup_method(self):
+        """Setup an in-memory database for each test"""
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+
+    def test_excerpt_cuts_at_word_boundary(self):
+        """Test that long content is cut between words and marked as truncated"""
+        excerpt = build_excerpt("alpha  beta\ngamma delta epsilon", length=20)
+
+        assert excerpt == "alpha beta gamma…"
+        assert build_excerpt("short text") == "short text"
+
+    def test_content_metadata(self):
+        """Test the derived column values"""
+        metadata = content_metadata("one two  three")
+
+        assert metadata["word_count"] == 3
+        assert metadata["content_hash"] == hashlib.sha256(b"one two  three").hexdigest()
+
+    def test_backfill_fills_missing_rows_in_batches(self):
+        """Test that the backfill only touches rows without metadata"""
+        with self.engine.begin() as conn:
+            conn.execute(insert(User), [{"id": 1, "username": "u", "email": "u@example.com", "hashed_password": "x"}])
+            conn.execute(insert(Article), [
+                {"id": i, "title": f"Article {i}", "content": f"body number {i}", "author_id": 1} for i in range(1, 6)
+            ])
+
+        assert backfill(self.engine.begin, Article.__table__, batch_size=2) == 5
+        assert backfill(self.engine.begin, Article.__table__, batch_size=2) == 0
+        with self.engine.connect() as conn:
+            rows = conn.execute(select(Article.excerpt, Article.word_count).order_by(Article.id)).all()
+        assert rows[0] == ("body number 1", 3)
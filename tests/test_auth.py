@@ -1,8 +1,10 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 from app.main import app
+from app.rate_limit import login_rate_limiter
 from app.database import get_db , Base
 from app.models import User
 from sqlalchemy.sql import text
@@ -39,6 +41,7 @@ class TestAuthentication:
         """Setup test database for each test"""
         Base.metadata.drop_all(bind=engine)
         Base.metadata.create_all(bind=engine)
+        login_rate_limiter.reset()
     
     def test_register_user_success(self):
         """Test successful user registration"""
@@ -158,4 +161,134 @@ class TestAuthentication:
         response = client.get("/auth/me", headers=headers)
         
         assert response.status_code == 401
-        assert "Could not validate credentials" in response.json()["detail"]
\ No newline at end of file
+        assert "Could not validate credentials" in response.json()["detail"]
+    
+    def test_login_throttled_per_username(self, monkeypatch):
+        """Test that repeated attempts on one username are rejected with 429 before hashing"""
+        import app.routers.auth as auth_router
+        monkeypatch.setattr("app.rate_limit.LOGIN_USERNAME_BURST", 3)
+        login_data = {
+            "username": "victim",
+            "password": "wrongpassword"
+        }
+        for _ in range(3):
+            response = client.post("/auth/login", data=login_data)
+            assert response.status_code == 401
+        
+        def fail_if_called(*args, **kwargs):
+            raise AssertionError("password was hashed for a throttled request")
+        monkeypatch.setattr(auth_router, "authenticate_user", fail_if_called)
+        
+        response = client.post("/auth/login", data=login_data)
+        
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+    
+    def test_login_throttled_per_ip(self, monkeypatch):
+        """Test that one client cycling through usernames is throttled by IP"""
+        monkeypatch.setattr("app.rate_limit.LOGIN_IP_BURST", 3)
+        for i in range(3):
+            response = client.post("/auth/login", data={"username": f"user{i}", "password": "x"})
+            assert response.status_code == 401
+        
+        response = client.post("/auth/login", data={"username": "another", "password": "x"})
+        
+        assert response.status_code == 429
+    
+    def test_username_under_attack_from_another_ip(self, monkeypatch):
+        """Test that a user can log in while their username is being guessed from another IP behind the proxy"""
+        from app.rate_limit import parse_trusted_proxies
+        monkeypatch.setattr("app.rate_limit.TRUSTED_PROXIES", parse_trusted_proxies("10.0.0.0/8"))
+        monkeypatch.setattr("app.rate_limit.LOGIN_USERNAME_BURST", 3)
+        proxy = TestClient(app, client=("10.0.0.2", 50000))
+        client.post("/auth/register", json={
+            "username": "victim", "email": "victim@example.com", "password": "correctpassword"
+        })
+        attacker = {"X-Forwarded-For": "203.0.113.9"}
+        user = {"X-Forwarded-For": "198.51.100.7"}
+        
+        for _ in range(3):
+            response = proxy.post("/auth/login", data={"username": "victim", "password": "guess"}, headers=attacker)
+            assert response.status_code == 401
+        response = proxy.post("/auth/login", data={"username": "victim", "password": "guess"}, headers=attacker)
+        assert response.status_code == 429
+        
+        # Successful logins do not use up the user's own bucket either
+        for _ in range(5):
+            response = proxy.post("/auth/login", data={"username": "victim", "password": "correctpassword"},
+                                  headers=user)
+            assert response.status_code == 200
+    
+    def test_client_ip_from_trusted_proxies(self, monkeypatch):
+        """Test that X-Forwarded-For is only honoured when sent by a trusted proxy"""
+        from app.rate_limit import client_ip, parse_trusted_proxies
+        monkeypatch.setattr("app.rate_limit.TRUSTED_PROXIES", parse_trusted_proxies("10.0.0.0/8, 192.168.1.1"))
+        
+        assert client_ip("10.0.0.2", "203.0.113.9") == "203.0.113.9"
+        # A client-supplied entry left of the real client is ignored
+        assert client_ip("10.0.0.2", "1.2.3.4, 203.0.113.9, 192.168.1.1") == "203.0.113.9"
+        # Untrusted peers cannot spoof their address
+        assert client_ip("203.0.113.9", "1.2.3.4") == "203.0.113.9"
+        assert client_ip(None, None) == "unknown"
+    
+    def test_token_bucket_refills(self):
+        """Test that a drained bucket allows requests again after refilling"""
+        from app.rate_limit import InMemoryRateLimitBackend
+        now = [0.0]
+        backend = InMemoryRateLimitBackend(clock=lambda: now[0])
+        
+        assert backend.consume("key", capacity=2, refill_per_second=1.0) == 0
+        assert backend.consume("key", capacity=2, refill_per_second=1.0) == 0
+        assert backend.consume("key", capacity=2, refill_per_second=1.0) == pytest.approx(1.0)
+        
+        now[0] = 1.0
+        assert backend.consume("key", capacity=2, refill_per_second=1.0) == 0
+    
+    def test_register_single_statement(self):
+        """Test that registration is a single INSERT with no pre-checks or refresh"""
+        statements = []
+        
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(Engine, "before_cursor_execute", record)
+        try:
+            response = client.post("/auth/register", json={
+                "username": "testuser",
+                "email": "test@example.com",
+                "password": "testpassword123"
+            })
+        finally:
+            event.remove(Engine, "before_cursor_execute", record)
+        
+        assert response.status_code == 201
+        assert response.json()["created_at"] is not None
+        assert len(statements) == 1
+        assert statements[0].startswith("INSERT INTO users")
+    
+    def test_login_rehashes_outdated_cost(self):
+        """Test that a hash with an outdated bcrypt cost is upgraded on successful login"""
+        from passlib.hash import bcrypt
+        from app.auth import BCRYPT_ROUNDS
+        db = TestingSessionLocal()
+        db.add(User(
+            username="olduser",
+            email="old@example.com",
+            hashed_password=bcrypt.using(rounds=4).hash("testpassword123")
+        ))
+        db.commit()
+        db.close()
+        
+        response = client.post("/auth/login", data={"username": "olduser", "password": "testpassword123"})
+        
+        assert response.status_code == 200
+        db = TestingSessionLocal()
+        upgraded = db.query(User).filter(User.username == "olduser").first().hashed_password
+        db.close()
+        assert bcrypt.from_string(upgraded).rounds == BCRYPT_ROUNDS
+        
+        # A wrong password never rewrites the hash
+        assert client.post("/auth/login", data={"username": "olduser", "password": "wrong"}).status_code == 401
+        db = TestingSessionLocal()
+        assert db.query(User).filter(User.username == "olduser").first().hashed_password == upgraded
+        db.close()
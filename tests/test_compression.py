@@ -0,0 +1,57 @@
+from sqlalchemy import Column, Integer, LargeBinary, MetaData, Table, create_engine, select, text, type_coerce
+
+from app.compression import CompressedText, compress_text, decompress_text, migrate_content, stored_codec
+
+LONG_TEXT = "The quick brown fox jumps over the lazy dog. " * 50
+
+
+class TestCompression:
+
+    def setup_method(self):
+        """Setup an in-memory table with a compressed column for each test"""
+        self.engine = create_engine("sqlite://")
+        self.table = Table(
+            "documents", MetaData(),
+            Column("id", Integer, primary_key=True),
+            Column("content", CompressedText(), nullable=False),
+        )
+        self.table.metadata.create_all(self.engine)
+
+    def stored(self):
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(type_coerce(self.table.c.content, LargeBinary())).order_by(self.table.c.id)
+            ).scalars().all()
+
+    def test_round_trip_with_header(self):
+        """Test that compressed values carry a header and decompress to the original"""
+        data = compress_text(LONG_TEXT, "zlib")
+
+        assert data[:2] == b"\xff\x01"
+        assert stored_codec(data) == "zlib"
+        assert len(data) < len(LONG_TEXT)
+        assert decompress_text(data) == LONG_TEXT
+
+    def test_small_and_uncompressed_values_stay_plain(self):
+        """Test that short text is stored as plain UTF-8 and read back unchanged"""
+        assert compress_text("short", "zlib") == b"short"
+        assert compress_text(LONG_TEXT, "none") == LONG_TEXT.encode("utf-8")
+        assert decompress_text("naïve".encode("utf-8")) == "naïve"
+
+    def test_migrate_compresses_existing_rows_in_batches(self):
+        """Test that the migration tool rewrites plain rows and is idempotent"""
+        with self.engine.begin() as conn:
+            # Rows written before compression was enabled: legacy TEXT and plain UTF-8 bytes
+            conn.execute(text("INSERT INTO documents (id, content) VALUES (1, :content)"), {"content": LONG_TEXT})
+            conn.execute(text("INSERT INTO documents (id, content) VALUES (:id, :content)"),
+                         [{"id": i, "content": LONG_TEXT.encode("utf-8")} for i in range(2, 6)])
+
+        stats = migrate_content(self.engine.begin, self.table, algorithm="zlib", batch_size=2)
+
+        assert stats["rows"] == 5 and stats["rewritten"] == 5
+        assert stats["bytes_after"] < stats["bytes_before"]
+        assert all(stored_codec(data) == "zlib" for data in self.stored())
+        with self.engine.connect() as conn:
+            assert conn.execute(select(self.table.c.content)).scalars().all() == [LONG_TEXT] * 5
+
+        assert migrate_content(self.engine.begin, self.table, algorithm="zlib", batch_size=2)["rewritten"] == 0
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+
+from app.coview import CoViewIndex, rebuild
+from app.view_storage import insert_views
+
+START = datetime(2026, 3, 1, 12, 0)
+
+
+def at(minutes):
+    return START + timedelta(minutes=minutes)
+
+
+class TestCoView:
+
+    def test_views_in_a_session_are_paired(self):
+        """Test that articles viewed by the same user within the session window become related"""
+        index = CoViewIndex(session_seconds=3600)
+        index.record_view(2, [(1, at(0))], at(5))
+        index.record_view(3, [(1, at(0)), (2, at(5))], at(10))
+        # Too long after the earlier views to count
+        index.record_view(4, [(1, at(0))], at(120))
+
+        assert [article_id for article_id, _ in index.related(1, 10)] in ([2, 3], [3, 2])
+        assert [article_id for article_id, _ in index.related(3, 10)] in ([1, 2], [2, 1])
+        assert index.related(4, 10) == []
+
+    def test_recent_co_views_outweigh_old_ones(self):
+        """Test that scores decay with the configured half-life"""
+        index = CoViewIndex(half_life_hours=1)
+        for minute in range(3):
+            index.record_view(2, [(1, at(minute))], at(minute))
+        # One co-view five hours later beats three old ones
+        index.record_view(3, [(1, at(300))], at(300))
+
+        assert [article_id for article_id, _ in index.related(1, 2)] == [3, 2]
+
+    def test_memory_is_bounded(self):
+        """Test the per-article neighbour cap and the tracked article cap"""
+        index = CoViewIndex(max_neighbors=3, max_articles=5)
+        for other in range(2, 12):
+            index.record_view(other, [(1, at(0))], at(1))
+
+        assert len(index._scores[1]) <= 6
+        assert len(index.related(1, 10)) == 3
+        # The least recently updated articles were dropped
+        assert index.stats()["articles"] == 5
+
+        kept = [article_id for article_id, _ in index.related(1, 10)]
+        index.remove_article(1)
+        assert index.related(1, 10) == []
+        assert all(1 not in index._scores.get(article_id, {}) for article_id in kept)
+
+    def test_rebuild_from_view_history(self):
+        """Test that replaying stored views produces the same pairs as live tracking"""
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            insert_views(conn, [
+                {"user_id": 1, "article_id": 10, "viewed_at": at(0)},
+                {"user_id": 1, "article_id": 11, "viewed_at": at(1)},
+                {"user_id": 2, "article_id": 10, "viewed_at": at(2)},
+                {"user_id": 2, "article_id": 12, "viewed_at": at(3)},
+                {"user_id": 2, "article_id": 11, "viewed_at": at(4)},
+            ])
+        index = CoViewIndex()
+
+        with engine.connect() as conn:
+            assert rebuild(conn, START - timedelta(days=1), START + timedelta(days=1), index) == 5
+
+        related = index.related(10, 10)
+        assert related[0][0] == 11
+        assert {article_id for article_id, _ in related} == {11, 12}
+
+        restored = CoViewIndex()
+        restored.load(index.dump())
+        assert [article_id for article_id, _ in restored.related(10, 10)] == [article_id for article_id, _ in related]
@@ -0,0 +1,130 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.auth import create_access_token
+from app.events import EventHub, article_events
+
+client = TestClient(app)
+
+
+async def read_stream(path, headers=(), until=lambda body: False, action=None, timeout=2.0):
+    """
+    Drive the ASGI app directly and return the streamed body once `until`
+    holds; then disconnect. TestClient would wait for the endless stream to end.
+    """
+    disconnect = asyncio.Event()
+    body = b""
+    done = asyncio.Event()
+    path, _, query = path.partition("?")
+
+    async def receive():
+        if not hasattr(receive, "sent"):
+            receive.sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal body
+        if message["type"] == "http.response.body":
+            body += message.get("body", b"")
+            if until(body.decode()):
+                done.set()
+        elif message["type"] == "http.response.start":
+            send.status = message["status"]
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "headers": [(k.encode(), v.encode()) for k, v in headers],
+        "client": ("127.0.0.1", 1234), "server": ("testserver", 80),
+    }
+    task = asyncio.create_task(app(scope, receive, send))
+    await asyncio.sleep(0.05)
+    if action is not None:
+        action()
+    try:
+        await asyncio.wait_for(done.wait(), timeout)
+    finally:
+        disconnect.set()
+        await asyncio.wait_for(task, timeout)
+    return body.decode()
+
+
+def auth_headers():
+    return [("authorization", f"Bearer {create_access_token({'sub': 'testuser'})}")]
+
+
+class TestEvents:
+
+    def test_stream_requires_token(self):
+        """Test that the event stream rejects anonymous clients"""
+        response = client.get("/articles/events")
+
+        assert response.status_code == 401
+
+    def test_published_events_are_pushed(self):
+        """Test that a published change reaches a connected subscriber"""
+        body = asyncio.run(read_stream(
+            "/articles/events", auth_headers(),
+            until=lambda body: "article.created" in body,
+            action=lambda: article_events.publish("article.created", 7, 1, "Hello"),
+        ))
+
+        assert "event: article.created" in body
+        assert '"article_id": 7' in body
+        assert article_events.subscriber_count == 0
+
+    def test_resume_from_last_event_id(self):
+        """Test that a reconnecting client receives the events it missed"""
+        first = article_events.publish("article.created", 1, 1, "One")
+        article_events.publish("article.updated", 1, 1, "One v2")
+        article_events.publish("article.deleted", 1, 1)
+        headers = auth_headers() + [("last-event-id", article_events.event_id(first))]
+
+        body = asyncio.run(read_stream("/articles/events", headers, until=lambda body: "article.deleted" in body))
+
+        assert "article.created" not in body
+        assert body.index("article.updated") < body.index("article.deleted")
+
+    def test_unknown_last_event_id_requests_reset(self):
+        """Test that an id from another worker or boot tells the client to resync"""
+        headers = auth_headers() + [("last-event-id", "otherboot-5")]
+
+        body = asyncio.run(read_stream("/articles/events", headers, until=lambda body: "event: reset" in body))
+
+        assert "event: reset" in body
+
+    def test_slow_consumer_is_disconnected(self):
+        """Test that a subscriber whose buffer fills up is dropped"""
+        hub = EventHub(buffer_size=2)
+
+        async def scenario():
+            subscription, _, _ = hub.subscribe()
+            for i in range(3):
+                hub.publish("article.created", i, 1)
+            return subscription
+
+        subscription = asyncio.run(scenario())
+
+        assert subscription.closed_reason == "slow consumer"
+        assert hub.subscriber_count == 0
+
+    def test_unstarted_stream_does_not_subscribe(self):
+        """Test that a stream is only registered while it is being iterated"""
+        hub = EventHub()
+
+        async def scenario():
+            unstarted = hub.stream()
+            assert hub.subscriber_count == 0
+            started = hub.stream()
+            assert (await started.__anext__()).startswith("retry:")
+            assert hub.subscriber_count == 1
+            await started.aclose()
+            await unstarted.aclose()
+
+        asyncio.run(scenario())
+
+        assert hub.subscriber_count == 0
@@ -0,0 +1,95 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.health import HealthMonitor
+
+client = TestClient(app)
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestHealth:
+
+    def setup_method(self):
+        self.clock = FakeClock()
+
+    def use_monitor(self, monitor, monkeypatch):
+        monkeypatch.setattr("app.main.health_monitor", monitor)
+
+    def test_successful_check_is_ready(self, monkeypatch):
+        """Test that a passing check makes the readiness probe succeed"""
+        monitor = HealthMonitor(check=lambda: None, clock=self.clock)
+        monitor.run_check()
+        self.use_monitor(monitor, monkeypatch)
+
+        response = client.get("/health/ready")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["database"] == "connected"
+        assert data["last_check_latency_ms"] is not None
+        assert "pool" in data
+        assert client.get("/health").json()["status"] == "healthy"
+
+    def test_probes_never_run_the_check(self, monkeypatch):
+        """Test that probes are answered from the snapshot without touching the database"""
+        calls = []
+        monitor = HealthMonitor(check=lambda: calls.append(1), clock=self.clock)
+        monitor.run_check()
+        self.use_monitor(monitor, monkeypatch)
+
+        for _ in range(5):
+            client.get("/health/ready")
+            client.get("/health/live")
+            client.get("/health")
+
+        assert calls == [1]
+
+    def test_failed_and_stale_checks_are_not_ready(self, monkeypatch):
+        """Test that readiness fails after a failed check or when the last success is too old"""
+        def failing():
+            raise RuntimeError("connection refused")
+
+        monitor = HealthMonitor(check=failing, clock=self.clock, stale_after=10)
+        monitor.run_check()
+        self.use_monitor(monitor, monkeypatch)
+
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json()["error"] == "connection refused"
+
+        monitor.check = lambda: None
+        monitor.run_check()
+        assert client.get("/health/ready").status_code == 200
+        self.clock.now += 11
+        assert client.get("/health/ready").status_code == 503
+        assert client.get("/health/live").status_code == 200
+
+    def test_hung_check_times_out_without_piling_up(self):
+        """Test that a check that hangs is reported down and not started again while hung"""
+        release = threading.Event()
+        calls = []
+
+        def hanging():
+            calls.append(1)
+            release.wait(5)
+
+        monitor = HealthMonitor(check=hanging, timeout=0.05, clock=self.clock)
+        monitor.run_check()
+        monitor.run_check()
+
+        assert monitor.database_up is False
+        assert "timed out" in monitor.error
+        assert calls == [1]
+        release.set()
+        monitor.run_check()
+        assert monitor.database_up is True
@@ -0,0 +1,76 @@
+import io
+import json
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import Article, User
+from app.importer import import_articles, load_checkpoint
+
+# Test database URL - using SQLite for testing
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def make_ndjson(count, start=0):
+    lines = [
+        json.dumps({"title": f"Imported {i}", "content": f"Body {i}"})
+        for i in range(start, start + count)
+    ]
+    return ("\n".join(lines) + "\n").encode()
+
+
+class TestImporter:
+
+    def setup_method(self):
+        """Setup test database and an author for each test"""
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        self.db = TestingSessionLocal()
+        author = User(username="importer", email="importer@example.com", hashed_password="x")
+        self.db.add(author)
+        self.db.commit()
+        self.author_id = author.id
+
+    def teardown_method(self):
+        self.db.close()
+
+    def test_import_in_chunks(self):
+        """Test that every valid line is imported across several chunks"""
+        progress = import_articles(self.db, io.BytesIO(make_ndjson(25)), self.author_id, chunk_size=10)
+
+        assert progress.imported == 25
+        assert progress.rejected == 0
+        assert self.db.query(Article).count() == 25
+        assert self.db.query(Article).filter(Article.author_id == self.author_id).count() == 25
+
+    def test_invalid_lines_are_skipped(self):
+        """Test that lines failing ArticleCreate validation are counted and skipped"""
+        data = make_ndjson(2) + b'{"title": "missing content"}\nnot json\n\n'
+
+        progress = import_articles(self.db, io.BytesIO(data), self.author_id)
+
+        assert progress.imported == 2
+        assert progress.rejected == 2
+        assert self.db.query(Article).count() == 2
+
+    def test_resume_from_checkpoint(self, tmp_path):
+        """Test that a resumed import continues after the last committed chunk"""
+        checkpoint = str(tmp_path / "import.ckpt")
+        first = make_ndjson(10)
+        import_articles(self.db, io.BytesIO(first), self.author_id, chunk_size=4, checkpoint_path=checkpoint)
+        assert load_checkpoint(checkpoint).offset == len(first)
+
+        # The file grew since the first run; only the new lines are imported
+        progress = import_articles(
+            self.db, io.BytesIO(first + make_ndjson(5, start=10)), self.author_id,
+            chunk_size=4, checkpoint_path=checkpoint
+        )
+
+        assert progress.imported == 15
+        assert self.db.query(Article).count() == 15
+        titles = {title for (title,) in self.db.query(Article.title)}
+        assert titles == {f"Imported {i}" for i in range(15)}
@@ -0,0 +1,91 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.rate_limit import login_rate_limiter
+from app.database import get_db , Base
+from app.metrics import Histogram, metrics
+
+# Test database URL - using SQLite for testing
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+Base.metadata.create_all(bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+app.dependency_overrides[get_db] = override_get_db
+
+client = TestClient(app)
+
+
+class TestMetrics:
+
+    def setup_method(self):
+        """Setup test database and reset metrics for each test"""
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        login_rate_limiter.reset()
+        metrics.reset()
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that rendered bucket counts are cumulative"""
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value)
+
+        lines = histogram.render("latency", 'route="/"')
+
+        assert 'latency_bucket{route="/",le="0.1"} 1' in lines
+        assert 'latency_bucket{route="/",le="1.0"} 3' in lines
+        assert 'latency_bucket{route="/",le="+Inf"} 4' in lines
+        assert 'latency_count{route="/"} 4' in lines
+
+    def test_requests_are_labelled_by_route_template(self):
+        """Test that requests are counted under the route template, not the raw path"""
+        client.post("/auth/register", json={
+            "username": "testuser",
+            "email": "test@example.com",
+            "password": "testpassword123"
+        })
+        token = client.post("/auth/login", data={
+            "username": "testuser",
+            "password": "testpassword123"
+        }).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        client.get("/articles/1", headers=headers)
+        client.get("/articles/2", headers=headers)
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert 'http_requests_total{method="GET",route="/articles/{article_id}",status="404"} 2' in body
+        assert 'http_request_duration_seconds_count{method="GET",route="/articles/{article_id}"} 2' in body
+        assert 'recently_viewed_items{kind="users"}' in body
+
+    def test_db_queries_are_counted_per_route(self):
+        """Test that SQL statements are attributed to the route that ran them"""
+        client.post("/auth/register", json={
+            "username": "testuser",
+            "email": "test@example.com",
+            "password": "testpassword123"
+        })
+
+        body = client.get("/metrics").text
+
+        line = next(l for l in body.splitlines()
+                    if l.startswith('db_queries_total{method="POST",route="/auth/register"}'))
+        assert int(line.split()[-1]) > 0
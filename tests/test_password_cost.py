@@ -0,0 +1,31 @@
+from app.password_cost import choose_rounds, write_env_setting
+
+
+class TestPasswordCost:
+
+    def test_choose_rounds_meets_target(self):
+        """Test that calibration picks the highest cost within the target time"""
+        # Each round doubles the hash time: 10 -> 60ms, 11 -> 120ms, 12 -> 240ms, 13 -> 480ms
+        measured = []
+
+        def measure(rounds):
+            measured.append(rounds)
+            return 0.06 * 2 ** (rounds - 10)
+
+        assert choose_rounds(0.25, measure) == 12
+        # Stops measuring once a cost is over the target
+        assert measured == [10, 11, 12, 13]
+
+    def test_choose_rounds_never_below_minimum(self):
+        """Test that slow machines still get the minimum cost"""
+        assert choose_rounds(0.01, lambda rounds: 1.0) == 10
+
+    def test_write_env_setting(self, tmp_path):
+        """Test that the chosen cost replaces an existing setting and keeps the rest"""
+        env_file = tmp_path / ".env"
+        env_file.write_text("SECRET_KEY=abc\nBCRYPT_ROUNDS=10\n")
+
+        write_env_setting(str(env_file), "BCRYPT_ROUNDS", "13")
+        write_env_setting(str(env_file), "OTHER", "1")
+
+        assert env_file.read_text() == "SECRET_KEY=abc\nBCRYPT_ROUNDS=13\nOTHER=1\n"
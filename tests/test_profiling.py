@@ -0,0 +1,80 @@
+import logging
+import os
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session, sessionmaker
+from app import profiling
+from app.profiling import ProfilingMiddleware, install_route_profiling
+
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def get_test_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+def make_client():
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, debug=True)
+
+    @app.get("/items/{count}")
+    def read_items(count: int, db: Session = Depends(get_test_db)):
+        for i in range(count):
+            db.execute(text("SELECT :i"), {"i": i})
+        return {"count": count}
+
+    return app, TestClient(app)
+
+
+class TestProfiling:
+
+    def test_debug_headers(self):
+        """Test that query count and DB time are reported in response headers"""
+        app, client = make_client()
+
+        response = client.get("/items/2")
+
+        assert response.status_code == 200
+        assert response.headers["X-DB-Query-Count"] == "2"
+        assert float(response.headers["X-DB-Time-Ms"]) >= 0
+
+    def test_repeated_statement_is_flagged(self, caplog):
+        """Test that the same statement repeated within a request is logged as N+1"""
+        app, client = make_client()
+
+        with caplog.at_level(logging.WARNING, logger="app.profiling"):
+            client.get(f"/items/{profiling.N_PLUS_ONE_THRESHOLD}")
+
+        assert any("Possible N+1 in GET /items/{count}" in record.message for record in caplog.records)
+
+    def test_slow_query_is_logged_with_route(self, caplog, monkeypatch):
+        """Test that statements above the threshold are logged with route and parameters"""
+        monkeypatch.setattr(profiling, "SLOW_QUERY_MS", 0)
+        app, client = make_client()
+
+        with caplog.at_level(logging.WARNING, logger="app.profiling"):
+            client.get("/items/1")
+
+        slow = [record.message for record in caplog.records if record.message.startswith("Slow query")]
+        assert slow
+        assert "GET /items/{count}" in slow[0]
+        assert "parameters: (0,)" in slow[0]
+
+    def test_sampled_request_is_profiled(self, monkeypatch, tmp_path):
+        """Test that a sampled request writes cProfile stats for its route"""
+        monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 1.0)
+        monkeypatch.setattr(profiling, "PROFILE_OUTPUT_DIR", str(tmp_path))
+        app, client = make_client()
+        install_route_profiling(app)
+
+        client.get("/items/1")
+
+        files = os.listdir(tmp_path)
+        assert len(files) == 1
+        assert files[0].startswith("GET_items_count")
@@ -0,0 +1,99 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert, select, update
+
+from app.database import Base
+from app.models import Article, ArticleTombstone, User
+from app.purger import ViewPurger, claim_tombstone, purge_pending
+from app.recently_viewed_service import RecentlyViewedService
+from app.view_storage import insert_views, views_in_window
+
+WINDOW = (datetime(2026, 1, 1), datetime(2027, 1, 1))
+
+
+class TestPurger:
+
+    def setup_method(self):
+        """Setup an in-memory database with views of two articles"""
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        with self.engine.begin() as conn:
+            insert_views(conn, [
+                {"user_id": user_id, "article_id": article_id, "viewed_at": datetime(2026, month, 5)}
+                for article_id in (1, 2) for month in (1, 2, 3) for user_id in range(5)
+            ])
+
+    def views_of(self, article_id):
+        with self.engine.connect() as conn:
+            return len(views_in_window(conn, *WINDOW, article_id=article_id))
+
+    def test_purge_deletes_views_in_batches(self):
+        """Test that a tombstoned article's views are deleted in bounded transactions"""
+        with self.engine.begin() as conn:
+            conn.execute(insert(ArticleTombstone), [{"article_id": 1, "author_id": 1}])
+        transactions = []
+
+        def conn_factory():
+            transactions.append(1)
+            return self.engine.begin()
+
+        assert purge_pending(conn_factory, batch_size=4) == 1
+
+        assert self.views_of(1) == 0
+        assert self.views_of(2) == 15
+        # The claim, four delete batches (4, 4, 4, 3), two tombstone lookups and the purged_at update
+        assert len(transactions) == 8
+        with self.engine.connect() as conn:
+            assert conn.execute(select(ArticleTombstone.purged_at)).scalar() is not None
+        # Nothing left to do on the next pass
+        assert purge_pending(self.engine.begin, batch_size=4) == 0
+
+    def test_claimed_tombstones_are_left_to_their_worker(self):
+        """Test that only one worker purges a tombstone, unless its claim has expired"""
+        with self.engine.begin() as conn:
+            conn.execute(insert(ArticleTombstone), [{"article_id": 1, "author_id": 1}])
+        assert claim_tombstone(self.engine.begin, 1, "worker-a")
+        assert not claim_tombstone(self.engine.begin, 1, "worker-b")
+
+        assert purge_pending(self.engine.begin, owner="worker-b") == 0
+        assert self.views_of(1) == 15
+
+        # worker-a died mid-purge; its claim expires and another worker takes over
+        with self.engine.begin() as conn:
+            conn.execute(update(ArticleTombstone).values(claimed_at=datetime(2026, 1, 1)))
+        assert purge_pending(self.engine.begin, owner="worker-b") == 1
+        assert self.views_of(1) == 0
+        with self.engine.connect() as conn:
+            assert conn.execute(select(ArticleTombstone.claimed_by)).scalar() == "worker-b"
+
+    def test_recently_viewed_eviction_uses_reverse_index(self):
+        """Test that deleted articles are evicted from every user's recently viewed list"""
+        service = RecentlyViewedService(max_recent_items=2)
+        author = User(id=1, username="author", email="a@example.com")
+        articles = [Article(id=i, title=f"Article {i}", author_id=1, author=author) for i in (1, 2, 3)]
+        service.add_view(10, articles[0])
+        service.add_view(11, articles[0])
+        service.add_view(11, articles[1])
+        service.add_view(11, articles[2])
+
+        # User 11's oldest entry was pushed out, so only user 10 still holds article 1
+        assert service._article_viewers[1] == {10}
+        assert service.remove_article(1) == 1
+        assert service.get_recently_viewed(10) == []
+        assert [view.id for view in service.get_recently_viewed(11)] == [3, 2]
+
+    def test_worker_evicts_tombstones_created_after_start(self, monkeypatch):
+        """Test that each worker evicts articles deleted by any worker since it started"""
+        service = RecentlyViewedService()
+        monkeypatch.setattr("app.purger.recently_viewed_service", service)
+        author = User(id=1, username="author", email="a@example.com")
+        service.add_view(10, Article(id=2, title="Article 2", author_id=1, author=author))
+        purger = ViewPurger(conn_factory=self.engine.begin)
+        purger.evict_deleted()
+
+        with self.engine.begin() as conn:
+            conn.execute(insert(ArticleTombstone), [{"article_id": 2, "author_id": 1}])
+        purger.run_once()
+
+        assert service.get_recently_viewed(10) == []
+        assert self.views_of(2) == 0
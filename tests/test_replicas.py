@@ -0,0 +1,113 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.rate_limit import login_rate_limiter
+from app.database import get_db , Base
+from app.models import Article, User
+from app import replicas
+from app.replicas import ReplicaRouter
+from app.auth import get_password_hash
+
+# Two SQLite files stand in for the primary and the replica
+PRIMARY_DATABASE_URL = "sqlite:///./test.db"
+REPLICA_DATABASE_URL = "sqlite:///./test_replica.db"
+
+engine = create_engine(
+    PRIMARY_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+replica_engine = create_engine(
+    REPLICA_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+client = TestClient(app)
+
+
+class TestReplicas:
+
+    def setup_method(self):
+        """Setup primary and replica databases with the same user on both"""
+        app.dependency_overrides[get_db] = override_get_db
+        hashed_password = get_password_hash("testpassword123")
+        for bind, session_factory in ((engine, TestingSessionLocal), (replica_engine, ReplicaSessionLocal)):
+            Base.metadata.drop_all(bind=bind)
+            Base.metadata.create_all(bind=bind)
+            with session_factory() as db:
+                db.add(User(id=1, username="testuser", email="test@example.com", hashed_password=hashed_password))
+                db.commit()
+        login_rate_limiter.reset()
+
+    def teardown_method(self):
+        replicas.replica_router = ReplicaRouter([])
+
+    def use_replica(self, url=REPLICA_DATABASE_URL, **kwargs):
+        router = ReplicaRouter([url], **kwargs)
+        replicas.replica_router = router
+        return router
+
+    def add_article(self, session_factory, article_id, title):
+        with session_factory() as db:
+            db.add(Article(id=article_id, title=title, content="Body", author_id=1))
+            db.commit()
+
+    def login(self):
+        response = client.post("/auth/login", data={"username": "testuser", "password": "testpassword123"})
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    def test_reads_are_served_by_replica(self):
+        """Test that GET routes read from the replica while auth uses the primary"""
+        self.add_article(ReplicaSessionLocal, 1, "Only on replica")
+        self.add_article(TestingSessionLocal, 2, "Only on primary")
+        self.use_replica()
+        headers = self.login()
+
+        assert client.get("/articles/1", headers=headers).json()["title"] == "Only on replica"
+        assert client.get("/articles/2", headers=headers).status_code == 404
+        assert client.get("/articles/", headers=headers).json()["total"] == 1
+
+    def test_reads_stick_to_primary_after_write(self):
+        """Test that a user's reads go to the primary right after their own write"""
+        self.use_replica(sticky_seconds=60)
+        headers = self.login()
+
+        create_response = client.post("/articles/", json={"title": "Fresh", "content": "Body"}, headers=headers)
+        article_id = create_response.json()["id"]
+
+        response = client.get(f"/articles/{article_id}", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["title"] == "Fresh"
+
+    def test_sticky_window_expires(self):
+        """Test that reads return to the replica once the sticky window has passed"""
+        now = [0.0]
+        router = self.use_replica(sticky_seconds=5, clock=lambda: now[0])
+        headers = self.login()
+        client.post("/articles/", json={"title": "Fresh", "content": "Body"}, headers=headers)
+        assert client.get("/articles/", headers=headers).json()["total"] == 1
+
+        now[0] = 10.0
+
+        assert client.get("/articles/", headers=headers).json()["total"] == 0
+
+    def test_failover_to_primary(self):
+        """Test that an unreachable replica is marked down and reads fall back to the primary"""
+        self.add_article(TestingSessionLocal, 1, "On primary")
+        router = self.use_replica(url="sqlite:////nonexistent-dir/replica.db")
+        headers = self.login()
+
+        response = client.get("/articles/1", headers=headers)
+
+        assert response.status_code == 200
+        assert response.json()["title"] == "On primary"
+        assert router.pick() is None
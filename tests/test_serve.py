@@ -0,0 +1,95 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from app.serve import Arbiter, worker_count
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(tmp_path, port, schema_check="create_all"):
+    env = {
+        **os.environ,
+        "SECRET_KEY": "test-secret",
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'serve.db'}",
+        "STARTUP_SCHEMA_CHECK": schema_check,
+        "PURGE_ENABLED": "false",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "app.serve", "--host", "127.0.0.1", "--port", str(port), "--workers", "2",
+         "--graceful-timeout", "5"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until_live(url, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url).status_code == 200:
+                return True
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+class TestServe:
+
+    def test_worker_count(self):
+        """Test that an explicit worker count wins and 0 means one per CPU"""
+        assert worker_count(3) == 3
+        assert worker_count(0) >= 1
+
+    def test_scale_down_without_live_workers(self):
+        """Test that SIGTTOU while every worker is down lowers the target instead of failing"""
+        arbiter = Arbiter(target=lambda: 0, workers=3)
+
+        arbiter.handle(signal.SIGTTOU)
+        assert arbiter.workers == 2
+        assert arbiter.retiring == {}
+
+        arbiter.workers = 1
+        arbiter.handle(signal.SIGTTOU)
+        assert arbiter.workers == 1
+
+    def test_rolling_restart_and_graceful_shutdown(self, tmp_path):
+        """Test that the launcher serves through a SIGHUP restart and exits cleanly on SIGTERM"""
+        port = free_port()
+        url = f"http://127.0.0.1:{port}/health/live"
+        server = start_server(tmp_path, port)
+        try:
+            assert wait_until_live(url)
+
+            server.send_signal(signal.SIGHUP)
+            # Old workers stop while new ones start; no request may fail
+            for _ in range(20):
+                assert httpx.get(url).status_code == 200
+                time.sleep(0.1)
+
+            server.send_signal(signal.SIGTERM)
+            assert server.wait(timeout=20) == 0
+        finally:
+            if server.poll() is None:
+                server.kill()
+
+    def test_schema_check_failure_stops_launcher(self, tmp_path):
+        """Test that a bad schema stops the launcher instead of respawning workers"""
+        # The schema revision check fails on an empty database
+        server = start_server(tmp_path, free_port(), schema_check="alembic")
+        try:
+            assert server.wait(timeout=30) == 1
+        finally:
+            if server.poll() is None:
+                server.kill()
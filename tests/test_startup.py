@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from app.startup import StartupTimer, get_alembic_head, verify_not_stale, verify_schema_revision
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def alembic(database_url, *args):
+    env = {**os.environ, "DATABASE_URL": database_url, "SECRET_KEY": "test-secret"}
+    subprocess.run([sys.executable, "-m", "alembic", *args], cwd=ROOT, env=env, check=True, capture_output=True)
+
+
+class TestStartup:
+
+    def setup_method(self):
+        """Setup an empty in-memory database for each test"""
+        self.engine = create_engine("sqlite://")
+
+    def set_revision(self, revision):
+        with self.engine.begin() as conn:
+            conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+            conn.execute(text("INSERT INTO alembic_version VALUES (:rev)"), {"rev": revision})
+
+    def test_revision_matches_head(self):
+        """Test that a database at the script head passes the check"""
+        head = get_alembic_head()
+        self.set_revision(head)
+
+        assert verify_schema_revision(self.engine) == head
+
+    def test_revision_mismatch(self):
+        """Test that an outdated database fails the check"""
+        self.set_revision("outdated")
+
+        with pytest.raises(RuntimeError, match="expected"):
+            verify_schema_revision(self.engine)
+
+    def test_unmigrated_database(self):
+        """Test that a database without alembic_version fails the check"""
+        with pytest.raises(RuntimeError, match="alembic upgrade head"):
+            verify_schema_revision(self.engine)
+
+    def test_create_all_refuses_stale_schema(self):
+        """Test that create_all mode does not serve a database migrations left behind"""
+        verify_not_stale(self.engine)
+
+        self.set_revision("outdated")
+        with pytest.raises(RuntimeError, match="alembic upgrade head"):
+            verify_not_stale(self.engine)
+
+    def test_baseline_database_is_stamped_and_upgraded(self, tmp_path):
+        """Test that a database created by create_all before migrations existed upgrades to head"""
+        url = f"sqlite:///{tmp_path / 'baseline.db'}"
+        engine = create_engine(url)
+        # The initial migration creates exactly the pre-migration schema
+        alembic(url, "upgrade", "3f1c2a9d8b7e")
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE alembic_version"))
+
+        with pytest.raises(RuntimeError, match="predates the migrations"):
+            verify_not_stale(engine)
+
+        alembic(url, "upgrade", "head")
+
+        verify_not_stale(engine)
+        assert "excerpt" in {column["name"] for column in inspect(engine).get_columns("articles")}
+
+    def test_startup_timer(self):
+        """Test that every phase is recorded in the breakdown"""
+        timer = StartupTimer()
+        with timer.phase("engine"):
+            pass
+        with timer.phase("schema_revision"):
+            pass
+
+        assert list(timer.phases) == ["engine", "schema_revision"]
+        assert "schema_revision=" in timer.summary()
@@ -0,0 +1,64 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine, event
+
+from app.view_storage import ensure_buckets, insert_views, list_buckets, prune_expired, views_in_window
+
+
+def bucket_names(conn):
+    return [name for name, _ in list_buckets(conn)]
+
+
+class TestViewStorage:
+
+    def setup_method(self):
+        """Setup an empty in-memory database for each test"""
+        self.engine = create_engine("sqlite://")
+
+    def test_views_are_written_to_monthly_tables(self):
+        """Test that views land in the table for their month"""
+        with self.engine.begin() as conn:
+            insert_views(conn, [
+                {"user_id": 1, "article_id": 1, "viewed_at": datetime(2026, 1, 15)},
+                {"user_id": 1, "article_id": 2, "viewed_at": datetime(2026, 3, 2)},
+                {"user_id": 2, "article_id": 1, "viewed_at": datetime(2026, 3, 31, 23, 59)},
+            ])
+
+            assert bucket_names(conn) == ["article_views_202601", "article_views_202603"]
+            assert len(views_in_window(conn, datetime(2026, 3, 1), datetime(2026, 4, 1))) == 2
+
+    def test_window_query_only_reads_overlapping_tables(self):
+        """Test that a window query skips tables outside the window"""
+        statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        with self.engine.begin() as conn:
+            for month in (1, 2, 3, 4):
+                insert_views(conn, [{"user_id": 1, "article_id": month, "viewed_at": datetime(2026, month, 10)}])
+            statements.clear()
+
+            rows = views_in_window(conn, datetime(2026, 2, 1), datetime(2026, 3, 15), article_id=3)
+
+        assert [row.article_id for row in rows] == [3]
+        query = statements[-1]
+        assert "article_views_202602" in query and "article_views_202603" in query
+        assert "article_views_202601" not in query and "article_views_202604" not in query
+
+    def test_prune_drops_expired_tables(self):
+        """Test that retention drops whole tables older than the window"""
+        now = datetime(2026, 10, 19)
+        with self.engine.begin() as conn:
+            for month in (7, 8, 9, 10):
+                insert_views(conn, [{"user_id": 1, "article_id": 1, "viewed_at": datetime(2026, month, 1)}])
+
+            dropped = prune_expired(conn, retention_months=2, now=now)
+
+            assert dropped == ["article_views_202607"]
+            assert bucket_names(conn) == ["article_views_202608", "article_views_202609", "article_views_202610"]
+
+    def test_ensure_creates_upcoming_tables(self):
+        """Test that upcoming months are created ahead of time and only once"""
+        with self.engine.begin() as conn:
+            created = ensure_buckets(conn, months_ahead=2, now=datetime(2026, 11, 5))
+            assert created == ["article_views_202611", "article_views_202612", "article_views_202701"]
+            assert ensure_buckets(conn, months_ahead=2, now=datetime(2026, 11, 5)) == []